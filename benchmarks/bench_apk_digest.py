@@ -0,0 +1,88 @@
+"""
+Re-signing a large APK after patching one entry: cold digest vs. per-entry digest cache.
+
+Builds a synthetic APK (half STORED random blobs, half DEFLATED compressible data),
+signs it once with an empty cache, repacks it with one modified entry (every following
+offset shifts, like apktool b) over the same path and signs it again.
+
+    python benchmarks/bench_apk_digest.py               # 500 MB
+    python benchmarks/bench_apk_digest.py --size 100 --entries 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+KEYSTORE = os.path.join(ROOT, "config", "my-release-key.keystore")
+
+
+def build_apk(path, size_mb, entries):
+    entry_size = size_mb * 1024 * 1024 // entries
+    text = (b"const-string v0, \"patched\"\ninvoke-static {v0}, Landroid/util/Log;->d\n" * (entry_size // 64 + 1))[:entry_size]
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("AndroidManifest.xml", b"<manifest/>" * 100, zipfile.ZIP_DEFLATED)
+        for i in range(entries):
+            if i % 2:
+                zf.writestr(f"assets/blob{i}.bin", os.urandom(entry_size), zipfile.ZIP_STORED)
+            else:
+                zf.writestr(f"classes{i}.dex", text, zipfile.ZIP_DEFLATED, compresslevel=1)
+
+
+def repack_with_change(src_path, dst_path, changed):
+    """Copy every entry raw except `changed`, whose content is replaced."""
+    from utils.apk_digest import MappedApk
+    from utils.apk_signer import SIGNATURE_FILE, copy_entry_raw
+    with MappedApk(src_path) as src, zipfile.ZipFile(dst_path, "w") as zout:
+        # entry mới ở đầu để mọi offset phía sau đều dịch đi
+        zout.writestr(changed, b"patched smali " * 1000, zipfile.ZIP_DEFLATED)
+        for info in src.infolist():
+            if info.filename != changed and not SIGNATURE_FILE.match(info.filename):
+                copy_entry_raw(zout, info, src.data(info))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500, help="APK size in MB")
+    parser.add_argument("--entries", type=int, default=40)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-apk-")
+    # cache riêng cho benchmark, không đụng ~/.frida-tool
+    os.environ["FRIDA_TOOL_HOME"] = os.path.join(workdir, "home")
+    from utils import apk_signer
+    sign = lambda path, **kw: apk_signer.sign(path, keystore=KEYSTORE, keypass="toannguyen", alias="alias_name", **kw)
+    try:
+        original = os.path.join(workdir, "app.apk")
+        build_seconds, _ = timed(lambda: build_apk(original, args.size, args.entries))
+        print(f"built {os.path.getsize(original) / 2**20:.0f} MB, {args.entries + 1} entries in {build_seconds:.1f}s")
+
+        uncached, _ = timed(lambda: sign(original, output=os.path.join(workdir, "nocache.apk"), use_cache=False))
+        cold, result = timed(lambda: sign(original))
+        print(f"sign without cache : {uncached:7.2f}s")
+        print(f"sign, cold cache   : {cold:7.2f}s  {result['digest_cache']}")
+
+        # build lại vào cùng đường dẫn, như apktool b ghi đè dist/app.apk
+        repacked = os.path.join(workdir, "repacked.apk")
+        repack_with_change(original, repacked, "classes0.dex")
+        os.replace(repacked, original)
+        warm, result = timed(lambda: sign(original))
+        print(f"re-sign, 1 changed : {warm:7.2f}s  {result['digest_cache']}")
+        print(f"speed-up           : {cold / warm:7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Device enumeration benchmark: sequential vs. concurrent enumerate_devices().
+
+No phones needed: host:devices and Device.shell are replaced by fakes that sleep
+for --latency seconds per round trip, and one extra device hangs forever to show
+that the per-device timeout keeps the listing bounded.
+
+    python benchmarks/bench_enumeration.py --latency 0.05 --counts 1 2 4 8 16 32
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["FRIDA_TOOL_HOME"] = tempfile.mkdtemp(prefix="frida-tool-bench-")
+
+from ppadb.device import Device  # noqa: E402
+import utils.adb_utils as adb_utils  # noqa: E402
+
+HUNG_SERIAL = "hung-device"
+_hang = threading.Event()
+
+
+def fake_shell(latency):
+    def shell(self, cmd, handler=None, timeout=None):
+        if self.serial == HUNG_SERIAL:
+            # Giống socket.recv bị treo: chỉ thoát khi hết timeout
+            _hang.wait(timeout)
+            raise TimeoutError("timed out")
+        time.sleep(latency)
+        return "Google\nPixel\n34\n14\narm64-v8a\nboot-id\n"
+    return shell
+
+
+def sequential(count, latency):
+    start = time.perf_counter()
+    for i in range(count):
+        device = Device(None, f"emulator-{i}")
+        for _ in range(4):  # 4 lần getprop như phiên bản cũ
+            fake_shell(latency)(device, "getprop")
+    return time.perf_counter() - start
+
+
+def concurrent(count, timeout, hung):
+    serials = [(f"emulator-{i}", "device") for i in range(count)]
+    if hung:
+        serials.append((HUNG_SERIAL, "device"))
+    adb_utils.device_states = lambda client: serials
+    start = time.perf_counter()
+    entries = adb_utils.enumerate_devices(client=object(), timeout=timeout, refresh=True)
+    elapsed = time.perf_counter() - start
+    assert sum(1 for _, info, _ in entries if info) == count
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake shell round trip")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Per-device timeout passed to enumerate_devices")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--hung", action="store_true", help="Add one device that never answers")
+    args = parser.parse_args()
+
+    Device.shell = fake_shell(args.latency)
+    print(f"{'devices':>8} {'sequential (s)':>15} {'concurrent (s)':>15}")
+    for count in args.counts:
+        print(f"{count:>8} {sequential(count, args.latency):>15.3f} {concurrent(count, args.timeout, args.hung):>15.3f}")
+    _hang.set()
+
+
+if __name__ == "__main__":
+    main()
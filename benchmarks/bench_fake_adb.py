@@ -0,0 +1,174 @@
+"""
+Command benchmarks against the local fake ADB server (benchmarks/fake_adb.py), no phones needed.
+
+For every device count, a fresh FakeAdbServer is started with that many devices
+(each round trip delayed by --latency), the tool is pointed at it and each
+scenario runs through the fleet path (utils.fleet.run_on_devices):
+
+    select_device        enumerate_devices() with a cold device-info cache
+    select_device_warm   enumerate_devices() within the cache TTL
+    packages             packages.collect_inventory()
+    install_cert         install_cert.install(), then again when already installed
+    check_cert           check_cert.check_index(), cold and with an unchanged token
+    klfrida              klfrida restart (waits for the port to listen), then status
+
+Results are compared with benchmarks/baselines/fake_adb.json. A scenario regresses
+when it is slower than its baseline by more than --threshold (relative) and
+--min-delta seconds; the script then exits with code 1.
+
+    python benchmarks/bench_fake_adb.py
+    python benchmarks/bench_fake_adb.py --counts 1 10 50 --runs 3
+    python benchmarks/bench_fake_adb.py --save-baseline    # after an intended change
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_adb import FakeAdbServer, make_devices  # noqa: E402
+import utils.adb_utils as adb_utils  # noqa: E402
+import utils.cache_utils as cache_utils  # noqa: E402
+from utils import root_shell  # noqa: E402
+from utils.fleet import run_on_devices  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines", "fake_adb.json")
+
+
+def make_certificate():
+    """A throw-away self-signed CA, stored through the certificate store like a Burp download."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    from utils.cert_store import store_certificate
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "bench CA")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(1).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    return store_certificate(cert.public_bytes(serialization.Encoding.DER))
+
+
+def fleet(func):
+    """Run func(device) on every device via the fleet runner; fail loudly if any device failed."""
+    def run(devices):
+        results = run_on_devices(lambda device, args: func(device), devices, None)
+        failed = [(serial, result) for serial, ok, result, _ in results if not ok]
+        if failed:
+            raise RuntimeError(f"{len(failed)} device(s) failed, e.g. {failed[0]}")
+    return run
+
+
+def scenarios(cert):
+    from commands import check_cert, install_cert, klfrida, packages
+    certs = [("bench", cert)]
+    return [
+        ("select_device", lambda devices: adb_utils.enumerate_devices(refresh=True)),
+        ("select_device_warm", lambda devices: adb_utils.enumerate_devices()),
+        ("packages", fleet(packages.collect_inventory)),
+        ("install_cert", fleet(lambda device: install_cert.install(device, cert=cert))),
+        ("install_cert_skip", fleet(lambda device: install_cert.install(device, cert=cert))),
+        ("check_cert", fleet(lambda device: check_cert.check_index(device, certs, refresh=True))),
+        ("check_cert_warm", fleet(lambda device: check_cert.check_index(device, certs))),
+        ("klfrida_restart", fleet(lambda device: klfrida.run_action(device, "restart", timeout=10))),
+        ("klfrida_status", fleet(lambda device: klfrida.run_action(device, "status"))),
+    ]
+
+
+def run_count(count, args, cert):
+    """Median seconds per scenario for one device count, on fresh devices and a fresh cache each run."""
+    samples = {}
+    for _ in range(args.runs):
+        # cache trống cho mỗi lần chạy, không đụng ~/.frida-tool
+        cache_utils.CACHE_ROOT = tempfile.mkdtemp(prefix="frida-tool-bench-")
+        try:
+            with FakeAdbServer(make_devices(count, latency=args.latency, startup_delay=args.startup_delay)) as server:
+                adb_utils.ADB_PORT, adb_utils._client = server.port, None
+                from ppadb.device import Device
+                devices = [Device(adb_utils.get_client(), serial) for serial in server.devices]
+                for name, func in scenarios(cert):
+                    start = time.perf_counter()
+                    func(devices)
+                    samples.setdefault(name, []).append(time.perf_counter() - start)
+                root_shell.close_all()
+        finally:
+            shutil.rmtree(cache_utils.CACHE_ROOT, ignore_errors=True)
+    return {name: round(statistics.median(values), 4) for name, values in samples.items()}
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    for name, by_count in results.items():
+        for count, seconds in by_count.items():
+            base = baseline.get(name, {}).get(count)
+            if base is not None and seconds > base * (1 + threshold) and seconds - base > min_delta:
+                regressions.append((name, count, base, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds per fake round trip")
+    parser.add_argument("--startup-delay", type=float, default=0.1, help="Seconds before a started frida-server listens")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per count (median is reported)")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed relative slowdown vs. baseline")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns smaller than this (seconds)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    cert_home = cache_utils.CACHE_ROOT = tempfile.mkdtemp(prefix="frida-tool-bench-")
+    try:
+        cert = make_certificate()
+        results = {}
+        for count in args.counts:
+            for name, seconds in run_count(count, args, cert).items():
+                results.setdefault(name, {})[str(count)] = seconds
+    finally:
+        shutil.rmtree(cert_home, ignore_errors=True)
+
+    print(f"{'scenario':<20}" + "".join(f"{count:>9}" for count in args.counts) + "   (seconds, devices)")
+    for name, by_count in results.items():
+        print(f"{name:<20}" + "".join(f"{by_count[str(count)]:>9.3f}" for count in args.counts))
+
+    settings = {"latency": args.latency, "startup_delay": args.startup_delay}
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except OSError:
+        print(f"\nno baseline at {args.baseline}, run with --save-baseline first")
+        return
+    if baseline.get("settings") != settings:
+        print(f"\nbaseline was recorded with {baseline.get('settings')}, not comparing")
+        return
+    regressions = compare(results, baseline["results"], args.threshold, args.min_delta)
+    if not regressions:
+        print("\nno regression against baseline")
+        return
+    print("\nREGRESSIONS:")
+    for name, count, base, seconds in regressions:
+        print(f"  {name} with {count} device(s): {base:.3f}s -> {seconds:.3f}s")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
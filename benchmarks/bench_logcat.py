@@ -0,0 +1,59 @@
+"""
+Long logcat capture on a busy (fake) device: throughput and memory over time.
+
+Starts a FakeAdbServer whose logcat emits --rate lines/s, runs a LogcatCapture filtered by
+package (ring buffer of --ring lines) for --seconds, and prints every second the lines
+matched so far and the peak RSS of this process. The peak should stop growing once the
+ring buffer is full.
+
+    python benchmarks/bench_logcat.py
+    python benchmarks/bench_logcat.py --rate 50000 --seconds 60
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_adb import FakeAdbServer, make_devices  # noqa: E402
+import utils.adb_utils as adb_utils  # noqa: E402
+from utils.logcat import LogcatCapture  # noqa: E402
+
+
+def peak_rss_mb():
+    # ru_maxrss: KB trên Linux, byte trên macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=20000, help="Fake logcat lines per second")
+    parser.add_argument("--seconds", type=int, default=20)
+    parser.add_argument("--ring", type=int, default=5000, help="Ring buffer size (lines)")
+    args = parser.parse_args()
+
+    with FakeAdbServer(make_devices(1, logcat_rate=args.rate, running_apps=("com.example.app0", "com.example.app1"))) as server:
+        adb_utils.ADB_PORT, adb_utils._client = server.port, None
+        from ppadb.device import Device
+        device = Device(adb_utils.get_client(), "fake-000")
+        capture = LogcatCapture(device, package="com.example.app0", size=args.ring)
+        start = time.perf_counter()
+        print(f"{'second':>6} {'matched':>10} {'lines/s':>9} {'buffered':>9} {'peak RSS':>9}")
+        previous = 0
+        for second in range(1, args.seconds + 1):
+            time.sleep(max(0.0, start + second - time.perf_counter()))
+            matched = capture.matched
+            print(f"{second:>6} {matched:>10} {matched - previous:>9} {len(capture.lines):>9} {peak_rss_mb():>7.1f}MB")
+            previous = matched
+        capture.stop()
+        elapsed = time.perf_counter() - start
+        print(f"\n{capture.matched / elapsed:.0f} matching lines/s (of ~{args.rate} lines/s emitted, 1 in 4 match)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Latency of one MCP tool call: old path (spawn `uv run cli_tool.py ...`) vs. in-process API.
+
+The call is `signapk` on a missing APK, so it runs offline and both paths do the
+same (trivial) work: everything measured is per-call overhead.
+
+    python benchmarks/bench_mcp_inprocess.py --runs 10
+    python benchmarks/bench_mcp_inprocess.py --runs 10 --no-uv   # plain python instead of uv run
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MISSING_APK = os.path.join(ROOT, "does-not-exist.apk")
+
+
+def old_path(use_uv):
+    launcher = ["uv", "run"] if use_uv else [sys.executable]
+    subprocess.run(launcher + ["cli_tool.py", "signapk", "-af", MISSING_APK],
+                   capture_output=True, text=True, cwd=ROOT)
+
+
+def new_path():
+    from commands import signapk
+    try:
+        signapk.sign_apk(MISSING_APK)
+    except ValueError:
+        pass
+
+
+def measure(func, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--no-uv", action="store_true", help="Spawn plain python instead of `uv run`")
+    args = parser.parse_args()
+    use_uv = not args.no_uv and shutil.which("uv") is not None
+
+    start = time.perf_counter()
+    new_path()  # lần đầu: import module (server chỉ trả chi phí này một lần)
+    first_call = time.perf_counter() - start
+
+    old_median, old_max = measure(lambda: old_path(use_uv), args.runs)
+    new_median, new_max = measure(new_path, args.runs)
+    label = "uv run cli_tool.py" if use_uv else "python cli_tool.py"
+    print(f"{'path':<28} {'median (ms)':>12} {'max (ms)':>10}")
+    print(f"{label:<28} {old_median * 1000:>12.1f} {old_max * 1000:>10.1f}")
+    print(f"{'in-process API':<28} {new_median * 1000:>12.3f} {new_max * 1000:>10.3f}")
+    print(f"in-process first call (imports): {first_call * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Startup-time benchmark for cli_tool with a regression budget.
+
+For each probe command line it runs `python -X importtime cli_tool.py ...`, sums the
+import time of every module not already imported by a bare interpreter, and fails
+(exit code 1) when that exceeds --budget-ms or when a heavy dependency (OpenSSL,
+requests, ppadb) is imported by a command that does not need it. It also checks that
+the static manifest in commands/__init__.py matches what each module registers.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 60 --runs 5
+"""
+import argparse
+import importlib
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ("OpenSSL", "requests", "ppadb")
+# (argv, các module nặng được phép import)
+PROBES = [
+    (["--help"], ()),
+    (["devices", "-h"], ()),
+    (["proxy", "get", "-h"], ()),
+    (["signapk", "-h"], ()),
+    (["install_cert", "-h"], ("OpenSSL", "requests")),
+]
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times(argv):
+    """Return {module: self time in us} for one interpreter run."""
+    # luôn đo process cục bộ, kể cả khi daemon đang chạy
+    result = subprocess.run([sys.executable, "-X", "importtime"] + argv,
+                            capture_output=True, text=True, cwd=ROOT, env={**os.environ, "FRIDA_TOOL_NO_DAEMON": "1"})
+    times = {}
+    for match in IMPORT_LINE.finditer(result.stderr):
+        times[match.group(4)] = int(match.group(1))
+    return times
+
+
+def check_manifest():
+    """Every manifest entry must be registered by its module under the same name."""
+    import argparse as _argparse
+    from commands import COMMANDS
+    errors = []
+    for name, (module_name, _) in COMMANDS.items():
+        parser = _argparse.ArgumentParser()
+        subparsers = parser.add_subparsers()
+        importlib.import_module(f"commands.{module_name}").add_parser(subparsers)
+        if name not in subparsers.choices:
+            errors.append(f"commands.{module_name} does not register '{name}'")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Max import time on top of a bare interpreter")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = set(import_times(["-c", "pass"]))
+    failures = check_manifest()
+    print(f"{'command':<24} {'imports (ms)':>12}  heavy modules")
+    for argv, allowed in PROBES:
+        totals = []
+        for _ in range(args.runs):
+            times = import_times(["cli_tool.py"] + argv)
+            totals.append(sum(us for module, us in times.items() if module not in baseline) / 1000)
+        heavy = sorted({m.split(".")[0] for m in times if m.split(".")[0] in HEAVY_MODULES})
+        total = statistics.median(totals)
+        label = " ".join(argv)
+        print(f"{label:<24} {total:>12.1f}  {', '.join(heavy) or '-'}")
+        if total > args.budget_ms and not allowed:
+            failures.append(f"'{label}' imports take {total:.1f} ms (budget {args.budget_ms} ms)")
+        unexpected = [m for m in heavy if m not in allowed]
+        if unexpected:
+            failures.append(f"'{label}' imports {', '.join(unexpected)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
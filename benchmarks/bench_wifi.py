@@ -0,0 +1,77 @@
+"""
+WiFi discovery and keepalive against loopback adbd listeners standing in for phones.
+
+Starts a FakeAdbServer and --phones FakeAdbd listeners on 127.0.0.2, 127.0.0.3, ...
+(Linux routes all of 127.0.0.0/8 to loopback), then:
+
+    scan        wifi_adb.discover() over --cidr: probe time, responders, connections
+    drop        stops --drop listeners; Watcher.check() passes until they come back,
+                showing the backoff between attempts
+    reconnect   restarts them; time until the watcher has every phone connected again
+
+    python benchmarks/bench_wifi.py
+    python benchmarks/bench_wifi.py --phones 50 --cidr 127.0.0.0/22 --concurrency 1024
+"""
+import argparse
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_adb import FakeAdbd, FakeAdbServer  # noqa: E402
+import utils.adb_utils as adb_utils  # noqa: E402
+from utils import wifi_adb  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phones", type=int, default=20)
+    parser.add_argument("--port", type=int, default=15555, help="adbd port of every phone")
+    parser.add_argument("--cidr", default="127.0.0.0/24")
+    parser.add_argument("--concurrency", type=int, default=wifi_adb.SCAN_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=wifi_adb.PROBE_TIMEOUT)
+    parser.add_argument("--drop", type=int, default=5, help="Phones that drop off and come back")
+    parser.add_argument("--down", type=float, default=3, help="Seconds the dropped phones stay away")
+    args = parser.parse_args()
+
+    phones = [FakeAdbd(f"127.0.0.{i + 2}", args.port).start() for i in range(args.phones)]
+    with FakeAdbServer([]) as server:
+        adb_utils.ADB_PORT, adb_utils._client = server.port, None
+        result = wifi_adb.discover(args.cidr, [args.port], args.concurrency, args.timeout)
+        connected = [c["target"] for c in result["connections"] if c["connected"]]
+        print(f"scan       {result['probed']} targets in {result['scan_seconds']:.3f}s, "
+              f"{len(result['found'])} answered, {len(connected)} connected")
+
+        watcher = wifi_adb.Watcher(connected, backoff_min=0.25, backoff_max=2)
+        dropped = phones[:args.drop]
+        for phone in dropped:
+            phone.stop()
+        start = time.monotonic()
+        attempts = 0
+        while time.monotonic() - start < args.down:
+            attempts += sum(1 for event in watcher.check() if not event["connected"])
+            time.sleep(0.05)
+        print(f"drop       {len(dropped)} phone(s) away {args.down}s: {attempts} failed reconnect(s) "
+              f"(~{attempts / max(1, len(dropped)):.0f} each with backoff, vs {args.down / 0.05:.0f} polls)")
+
+        for phone in dropped:
+            phone.start()
+        start = time.monotonic()
+        while True:
+            watcher.check()
+            states = dict(adb_utils.device_states(adb_utils.get_client()))
+            if all(states.get(target) == "device" for target in connected):
+                break
+            time.sleep(0.05)
+        reconnects = sum(state["reconnects"] for state in watcher.targets.values())
+        print(f"reconnect  all {len(connected)} connected again after {time.monotonic() - start:.2f}s "
+              f"({reconnects} reconnect(s))")
+    for phone in phones:
+        phone.stop()
+
+
+if __name__ == "__main__":
+    main()
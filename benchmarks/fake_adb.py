@@ -0,0 +1,610 @@
+"""
+Local stand-in for the ADB server: speaks the smart-socket protocol (host:devices,
+host:transport:<serial>, host:connect/disconnect, shell:<cmd>, the interactive shell:su
+used by utils.root_shell) and the sync protocol (SEND/DATA/DONE, STAT, RECV) on a TCP
+port, with scriptable in-memory devices. FakeAdbd listeners on loopback addresses stand
+in for phones in WiFi debugging mode (`connect --scan`, `connect --watch`).
+
+Each FakeDevice has properties, a small file system (CA stores, /data/local/tmp),
+a process table, canned `pm list packages` output, an endless `logcat -v threadtime`
+stream at --logcat-rate lines/s and an injectable per-round-trip latency and push bandwidth. It understands the shell scripts this tool sends, not
+shell in general: unknown commands answer "not found" with exit code 127.
+
+Run it standalone and point the CLI at it:
+
+    python benchmarks/fake_adb.py --devices 8 --port 15037 --latency 0.02
+    ANDROID_ADB_SERVER_PORT=15037 python cli_tool.py --all-devices klfrida status
+"""
+import argparse
+import fnmatch
+import gzip
+import hashlib
+import itertools
+import posixpath
+import re
+import shlex
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+
+FRIDA_PORT = 27042
+SYSTEM_CA_DIR = "/system/etc/security/cacerts"
+APEX_CA_DIR = "/apex/com.android.conscrypt/cacerts"
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+SYNC_OKAY = b"OKAY" + struct.pack("<I", 0)
+A_CNXN = 0x4E584E43
+
+# Script nguyên khối (có vòng lặp / $(...)) được nhận diện theo mẫu
+INDEX_SCRIPT = re.compile(r'^token=\$\(for d in (?P<dirs>.*?); do .*?if \[ "\$token" = "(?P<known>[^"]*)" \]; then echo (?P<marker>\S+);', re.S)
+KILL_SCRIPT = re.compile(r"^ps -A -o PID,ARGS \| grep '\[f\]rida-server' \| while read pid rest; do kill -9 \$pid && echo \$pid; done$")
+PS_SCRIPT = re.compile(r"^ps -A -o PID,ARGS \| grep '\[f\]rida-server'$")
+LISTEN_SCRIPT = re.compile(r"^cat /proc/net/tcp /proc/net/tcp6 2>/dev/null \| grep -qi ':(?P<port>[0-9A-F]{4}) ")
+SU_FRAME = re.compile(rb"\( (?P<cmd>.*?)\n\) </dev/null 2>&1; printf '\\n(?P<marker>__FT_\w+__) %s\\n' \$\?\n", re.S)
+SU_C = re.compile(r"^su -c (?P<cmd>.*) 2>&1; printf '\\n(?P<marker>__FT_\w+__) %s\\n' \$\?$", re.S)
+DISCARDED = {"2>/dev/null", ">/dev/null", "2>&1", "</dev/null", "&"}
+
+
+class FakeDevice:
+    def __init__(self, serial, latency=0.0, bandwidth=None, brand="Google", model="Pixel 7", sdk="34", release="14",
+                 abi="arm64-v8a", packages=250, system_certs=140, frida_versions=("16.5.9",), startup_delay=0.1,
+                 running_apps=("com.example.app0",), logcat_rate=200):
+        self.serial = serial
+        self.logcat_rate = logcat_rate
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.startup_delay = startup_delay
+        self.props = {
+            "ro.product.brand": brand, "ro.product.model": model, "ro.build.version.sdk": sdk,
+            "ro.build.version.release": release, "ro.product.cpu.abi": abi,
+        }
+        self.settings = {"http_proxy": "null"}
+        self.binaries = {"gzip", "md5sum", "sha256sum", "stat", "settings", "pm"}
+        self.files = {}
+        self.dirs = {"/data/local/tmp", SYSTEM_CA_DIR, APEX_CA_DIR, "/data/misc/user/0"}
+        self.processes = {}
+        self.listening_at = None
+        self.lock = threading.RLock()
+        self._pids = itertools.count(1000)
+        self.apps = {4000 + i: name for i, name in enumerate(running_apps)}
+        self.packages = [
+            f"package:/data/app/~~{i:04x}==/com.example.app{i}-{i:04x}==/base.apk=com.example.app{i} versionCode:{i + 1} uid:{10000 + i}"
+            for i in range(packages)
+        ]
+        for i in range(system_certs):
+            name = f"{hashlib.md5(str(i).encode()).hexdigest()[:8]}.0"
+            data = f"-----BEGIN CERTIFICATE-----\nfake {i}\n-----END CERTIFICATE-----\n".encode()
+            self.write(f"{SYSTEM_CA_DIR}/{name}", data)
+            self.write(f"{APEX_CA_DIR}/{name}", data)
+        for version in frida_versions:
+            self.write(f"/data/local/tmp/frida-server-{version}", b"\x7fELF fake frida-server " + version.encode())
+        self.reboot()
+
+    # ---------------------------------------------------------------- state
+    def write(self, path, data, mtime=None):
+        with self.lock:
+            self.files[path] = (bytes(data), time.time() if mtime is None else mtime)
+            self.dirs.add(posixpath.dirname(path))
+
+    def reboot(self):
+        with self.lock:
+            self.write(BOOT_ID_PATH, f"{uuid.uuid4()}\n".encode())
+            self.processes.clear()
+            self.listening_at = None
+
+    def _listening(self, port):
+        return port == FRIDA_PORT and self.listening_at is not None and time.time() >= self.listening_at
+
+    def _glob(self, pattern):
+        return sorted(path for path in self.files if fnmatch.fnmatchcase(path, pattern))
+
+    # ---------------------------------------------------------------- shell
+    def run(self, script):
+        """Execute one shell script. Return (output, exit code)."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            script = script.strip()
+            match = INDEX_SCRIPT.match(script)
+            if match:
+                return self._index(match.group("dirs").split(), match.group("known"), match.group("marker"))
+            if KILL_SCRIPT.match(script):
+                killed = [pid for pid, args in self.processes.items() if "frida-server" in args]
+                for pid in killed:
+                    del self.processes[pid]
+                if killed:
+                    self.listening_at = None
+                return "".join(f"{pid}\n" for pid in killed), 0
+            return self._sequence(script)
+
+    def _sequence(self, script):
+        output, code = [], 0
+        for segment, op in _split(script):
+            if op == "&&" and code != 0:
+                continue
+            text, code = self._segment(segment)
+            output.append(text)
+        return "".join(output), code
+
+    def _segment(self, segment):
+        if PS_SCRIPT.match(segment):
+            lines = [f"{pid} {args}\n" for pid, args in self.processes.items() if "frida-server" in args]
+            return "".join(lines), 0 if lines else 1
+        match = LISTEN_SCRIPT.match(segment)
+        if match:
+            return "", 0 if self._listening(int(match.group("port"), 16)) else 1
+        try:
+            tokens = shlex.split(segment)
+        except ValueError:
+            return f"sh: syntax error: {segment}\n", 2
+        target, args = None, []
+        for i, token in enumerate(tokens):
+            if token in DISCARDED:
+                continue
+            if token == ">" and i + 1 < len(tokens):
+                target = tokens[i + 1]
+            elif token.startswith(">") and not token.startswith(">/dev/"):
+                target = token[1:]
+            elif i == 0 or tokens[i - 1] != ">":
+                args.append(token)
+        if not args:
+            return "", 0
+        output, code = self._command(args[0], args[1:])
+        if target is not None:
+            self.write(target, output if isinstance(output, bytes) else output.encode())
+            return "", code
+        return output.decode(errors="replace") if isinstance(output, bytes) else output, code
+
+    def _command(self, name, args):
+        handler = getattr(self, f"_cmd_{name}", None)
+        if handler is None:
+            return f"sh: {name}: not found\n", 127
+        return handler(args)
+
+    def _missing(self, name, path):
+        return f"{name}: {path}: No such file or directory\n", 1
+
+    def _cmd_getprop(self, args):
+        return f"{self.props.get(args[0], '')}\n", 0
+
+    def _cmd_id(self, args):
+        return "0\n", 0
+
+    def _cmd_echo(self, args):
+        return " ".join(args) + "\n", 0
+
+    def _cmd_true(self, args):
+        return "", 0
+
+    def _cmd_cat(self, args):
+        out = []
+        for path in args:
+            if path not in self.files:
+                return "".join(out) + self._missing("cat", path)[0], 1
+            out.append(self.files[path][0].decode(errors="replace"))
+        return "".join(out), 0
+
+    def _cmd_ls(self, args):
+        out, code = [], 0
+        for pattern in args:
+            matches = self._glob(pattern) or ([pattern] if pattern in self.dirs else [])
+            if not matches:
+                out.append(self._missing("ls", pattern)[0])
+                code = 1
+            out += [f"{path}\n" for path in matches]
+        return "".join(out), code
+
+    def _digest(self, algorithm, args):
+        out, code = [], 0
+        for path in args:
+            if path not in self.files:
+                out.append(self._missing(algorithm, path)[0])
+                code = 1
+                continue
+            out.append(f"{hashlib.new(algorithm.replace('sum', ''), self.files[path][0]).hexdigest()}  {path}\n")
+        return "".join(out), code
+
+    def _cmd_md5sum(self, args):
+        return self._digest("md5sum", args)
+
+    def _cmd_sha256sum(self, args):
+        return self._digest("sha256sum", args)
+
+    def _cmd_mkdir(self, args):
+        for path in args:
+            if not path.startswith("-"):
+                self.dirs.add(path)
+        return "", 0
+
+    def _cmd_cp(self, args):
+        src, dst = args[-2:]
+        if src not in self.files:
+            return self._missing("cp", src)
+        self.write(dst, self.files[src][0])
+        return "", 0
+
+    def _cmd_mv(self, args):
+        src, dst = args[-2:]
+        if src not in self.files:
+            return self._missing("mv", src)
+        self.write(dst, self.files.pop(src)[0])
+        return "", 0
+
+    def _cmd_find(self, args):
+        # Chỉ dạng `find DIR -type f -exec stat -c FORMAT {} +` của utils.file_sync
+        root = args[0].rstrip("/") + "/"
+        paths = sorted(path for path in self.files if path.startswith(root))
+        if "-exec" in args:
+            return self._cmd_stat(args[args.index("-exec") + 2:-2] + paths)
+        return "".join(f"{path}\n" for path in paths), 0
+
+    def _cmd_stat(self, args):
+        fmt, paths = (args[1], args[2:]) if args[:1] == ["-c"] else ("%n", args)
+        out = []
+        for path in paths:
+            if path not in self.files:
+                continue
+            data, mtime = self.files[path]
+            out.append(fmt.replace("%s", str(len(data))).replace("%Y", str(int(mtime))).replace("%n", path) + "\n")
+        return "".join(out), 0
+
+    def _cmd_rm(self, args):
+        for path in args:
+            self.files.pop(path, None)
+        return "", 0
+
+    def _cmd_chmod(self, args):
+        return ("", 0) if args[-1] in self.files or args[-1] in self.dirs else self._missing("chmod", args[-1])
+
+    def _cmd_chown(self, args):
+        return ("", 0) if args[-1] in self.files or args[-1] in self.dirs else self._missing("chown", args[-1])
+
+    def _cmd_chcon(self, args):
+        return ("", 0) if args[-1] in self.files or args[-1] in self.dirs else self._missing("chcon", args[-1])
+
+    def _cmd_gzip(self, args):
+        path = args[-1]
+        if path not in self.files:
+            return self._missing("gzip", path)
+        return gzip.decompress(self.files[path][0]), 0
+
+    def _cmd_command(self, args):
+        name = args[-1]
+        return (f"/system/bin/{name}\n", 0) if name in self.binaries else ("", 1)
+
+    def _cmd_settings(self, args):
+        if args[:1] == ["get"]:
+            return f"{self.settings.get(args[2], 'null')}\n", 0
+        if args[:1] == ["put"]:
+            self.settings[args[2]] = args[3]
+            return "", 0
+        return "usage: settings get|put\n", 1
+
+    def _cmd_pm(self, args):
+        if args[:2] == ["list", "packages"]:
+            return "".join(f"{line}\n" for line in self.packages), 0
+        return "", 1
+
+    def _cmd_ps(self, args):
+        # `ps -A -o PID,NAME 2>/dev/null || ps`: chỉ nhánh đầu
+        lines = ["PID NAME", "1 init", "1500 system_server"]
+        lines += [f"{pid} {name}" for pid, name in {**self.processes, **self.apps}.items()]
+        return "".join(f"{line}\n" for line in lines), 0
+
+    def logcat_stream(self, request, batch=0.01):
+        """Endless `logcat -v threadtime`: lines of system_server and every running app, until the client closes."""
+        pids = [(1500, "ActivityManager"), (1500, "PackageManager")] + [(pid, name.rsplit(".", 1)[-1]) for pid, name in self.apps.items()]
+        counter = itertools.count()
+        per_batch = max(1, int(self.logcat_rate * batch))
+        while True:
+            now = time.strftime("%m-%d %H:%M:%S")
+            lines = []
+            for _ in range(per_batch):
+                n = next(counter)
+                pid, tag = pids[n % len(pids)]
+                lines.append(f"{now}.{n % 1000:03d}  {pid:>5}  {pid + 1:>5} {'VDIWE'[n % 5]} {tag}: fake log line {n}\n")
+            try:
+                request.sendall("".join(lines).encode())
+            except OSError:
+                return
+            time.sleep(batch)
+
+    def _cmd_nohup(self, args):
+        path = args[0]
+        if path not in self.files:
+            return self._missing("nohup", path)
+        self.processes[next(self._pids)] = path
+        if "frida-server" in path and self.listening_at is None:
+            self.listening_at = time.time() + self.startup_delay
+        return "", 0
+
+    def _cmd_reboot(self, args):
+        self.reboot()
+        return "", 0
+
+    def _index(self, dirs, known, marker):
+        files = sorted(path for path in self.files if posixpath.dirname(path) in dirs)
+        listing = "".join(f"{path} {len(self.files[path][0])} {int(self.files[path][1])}\n" for path in files)
+        token = hashlib.md5(listing.encode()).hexdigest()
+        if token == known:
+            return f"{marker}\n", 0
+        return token + "\n" + self._digest("md5sum", files)[0], 0
+
+    # ---------------------------------------------------------------- su
+    def su_session(self, request):
+        """Serve an interactive `shell:su`: framed scripts in, output + end marker out."""
+        buffer = b""
+        while True:
+            match = SU_FRAME.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                output, code = self.run(match.group("cmd").decode())
+                request.sendall(f"{output}\n{match.group('marker').decode()} {code}\n".encode())
+                continue
+            if buffer.startswith(b"exit\n"):
+                return
+            chunk = request.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+
+    def shell(self, command):
+        match = SU_C.match(command)
+        if match:
+            output, code = self.run(shlex.split(match.group("cmd"))[0])
+            return f"{output}\n{match.group('marker')} {code}\n"
+        return self.run(command)[0]
+
+
+def _split(script):
+    """Split a script on ; and && outside quotes. Return [(segment, operator before it)]."""
+    segments, current, op, quote = [], [], ";", None
+    i = 0
+    while i < len(script):
+        ch = script[i]
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"":
+            quote = ch
+        elif ch == ";" or ch == "\n":
+            segments.append(("".join(current).strip(), op))
+            current, op = [], ";"
+            i += 1
+            continue
+        elif script.startswith("&&", i):
+            segments.append(("".join(current).strip(), op))
+            current, op = [], "&&"
+            i += 2
+            continue
+        current.append(ch)
+        i += 1
+    segments.append(("".join(current).strip(), op))
+    return [(segment, op) for segment, op in segments if segment]
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _read(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def _reply(self, payload=None):
+        self.request.sendall(b"OKAY" + (b"" if payload is None else f"{len(payload):04x}".encode() + payload))
+
+    def _fail(self, message):
+        message = message.encode()
+        self.request.sendall(b"FAIL" + f"{len(message):04x}".encode() + message)
+
+    def handle(self):
+        server = self.server
+        device = None
+        try:
+            while True:
+                request = self._read(int(self._read(4), 16)).decode()
+                if request == "host:version":
+                    return self._reply(b"0029")
+                if request in ("host:devices", "host:devices-l"):
+                    server.prune()
+                    return self._reply("".join(f"{serial}\tdevice\n" for serial in server.devices).encode())
+                if request.startswith("host:connect:"):
+                    return self._reply(server.connect(request[len("host:connect:"):]).encode())
+                if request.startswith("host:disconnect:"):
+                    target = request[len("host:disconnect:"):]
+                    server.devices.pop(target, None)
+                    return self._reply(f"disconnected {target}".encode())
+                if request.startswith("host:transport:"):
+                    device = server.devices.get(request.split(":", 2)[2])
+                    if device is None:
+                        return self._fail("device not found")
+                    self._reply()
+                    continue
+                if device is None:
+                    return self._fail(f"unsupported request {request}")
+                if request == "shell:su":
+                    self._reply()
+                    return device.su_session(self.request)
+                if request.startswith("shell:logcat"):
+                    self._reply()
+                    return device.logcat_stream(self.request)
+                if request.startswith("shell:"):
+                    self._reply()
+                    return self.request.sendall(device.shell(request[len("shell:"):]).encode())
+                if request == "sync:":
+                    self._reply()
+                    return self._sync(device)
+                if request == "reboot:":
+                    self._reply()
+                    return device.reboot()
+                return self._fail(f"unsupported request {request}")
+        except (ConnectionError, OSError):
+            pass
+
+    def _sync(self, device):
+        while True:
+            command, length = self._read(4), struct.unpack("<I", self._read(4))[0]
+            if command == b"SEND":
+                path = self._read(length).decode().rsplit(",", 1)[0]
+                chunks = []
+                while True:
+                    command, length = self._read(4), struct.unpack("<I", self._read(4))[0]
+                    if command == b"DONE":
+                        mtime = length  # DONE mang mtime của file local, như adbd
+                        break
+                    chunks.append(self._read(length))
+                    if device.bandwidth:
+                        time.sleep(length / device.bandwidth)
+                if device.latency:
+                    time.sleep(device.latency)
+                device.write(path, b"".join(chunks), mtime)
+                self.request.sendall(SYNC_OKAY)
+            elif command == b"STAT":
+                entry = device.files.get(self._read(length).decode())
+                stat = (0o100644, len(entry[0]), int(entry[1])) if entry else (0, 0, 0)
+                self.request.sendall(b"STAT" + struct.pack("<III", *stat))
+            elif command == b"RECV":
+                entry = device.files.get(self._read(length).decode())
+                if entry is None:
+                    message = b"No such file or directory"
+                    self.request.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+                    continue
+                for i in range(0, len(entry[0]), 65536):
+                    chunk = entry[0][i:i + 65536]
+                    self.request.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                self.request.sendall(b"DONE" + struct.pack("<I", 0))
+            else:
+                return
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    """ThreadingTCPServer serving FakeDevices; port 0 picks a free port (see .port)."""
+    daemon_threads = True
+    allow_reuse_address = True
+    # cả fleet connect cùng lúc: backlog mặc định (5) làm SYN bị drop, chờ retransmit 1s
+    request_queue_size = 256
+
+    def __init__(self, devices, host="127.0.0.1", port=0):
+        self.devices = {device.serial: device for device in devices}
+        # device WiFi (host:port) đã từng `adb connect`: giữ nguyên state khi reconnect
+        self.remote = {}
+        super().__init__((host, port), _Handler)
+        self.port = self.server_address[1]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def connect(self, target):
+        """host:connect: handshake with the adbd listening at target and list it as a device."""
+        if target in self.devices:
+            return f"already connected to {target}"
+        host, _, port = target.rpartition(":")
+        try:
+            with socket.create_connection((host, int(port)), timeout=1) as sock:
+                sock.sendall(_adb_packet(A_CNXN, 0x01000001, 256 * 1024, b"host::\0"))
+                sock.recv(24)
+        except (OSError, ValueError) as e:
+            return f"failed to connect to '{target}': {getattr(e, 'strerror', None) or e}"
+        self.devices[target] = self.remote.setdefault(target, FakeDevice(target))
+        return f"connected to {target}"
+
+    def prune(self):
+        """Drop connected WiFi devices whose adbd stopped listening, as adb does when the transport dies."""
+        for target in [serial for serial in self.devices if serial in self.remote]:
+            host, _, port = target.rpartition(":")
+            try:
+                socket.create_connection((host, int(port)), timeout=0.2).close()
+            except OSError:
+                self.devices.pop(target, None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _adb_packet(command, arg0, arg1, payload):
+    return struct.pack("<6I", command, arg0, arg1, len(payload), sum(payload) & 0xFFFFFFFF, command ^ 0xFFFFFFFF) + payload
+
+
+class _AdbdHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            header = self.request.recv(24)
+            if len(header) == 24 and struct.unpack("<6I", header)[0] == A_CNXN:
+                self.request.sendall(_adb_packet(A_CNXN, 0x01000001, 256 * 1024, b"device::ro.product.model=Fake;\0"))
+            while self.request.recv(65536):
+                pass
+        except OSError:
+            pass
+
+
+class FakeAdbd:
+    """
+    adbd of a phone in WiFi debugging mode, on a loopback address (e.g. 127.0.0.2:15555): answers the
+    CNXN handshake of a probe or of host:connect. stop() drops the phone off the network, start() brings it back.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host, self.port = host, port
+        self._server = None
+
+    @property
+    def target(self):
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        server = socketserver.ThreadingTCPServer((self.host, self.port), _AdbdHandler, bind_and_activate=False)
+        server.daemon_threads = server.allow_reuse_address = True
+        server.server_bind()
+        server.server_activate()
+        self._server, self.port = server, server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def make_devices(count, **kwargs):
+    return [FakeDevice(f"fake-{i:03d}", **kwargs) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--port", type=int, default=15037)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every shell round trip and push")
+    parser.add_argument("--bandwidth", type=float, help="Push bandwidth in bytes/s (default: unlimited)")
+    parser.add_argument("--adbd", type=int, default=0,
+                        help="Also start N WiFi adbd listeners on 127.0.0.2, 127.0.0.3, ... for `connect --scan 127.0.0.0/24`")
+    parser.add_argument("--adbd-port", type=int, default=15555)
+    args = parser.parse_args()
+    server = FakeAdbServer(make_devices(args.devices, latency=args.latency, bandwidth=args.bandwidth), port=args.port)
+    listeners = [FakeAdbd(f"127.0.0.{i + 2}", args.adbd_port).start() for i in range(args.adbd)]
+    print(f"fake adb server with {args.devices} device(s) on 127.0.0.1:{server.port} (Ctrl+C to stop)")
+    if listeners:
+        print(f"adbd listening on {', '.join(listener.target for listener in listeners)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import argparse
-import pkgutil
 import os
+import sys
 import importlib
 from utils.color_utils import ANSI
+from commands import COMMANDS
+from utils.fleet import add_fleet_arguments, fleet_requested
+from utils import output, trace
 BANNER = f"""
     {ANSI.CYAN}==================================================================================
 
@@ -19,22 +22,118 @@ BANNER = f"""
             Welcome to my hacking tool - v.1.0 - @Copyright by {ANSI.RED}Toan Nguyen{ANSI.RESET}{ANSI.CYAN}
     ==================================================================================
 {ANSI.RESET}\n\n"""
-def main():
-    print(BANNER)
-    parser = argparse.ArgumentParser(description="CLI tool to run specific jobs.")
+# Luôn chạy trong process này, không gửi sang daemon: quản lý chính daemon, và lệnh stream/watch tới khi Ctrl+C
+LOCAL_COMMANDS = ("connect", "daemon", "logcat")
+
+def daemon_may_be_running():
+    """Cheap check before importing utils.daemon: False when it is disabled or has no socket file."""
+    if os.environ.get("FRIDA_TOOL_NO_DAEMON") == "1":
+        return False
+    from utils.cache_utils import daemon_socket_path
+    return os.path.exists(daemon_socket_path())
+
+def global_parser(prog=None):
+    """Parser with the options that go before the command (output, profiling, fleet)."""
+    parser = argparse.ArgumentParser(prog=prog, description="CLI tool to run specific jobs.")
+    output.add_output_argument(parser)
+    trace.add_profile_arguments(parser)
+    add_fleet_arguments(parser)
+    return parser
+
+def command_position(argv, parser=None):
+    """
+    Index of the subcommand in argv: the first token that is neither a global option nor its value
+    (`--trace-out packages proxy get` selects proxy). None when there is none or it is unknown.
+    """
+    options = (parser or global_parser())._option_string_actions
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        if not token.startswith("-") or token == "-":
+            return i if token in COMMANDS else None
+        name, has_value, _ = token.partition("=")
+        # argparse cũng nhận tiền tố duy nhất của option dài (--trace -> --trace-out)
+        candidates = {action for option, action in options.items() if option.startswith(name) and name.startswith("--")}
+        action = options.get(name) or (candidates.pop() if len(candidates) == 1 else None)
+        if action is not None and action.nargs != 0 and not has_value:
+            i += 1
+        i += 1
+    return None
+
+def selected_command(argv, parser=None):
+    """Return the subcommand named on the command line, or None (e.g. for plain --help)."""
+    position = command_position(argv, parser)
+    return None if position is None else argv[position]
+
+def build_parser(argv, prog=None):
+    parser = global_parser(prog)
     subparsers = parser.add_subparsers(dest="command", help=f"{ANSI.RED}Available commands{ANSI.RESET}")
 
-    # dynamically load all modules in the commands package
-    command_dir = os.path.join(os.path.dirname(__file__), 'commands')
-    for _, module_name,_ in pkgutil.iter_modules([command_dir]):
-        module = importlib.import_module(f'commands.{module_name}')
-        module.add_parser(subparsers)
-    
-    args = parser.parse_args()
-    if hasattr(args, "func"):
-        args.func(args)
+    # only the module of the selected command is imported, the others are listed from the manifest
+    selected = selected_command(argv, parser)
+    for name, (module_name, help_text) in COMMANDS.items():
+        if name == selected:
+            module = importlib.import_module(f'commands.{module_name}')
+            module.add_parser(subparsers)
+        else:
+            subparsers.add_parser(name, help=help_text)
+    return parser
+
+def run_command(args):
+    if fleet_requested(args):
+        from utils.fleet import run_fleet
+        run_fleet(args)
     else:
+        args.func(args)
+
+def run(args):
+    if not (args.profile or args.trace_out):
+        run_command(args)
+        return
+    trace.enable()
+    try:
+        # span của riêng lần chạy này (daemon chạy được nhiều lệnh cùng lúc), cộng span của thread không
+        # mang context theo (chỉ còn khi chạy cục bộ)
+        with trace.collect() as spans:
+            run_command(args)
+    finally:
+        trace.disable()
+        spans += trace.spans()
+        trace.print_summary(spans)
+        if args.trace_out:
+            print(f"{ANSI.CYAN}Chrome trace written to {trace.export_chrome(args.trace_out, spans)}{ANSI.RESET}")
+
+def execute(argv, prog=None):
+    """Parse argv and run the command in this process (also used by the daemon for forwarded invocations)."""
+    parser = build_parser(argv, prog)
+    args = parser.parse_args(argv)
+    if not hasattr(args, "func"):
         parser.print_help()
+    elif args.output_mode == "ndjson":
+        # lỗi cũng là một event, exit code != 0 cho script tự động
+        try:
+            run(args)
+        except Exception as e:
+            output.emit("error", command=args.command, error=str(e).strip() or type(e).__name__)
+            sys.exit(1)
+    else:
+        run(args)
+
+def main():
+    argv = sys.argv[1:]
+    position = command_position(argv)
+    command = None if position is None else argv[position]
+    mode = output.requested_mode(argv[:position])
+    if mode in output.MODES:
+        output.set_mode(mode)
+    print(BANNER)
+    # daemon đang chạy: chỉ gửi argv sang, khỏi import command / kết nối lại ADB
+    if command not in LOCAL_COMMANDS and daemon_may_be_running():
+        from utils import daemon
+        code = daemon.forward(argv)
+        if code is not None:
+            sys.exit(code)
+    execute(argv)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,19 @@
+from utils.color_utils import ANSI
+
+# Command manifest: subcommand name -> (module in this package, help text).
+# cli_tool only imports the module of the subcommand being run, so keep this in sync
+# with each module's add_parser() when adding or renaming a command.
+COMMANDS = {
+    "check_cert": ("check_cert", "Check device certificates with md5sum"),
+    "connect": ("connect_wifi", "Connect to device via ADB WiFi"),
+    "daemon": ("daemon", "Background daemon keeping ADB connections and root shells warm"),
+    "devices": ("devices", "List all connected devices"),
+    "install_cert": ("install_cert", f"Install a certificate with {ANSI.CYAN}ip{ANSI.RESET} and {ANSI.CYAN}port{ANSI.RESET}."),
+    "klfrida": ("klfrida", "Manage frida server (deploy/start/stop/restart/status)"),
+    "logcat": ("logcat", "Stream logcat filtered by package, tag and level"),
+    "packages": ("packages", "List all installed packages"),
+    "proxy": ("proxy", "Manage proxy settings"),
+    "reboot": ("reboot", "Reboot the device"),
+    "signapk": ("signapk", "Sign an APK file"),
+    "sync": ("sync", "Mirror a local folder to a device path, pushing only changed files"),
+}
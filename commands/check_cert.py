@@ -1,49 +1,130 @@
-from utils.adb_utils import run_adb_command, select_device
+from utils.adb_utils import select_device
 from utils.decorator import header
-from OpenSSL import crypto
+from utils.root_shell import root_shell
+from utils.cert_store import get_certificate
+from utils.cert_index import get_cert_index, find_by_hash, locate_certificate
+from utils.color_utils import ANSI
+from utils.output import emit
+from utils.paths import local_path
+
+CERT_PATHS = {
+    "user": "/data/misc/keychain/cacerts-added",
+    "system": "/system/etc/security/cacerts"
+}
+
 def add_parser(subparsers):
     parser = subparsers.add_parser("check_cert", help="Check device certificates with md5sum")
-    parser.set_defaults(func=check_cert)
+    parser.set_defaults(func=check_cert, fleet_prepare=_fleet_prepare, fleet_func=_fleet_check)
     parser.add_argument("-H", "--host", type=str, help="Host address for certificate download")
     parser.add_argument("-P", "--port", type=int, help="Port number for certificate download")
     parser.add_argument("-F", "--file", type=str, help="Path to local certificate file", default="9a5ba575.0")
+    parser.add_argument("--index", action="store_true",
+                        help="Hash every CA store (system, APEX, user) in one call and answer for many certificates at once")
+    parser.add_argument("--cert", action="append", type=local_path, default=[], help="Local DER/PEM certificate to look up (repeatable, --index)")
+    parser.add_argument("--names", type=str, help="Comma separated subject hashes to look up, e.g. 9a5ba575,c8750f0d (--index)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cached index (--index)")
+
+def certificate_md5(host, port):
+    """MD5 of Burp's CA in PEM form, served from the local certificate store."""
+    return get_certificate(host, port).md5_pem
+
+def check(device, md5_hash, filename):
+    """Return {store: {"present": bool, "md5": str or None, "match": bool}} for every store in CERT_PATHS."""
+    results = {}
+    for cert_type, path in CERT_PATHS.items():
+        output = root_shell(device, f"ls {path}/{filename}")
+        if filename not in output or "No such file" in output:
+            results[cert_type] = {"present": False, "md5": None, "match": False}
+            continue
+        output = root_shell(device, f"md5sum {path}/{filename}")
+        device_md5 = output.split()[0] if output.strip() else None
+        results[cert_type] = {"present": True, "md5": device_md5, "match": device_md5 == md5_hash}
+    return results
+
+# ------------------------------------------------------------------
+# Index mode: một lần gọi cho mọi store, trả lời cho nhiều cert cùng lúc
+# ------------------------------------------------------------------
+def _requested_certs(args):
+    """[(label, CertRecord)] from Burp (host/port) and every --cert file."""
+    certs = []
+    if args.host and args.port:
+        certs.append((f"burp {args.host}:{args.port}", get_certificate(args.host, args.port)))
+    for path in args.cert:
+        certs.append((path, get_certificate(path=path)))
+    return certs
+
+def check_index(device, certs, names=(), refresh=False):
+    """Return {"certs": {label: [locations]}, "names": {hash: [entries]}, "total": files indexed}."""
+    index = get_cert_index(device, refresh=refresh)
+    return {
+        "certs": {label: locate_certificate(index, cert) for label, cert in certs},
+        "names": {name: find_by_hash(index, name) for name in names},
+        "total": len(index["entries"]),
+    }
+
+def _names(args):
+    return [name.strip().split(".")[0] for name in (args.names or "").split(",") if name.strip()]
+
+def _describe(locations):
+    if not locations:
+        return "not installed"
+    return ", ".join(f"{l['store']}/{l['file']} ({'match' if l['match'] else 'differs'})" for l in locations)
+
+def _fleet_prepare(args):
+    if args.index:
+        args.certs = _requested_certs(args)
+        return
+    args.md5_hash = certificate_md5(args.host, args.port)
+
+def _fleet_check(device, args):
+    if args.index:
+        result = check_index(device, args.certs, _names(args), args.refresh)
+        parts = [f"{label}: {_describe(locations)}" for label, locations in result["certs"].items()]
+        parts += [f"{name}: {', '.join(e['store'] for e in entries) or 'not installed'}" for name, entries in result["names"].items()]
+        return "; ".join(parts) or f"{result['total']} certificates indexed"
+    results = check(device, args.md5_hash, args.file)
+    return ", ".join(f"{store}: {'match' if r['match'] else 'mismatch' if r['present'] else 'missing'}"
+                     for store, r in results.items())
+
+def _print_index(device, args):
+    certs = _requested_certs(args)
+    result = check_index(device, certs, _names(args), args.refresh)
+    emit("result", command="check_cert", serial=device.serial, mode="index", **result)
+    print(f"Indexed {result['total']} certificate files on {device.serial}\n")
+    for (label, cert), locations in zip(certs, result["certs"].values()):
+        print(f"{ANSI.CYAN}{label}{ANSI.RESET} - {cert.subject_hash}.0 - md5 {cert.md5_pem}")
+        if not locations:
+            print(f"\t{ANSI.RED}not installed{ANSI.RESET}")
+        for location in locations:
+            color = ANSI.GREEN if location["match"] else ANSI.YELLOW
+            print(f"\t{color}{location['store']}: {location['file']} ({'match' if location['match'] else 'differs'}){ANSI.RESET}")
+    for name, entries in result["names"].items():
+        print(f"{ANSI.CYAN}{name}{ANSI.RESET}")
+        if not entries:
+            print(f"\t{ANSI.RED}not installed{ANSI.RESET}")
+        for entry in entries:
+            print(f"\t{ANSI.GREEN}{entry['store']}: {entry['file']} - md5 {entry['md5']}{ANSI.RESET}")
+
 @header
 def check_cert(args):
     device = select_device()
+    if args.index:
+        _print_index(device, args)
+        return
     print(f"Checking certificates on device {device.serial}...")
-    cert_paths = {
-        "user": "/data/misc/keychain/cacerts-added",
-        "system": "/system/etc/security/cacerts"
-    }
-    def download_certificate(host, port):
-        import requests
-        try:
-            url = f"http://{host}:{port}/cert"
-            response = requests.get(url, timeout=10)
-            return response.content
-        except Exception as e:
-            print(f"Error downloading certificate: {e}")
-            return None
-    
-    cert = crypto.load_certificate(crypto.FILETYPE_ASN1, download_certificate(args.host, args.port))
-    pem_bytes = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
-    import hashlib
-    md5_hash = hashlib.md5(pem_bytes).hexdigest()
-
-    print(f"MD5 of the provided certificate: {md5_hash}") 
-    for cert_type, path in cert_paths.items():
+    md5_hash = certificate_md5(args.host, args.port)
+
+    print(f"MD5 of the provided certificate: {md5_hash}")
+    results = check(device, md5_hash, args.file)
+    emit("result", command="check_cert", serial=device.serial, md5=md5_hash, file=args.file, stores=results)
+    for cert_type, result in results.items():
         print(f"\nChecking {cert_type} store...")
-        output = device.shell(f"su -c 'ls {path}/{args.file}'")
-        if args.file not in output:
+        if not result["present"]:
             print(f"Certificate file {args.file} not found in {cert_type} store.")
-            continue
-        output = device.shell(f"su -c 'md5sum {path}/{args.file}'")
-        if output:
-            device_md5 = output.split()[0]
-            if device_md5 == md5_hash:
-                print(f"MD5 match found in {cert_type} store: {device_md5}")
-                print(f"MD5sum from burp: {md5_hash}")
-            else:
-                print(f"Certificate not found in {cert_type} store.")
-        else:
+        elif result["md5"] is None:
             print(f"Could not access {cert_type} store or file does not exist.")
+        elif result["match"]:
+            print(f"MD5 match found in {cert_type} store: {result['md5']}")
+            print(f"MD5sum from burp: {md5_hash}")
+        else:
+            print(f"Certificate not found in {cert_type} store.")
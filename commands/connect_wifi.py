@@ -1,27 +1,71 @@
-from utils.adb_utils import run_adb_command
 from utils.decorator import header
 from utils.color_utils import ANSI
+from utils.output import emit
+from utils import wifi_adb
 
 def add_parser(subparsers):
     parser = subparsers.add_parser("connect", help="Connect to device via ADB WiFi")
-    parser.add_argument("-H", "--host", required=True, help="Host/IP address of the device")
-    parser.add_argument("-P", "--port", default="5555", help="Port number (default: 5555)")
+    parser.add_argument("-H", "--host", help="Host/IP address of the device")
+    parser.add_argument("-P", "--port", default="5555",
+                        help="Port number (default: 5555); with --scan also a list or range, e.g. 5555,37000-37100")
+    parser.add_argument("--scan", metavar="CIDR", help="Probe every host of a range (e.g. 192.168.1.0/24) for ADB and connect to each")
+    parser.add_argument("--concurrency", type=int, default=wifi_adb.SCAN_CONCURRENCY, help="Probes in flight at once (--scan)")
+    parser.add_argument("--timeout", type=float, default=wifi_adb.PROBE_TIMEOUT, help="Seconds per probe (--scan)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Then keep the devices connected, reconnecting dropped ones with backoff, until Ctrl+C "
+                             "(without -H/--scan: every connected WiFi device)")
+    parser.add_argument("--interval", type=float, default=wifi_adb.WATCH_INTERVAL, help="Seconds between checks (--watch)")
     parser.set_defaults(func=connect_wifi)
 
+def _print_connection(result):
+    color = ANSI.GREEN if result["connected"] else ANSI.RED
+    print(f"{color}[{'+' if result['connected'] else '-'}] {result['target']}: {result['output']}{ANSI.RESET}")
+
+def _scan(args):
+    ports = wifi_adb.parse_ports(args.port)
+    print(f"{ANSI.YELLOW}[+] Probing {args.scan} on port(s) {args.port} for ADB...{ANSI.RESET}")
+    result = wifi_adb.discover(args.scan, ports, args.concurrency, args.timeout)
+    print(f"{ANSI.CYAN}[*] {result['probed']} target(s) probed in {result['scan_seconds']}s, "
+          f"{len(result['found'])} answered{ANSI.RESET}")
+    for connection in result["connections"]:
+        _print_connection(connection)
+    emit("result", command="connect", action="scan", **result)
+    return [c["target"] for c in result["connections"] if c["connected"]]
+
 @header
 def connect_wifi(args):
     """Connect to device via ADB WiFi."""
-    if not args.host:
-        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide a host/IP address.")
+    if not (args.host or args.scan or args.watch):
+        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide a host/IP address (-H) or a range (--scan).")
         return
-    
-    # Create the connection string
-    connection_string = f"{args.host}:{args.port}"
-    
-    print(f"{ANSI.YELLOW}[+] Attempting to connect to {connection_string}...{ANSI.RESET}")
-    
-    # Run the adb connect command
-    run_adb_command(f"connect {connection_string}")
-    
-    print(f"{ANSI.GREEN}[+] Connection attempt completed.{ANSI.RESET}")
-    print(f"{ANSI.CYAN}[INFO] Use 'python cli_tool.py devices' to verify the connection.{ANSI.RESET}")
+    targets = []
+    if args.scan:
+        targets += _scan(args)
+    if args.host:
+        print(f"{ANSI.YELLOW}[+] Attempting to connect to {args.host}:{args.port}...{ANSI.RESET}")
+        result = wifi_adb.connect(args.host, args.port)
+        _print_connection(result)
+        emit("result", command="connect", **result)
+        targets.append(result["target"])
+    if not args.watch:
+        print(f"{ANSI.CYAN}[INFO] Use 'python cli_tool.py devices' to verify the connection.{ANSI.RESET}")
+        return
+
+    if not targets:
+        targets = [serial for serial, _ in wifi_adb.device_states(wifi_adb.get_client()) if ":" in serial]
+    if not targets:
+        print(f"{ANSI.YELLOW}[!] No WiFi devices to watch{ANSI.RESET}")
+        return
+    print(f"{ANSI.CYAN}[*] Watching {', '.join(targets)} every {args.interval}s, Ctrl+C to stop{ANSI.RESET}")
+    watcher = wifi_adb.Watcher(targets, args.interval)
+
+    def report(events):
+        for event in events:
+            retry = f", retry in {event['retry_in']}s" if event["retry_in"] else ""
+            color = ANSI.GREEN if event["connected"] else ANSI.RED
+            print(f"{color}[{event['was']}] {event['target']}: {event['output']}{retry}{ANSI.RESET}")
+
+    try:
+        watcher.run(report)
+    except KeyboardInterrupt:
+        watcher.stop()
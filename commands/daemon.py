@@ -0,0 +1,41 @@
+from utils.color_utils import ANSI
+from utils import daemon
+
+ACTIONS = ["start", "stop", "status"]
+
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser("daemon", help="Background daemon keeping ADB connections and root shells warm")
+    parser.add_argument("action", choices=ACTIONS)
+    parser.add_argument("--foreground", action="store_true", help="start: serve in this terminal instead of the background")
+    parser.set_defaults(func=run_daemon)
+
+
+def _print_status(status):
+    print(f"{ANSI.GREEN}[+] Daemon {status['pid']} on {status['socket']}{ANSI.RESET}")
+    print(f"    uptime {status['uptime']}s, {status['requests']} request(s), "
+          f"root shells: {', '.join(status['root_sessions']) or '-'}")
+
+
+def run_daemon(args):
+    if not daemon.available():
+        print(f"{ANSI.RED}[-] The daemon needs Unix domain sockets, not available on this platform{ANSI.RESET}")
+        return
+    status = daemon.request("status")
+    if args.action == "status":
+        if status is None:
+            print(f"{ANSI.YELLOW}[!] Daemon is not running{ANSI.RESET}")
+        else:
+            _print_status(status)
+    elif args.action == "stop":
+        if status is None:
+            print(f"{ANSI.YELLOW}[!] Daemon is not running{ANSI.RESET}")
+        else:
+            daemon.stop()
+            print(f"{ANSI.GREEN}[+] Daemon {status['pid']} stopped{ANSI.RESET}")
+    elif status is not None:
+        _print_status(status)
+    elif args.foreground:
+        daemon.serve()
+    else:
+        _print_status(daemon.start())
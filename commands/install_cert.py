@@ -1,34 +1,12 @@
-from utils.adb_utils import run_adb_command, select_device, push_file_to_device
-from utils.run_command import run_command
+from utils.adb_utils import select_device, push_bytes
 from utils.color_utils import ANSI
 from utils.decorator import header
-import subprocess
-import os
-import shutil
-import requests
-
-from OpenSSL import crypto
-import hashlib
-import struct
-
-# ------------------------------------------------------------------
-# Hàm tính subject_hash_old (tương đương câu lệnh OpenSSL cũ)
-# ------------------------------------------------------------------
-def subject_hash_old(cert_pem_bytes: bytes) -> str:
-    """
-    Tính subject_name_hash theo phiên bản OpenSSL 1.x (MD5, little-endian)
-    """
-    cert = crypto.load_certificate(crypto.FILETYPE_PEM, cert_pem_bytes)
-
-    # Lấy subject DN DER
-    subject_der = cert.get_subject().der()
-
-    # Tính MD5
-    digest = hashlib.md5(subject_der).digest()
-
-    # Lấy 4 byte đầu, chuyển sang little-endian
-    hash32, = struct.unpack("<I", digest[:4])
-    return f"{hash32:08x}"
+from utils.root_shell import root_run
+from utils.cert_store import get_certificate
+from utils.cert_index import invalidate_cert_index
+from utils.output import emit
+from utils.paths import local_path
+import shlex
 
 
 # ------------------------------------------------------------------
@@ -39,76 +17,162 @@ def add_parser(subparsers):
         "install_cert",
         help=f"Install a certificate with {ANSI.CYAN}ip{ANSI.RESET} and {ANSI.CYAN}port{ANSI.RESET}."
     )
-    parser.add_argument("-p", "--path", default="toancert.der",
+    parser.add_argument("-p", "--path", type=local_path, default="toancert.der",
                         help="Path to the certificate file")
-    parser.set_defaults(func=install_certificate)
+    parser.set_defaults(func=install_certificate, fleet_prepare=_fleet_prepare,
+                        fleet_func=_fleet_install)
     parser.add_argument("-H", "--host", type=str,
                         help="Host address for certificate download")
     parser.add_argument("-P", "--port", type=int,
                         help="Port number for certificate download")
+    parser.add_argument("--store", choices=STORES, default="user",
+                        help="user: user CA store (apps that trust user CAs, needs a reboot); "
+                             "system: tmpfs overlay of the system and APEX stores, trusted by every app "
+                             "without a reboot but gone after one")
+    parser.add_argument("--reboot", action="store_true", help="Reboot the device after installing")
 
 
-@header
-def install_certificate(args):
-    # ----------------------------------------------------------
-    # Download
-    # ----------------------------------------------------------
-    def download_certificate(host, port):
-        try:
-            url = f"http://{host}:{port}/cert"
-            response = requests.get(url, timeout=10)
-            return response.content
-        except Exception as e:
-            print(f"{ANSI.RED}Error downloading certificate: {e}{ANSI.RESET}")
-            raise e
-
-
-    
-    
-    cert = crypto.load_certificate(crypto.FILETYPE_ASN1, download_certificate(args.host, args.port))
-    pem_bytes = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
-    
- 
-
-    # Tính hash (tương đương: openssl x509 -inform PEM -subject_hash_old -in cim-cacert.pem |head -1)
-    hash_name = subject_hash_old(pem_bytes)
-    target_filename = f"{hash_name}.0"
+# ------------------------------------------------------------------
+# API (không prompt, không print) - dùng bởi CLI và mcp_server
+# ------------------------------------------------------------------
+USER_CERT_DIR = "/data/misc/user/0/cacerts-added"
+SYSTEM_CERT_DIR = "/system/etc/security/cacerts"
+# Android 14+: conscrypt đọc CA từ APEX, phải bind mount vào mount namespace của zygote và từng app
+APEX_CERT_DIR = "/apex/com.android.conscrypt/cacerts"
+STAGING_DIR = "/data/local/tmp/frida-tool-cacerts"
+STORES = ["user", "system"]
+# SELinux context theo file_contexts của AOSP
+USER_CERT_CONTEXT = "u:object_r:misc_user_data_file:s0"
+SYSTEM_CERT_CONTEXT = "u:object_r:system_file:s0"
+
+def load_certificate(host=None, port=None, path=None):
+    """Return the CertRecord (DER, PEM, subject hash, digests) from the local certificate store."""
+    return get_certificate(host, port, path)
+
+
+def user_store_script(tmp_path, filename):
+    """mkdir, cp, chown, chmod 644, chcon and md5sum of the installed file, stopping at the first failure."""
+    dest = f"{USER_CERT_DIR}/{filename}"
+    return (f"mkdir -p {USER_CERT_DIR} && chown system:system {USER_CERT_DIR} && chmod 755 {USER_CERT_DIR} && "
+            f"cp {tmp_path} {dest} && chown system:system {dest} && chmod 644 {dest} && "
+            f"chcon {USER_CERT_CONTEXT} {dest} && rm -f {tmp_path} && md5sum {dest}")
+
+
+def system_store_script(tmp_path, filename):
+    """
+    Mount a tmpfs over the system store (seeded with the current CAs, once per boot), add the certificate
+    and, on Android 14+, bind it over the APEX store in zygote and every app. Prints md5sum lines of the
+    installed file as the system and a zygote see it.
+    """
+    dest = f"{SYSTEM_CERT_DIR}/{filename}"
+    bind = shlex.quote(f"grep -q ' {APEX_CERT_DIR} tmpfs ' /proc/self/mounts || mount --bind {SYSTEM_CERT_DIR} {APEX_CERT_DIR}")
+    return "\n".join([
+        "set -e",
+        f"if ! grep -q ' {SYSTEM_CERT_DIR} tmpfs ' /proc/mounts; then",
+        f"  rm -rf {STAGING_DIR}; mkdir -p -m 700 {STAGING_DIR}",
+        f"  if [ -d {APEX_CERT_DIR} ]; then cp {APEX_CERT_DIR}/* {STAGING_DIR}/; else cp {SYSTEM_CERT_DIR}/* {STAGING_DIR}/; fi",
+        f"  mount -t tmpfs tmpfs {SYSTEM_CERT_DIR}",
+        f"  mv {STAGING_DIR}/* {SYSTEM_CERT_DIR}/; rmdir {STAGING_DIR}",
+        f"  chmod 755 {SYSTEM_CERT_DIR}; chcon {SYSTEM_CERT_CONTEXT} {SYSTEM_CERT_DIR}",
+        "fi",
+        f"cp {tmp_path} {dest}; rm -f {tmp_path}",
+        f"chown root:root {dest}; chmod 644 {dest}; chcon {SYSTEM_CERT_CONTEXT} {dest}",
+        f"md5sum {dest}",
+        f"if [ -d {APEX_CERT_DIR} ]; then",
+        "  zygotes=$(pidof zygote zygote64 || true)",
+        "  apps=$(ps -A -o PID,PPID | while read pid ppid; do case \" $zygotes \" in *\" $ppid \"*) echo $pid;; esac; done)",
+        # app đã chạy cũng thấy cert mới; app chết giữa chừng thì bỏ qua
+        f"  for pid in $zygotes $apps; do nsenter --mount=/proc/$pid/ns/mnt -- sh -c {bind} || true; done",
+        "  for pid in $zygotes; do",
+        f"    nsenter --mount=/proc/$pid/ns/mnt -- md5sum {APEX_CERT_DIR}/{filename}",
+        "  done",
+        "fi",
+    ])
+
+
+def install(device, host=None, port=None, path=None, cert=None, store="user"):
+    """
+    Install the certificate into the user CA store of device, or with store="system" into a tmpfs overlay
+    of the system (and APEX) store that applies without a reboot. Return a result dict; any reboot is left
+    to the caller. In the user store nothing is pushed when the device already holds an identical <hash>.0.
+    """
+    if store not in STORES:
+        raise ValueError(f"Unknown certificate store '{store}' (known: {', '.join(STORES)})")
+    if cert is None:
+        cert = load_certificate(host, port, path)
+    target_filename = f"{cert.subject_hash}.0"
     remote_path = f"/data/local/tmp/{target_filename}"
-    # create device
-    device = select_device()
-    # ppadb push cần file, nên phải ghi file tạm
-    import tempfile, os
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp.write(pem_bytes)
-        tmp_path = tmp.name
+    result = {
+        "serial": device.serial,
+        "store": store,
+        "hash": cert.subject_hash,
+        "filename": target_filename,
+        "fingerprint": cert.fingerprint,
+        "pushed_to": remote_path,
+        "installed_to": f"{USER_CERT_DIR if store == 'user' else SYSTEM_CERT_DIR}/{target_filename}",
+    }
 
-    try:
-        push_file_to_device(device, tmp_path, remote_path)
-    finally:
-        os.remove(tmp_path)
+    if store == "user":
+        output, code = root_run(device, f"md5sum {USER_CERT_DIR}/{target_filename}")
+        if code == 0 and output.split()[:1] == [cert.md5_pem]:
+            return dict(result, skipped=True, pushed_to=None, output="identical certificate already installed")
+
+    emit("progress", serial=device.serial, step="push", path=remote_path)
+    push_bytes(device, cert.pem, remote_path)
+
+    # Một lần gọi su: tạo thư mục, copy, quyền, SELinux context và kiểm tra lại bằng md5sum
+    emit("progress", serial=device.serial, step="install", path=result["installed_to"])
+    script = user_store_script if store == "user" else system_store_script
+    output, code = root_run(device, script(remote_path, target_filename))
+    invalidate_cert_index(device.serial)
+    digests = [line.split()[0] for line in output.splitlines() if line.strip().endswith(f"/{target_filename}")]
+    if code != 0 or not digests or any(digest != cert.md5_pem for digest in digests):
+        raise RuntimeError(f"Installing {target_filename} on {device.serial} failed verification: {output.strip()[-300:]}")
+    return dict(result, skipped=False, output=output.strip())
+
+
+def reboot(device):
+    emit("progress", serial=device.serial, step="reboot")
+    return device.shell("reboot")
 
-    print(f"{ANSI.GREEN}Created {target_filename} ({hash_name}.0){ANSI.RESET}")
-    # Create folder user cert if don't exit
+
+def _fleet_prepare(args):
+    # Tải cert một lần cho cả fleet; không hỏi reboot
+    args.cert = load_certificate(args.host, args.port, args.path)
+
+
+def _fleet_install(device, args):
+    result = install(device, cert=args.cert, store=args.store)
+    if args.reboot:
+        reboot(device)
+    installed = "already installed" if result["skipped"] else result["installed_to"]
+    return f"{installed}, rebooting" if args.reboot else installed
+
+
+@header
+def install_certificate(args):
     try:
-        output = device.shell("su -c 'mkdir -p /data/misc/user/0/cacerts-added'")
-        print(f"{ANSI.GREEN}[+] Create folder if not exist /data/misc/user/0/cacerts-added on {device.serial} - {output}{ANSI.RESET}")
+        cert = load_certificate(args.host, args.port, args.path)
     except Exception as e:
-        print(f"{ANSI.RED}Error creating folder /data/misc/user/0/cacerts-added on {device.serial}: {e}{ANSI.RESET}")
+        print(f"{ANSI.RED}Error loading certificate: {e}{ANSI.RESET}")
         raise e
-    # Copy file to folder /data/misc/user/0/cacerts-added
+    # create device
+    device = select_device()
     try:
-        output = device.shell(f"su -c 'cp /data/local/tmp/{target_filename} /data/misc/user/0/cacerts-added/{target_filename}'")
-        print(f"{ANSI.GREEN}[+] Copy {target_filename} to /data/misc/user/0/cacerts-added/{target_filename} on {device.serial} - {output}{ANSI.RESET}")
+        result = install(device, cert=cert, store=args.store)
     except Exception as e:
-        print(f"{ANSI.RED}Error copying {target_filename} to /data/misc/user/0/cacerts-added/{target_filename} on {device.serial}: {e}{ANSI.RESET}")
+        print(f"{ANSI.RED}Error installing certificate on {device.serial}: {e}{ANSI.RESET}")
         raise e
-    
-    # Reboot the device
-    inp = input(f"{ANSI.YELLOW}Please reboot the device to apply the changes. Type Y or N: {ANSI.RESET}")
-    if inp.strip().upper() == "Y":
-        output = device.shell("reboot")
-        print(f"{ANSI.GREEN}[+] Reboot the device on {device.serial} - {output}{ANSI.RESET}")
-        print(f"{ANSI.GREEN}Certificate installed successfully!{ANSI.RESET}")
+    emit("result", command="install_cert", **result)
+    if result["skipped"]:
+        print(f"{ANSI.GREEN}[+] {result['installed_to']} on {device.serial} is already identical, nothing pushed{ANSI.RESET}")
     else:
-        print(f"{ANSI.YELLOW}Reboot and check!{ANSI.RESET}")
-
+        print(f"{ANSI.GREEN}[+] Pushed {result['filename']} ({result['hash']}.0) to {result['pushed_to']} on {device.serial}{ANSI.RESET}")
+        print(f"{ANSI.GREEN}[+] Installed and verified {result['installed_to']} on {device.serial}{ANSI.RESET}")
+    if args.reboot:
+        reboot(device)
+        print(f"{ANSI.GREEN}[+] Rebooting {device.serial}{ANSI.RESET}")
+    elif args.store == "system":
+        print(f"{ANSI.GREEN}Trusted by every app started from now on; the overlay is gone after a reboot.{ANSI.RESET}")
+    elif not result["skipped"]:
+        print(f"{ANSI.YELLOW}Reboot to apply (--reboot), or use --store system to skip the reboot.{ANSI.RESET}")
@@ -1,40 +1,72 @@
 
 from utils.decorator import header
 from utils.color_utils import ANSI
-from utils.run_command import run_command
-from utils.adb_utils import run_adb_command_retn, run_adb_command, select_device
-import re
+from utils.adb_utils import select_device
+from utils import frida_server, frida_artifacts
+from utils.output import emit
+
+ACTIONS = ["deploy", "start", "stop", "restart", "status"]
+COMPRESS_MODES = ["auto", "always", "never"]
+
 def add_parser(subparsers):
-    parser = subparsers.add_parser("klfrida", help="kill and list frida server")
-    parser.set_defaults(func=klfrida)
+    parser = subparsers.add_parser("klfrida", help="Manage frida server (deploy/start/stop/restart/status)")
+    # không có action thì xem status: không prompt (daemon, MCP, script đều không trả lời được input())
+    parser.add_argument("action", nargs="?", choices=ACTIONS, default="status",
+                        help="Lifecycle action (default: status)")
+    parser.add_argument("-v", "--version", type=str,
+                        help="frida-server version (e.g. 16.5.9) or full path; optional when only one binary is on the device")
+    parser.add_argument("-t", "--timeout", type=float, default=frida_server.START_TIMEOUT,
+                        help=f"Seconds to wait for frida-server to listen on {frida_server.FRIDA_PORT}")
+    parser.add_argument("--compress", choices=COMPRESS_MODES, default="auto",
+                        help="deploy: push a gzip copy and unpack on device (auto = only over WiFi ADB)")
+    parser.add_argument("--source", type=str,
+                        help="deploy: local frida-server binary or .xz to cache instead of downloading from GitHub")
+    parser.set_defaults(func=klfrida, fleet_func=_fleet_klfrida)
+
+# API (không prompt) - dùng bởi CLI, fleet mode và mcp_server
+def kill_and_list(device):
+    return {"serial": device.serial, "killed_pids": frida_server.stop(device), "versions": frida_server.list_versions(device)}
+
+def run_action(device, action, version=None, timeout=frida_server.START_TIMEOUT, compress="auto", source=None):
+    if action == "deploy":
+        if not version or version.startswith("/"):
+            raise ValueError("deploy needs --version (e.g. 16.5.9)")
+        return frida_artifacts.deploy(device, version, compress, source)
+    if action == "start":
+        return frida_server.start(device, version, timeout)
+    if action == "restart":
+        return frida_server.restart(device, version, timeout)
+    if action == "status":
+        return frida_server.status(device)
+    if action == "stop":
+        return {"serial": device.serial, "killed_pids": frida_server.stop(device)}
+    return kill_and_list(device)
+
+def _summary(action, result):
+    if action == "deploy":
+        if not result["pushed"]:
+            return f"{result['path']} ({result['arch']}) already up to date"
+        how = "gzip" if result["compressed"] else "raw"
+        return f"{result['path']} ({result['arch']}) pushed {result['bytes']} bytes {how} in {result['seconds']}s"
+    if action in ("start", "restart"):
+        if not result["started"]:
+            return f"already listening (pid {', '.join(map(str, result['pids']))})"
+        return f"{result['path']} listening after {result['startup_ms']} ms"
+    if action == "status":
+        if not result["running"]:
+            return "not running"
+        return f"pid {', '.join(map(str, result['pids']))}, {'listening' if result['listening'] else 'NOT listening'}"
+    killed = f"killed pid {', '.join(map(str, result['killed_pids']))}" if result["killed_pids"] else "not running"
+    if action == "stop":
+        return killed
+    return f"{killed}, {len(result['versions'])} version(s) available"
+
+def _fleet_klfrida(device, args):
+    return _summary(args.action, run_action(device, args.action, args.version, args.timeout, args.compress, args.source))
+
 @header
 def klfrida(args):
     device = select_device()
-    checkfrida = device.shell("su -c \"ps -A | grep frida\"")
-    if checkfrida != "":
-        match = re.search(r'\s+(\d+)\s+\d+\s+', checkfrida)
-        if match: 
-            pid = match.group(1)
-            print(f'{ANSI.YELLOW}pid = {match.group(1)}{ANSI.RESET}')
-            device.shell(f"su -c \"kill -9 {pid}\"")
-            print(f'{ANSI.GREEN}Frida server stopped{ANSI.RESET}')
-    else: print("\tfrida server is not running")
-    versions = device.shell("su -c \"ls /data/local/tmp/frida-server-*\"")
-    if versions == "":
-        print(f"{ANSI.RED}Frida server not found!{ANSI.RESET}")
-        return
-    else:
-        lstver = versions.split('\n') 
-        lstnum = [i  for i in range(len(lstver)) if lstver[i] != ""]
-        for i in lstnum:
-            print(f"\t{ANSI.YELLOW}[{i}]. {lstver[i]}{ANSI.RESET}")
-            
-        inp = input(f"{ANSI.YELLOW}Please select the version to run: {ANSI.RESET}")
-        
-        if inp.strip().upper() in [str(i) for i in range(len(lstver))]:
-            print(f"{ANSI.YELLOW} Running {lstver[int(inp)]}...{ANSI.RESET}")
-            device.shell(f"su -c 'nohup {lstver[int(inp)]} >/dev/null 2>&1 &'")
-            print(f"{ANSI.GREEN}Frida server started{ANSI.RESET}")
-        else:
-            print(f"{ANSI.YELLOW}Manual run frida server!{ANSI.RESET}")
-            return
\ No newline at end of file
+    result = run_action(device, args.action, args.version, args.timeout, args.compress, args.source)
+    emit("result", command="klfrida", action=args.action, **dict(result, serial=device.serial))
+    print(f"{ANSI.GREEN}[+] {args.action}: {_summary(args.action, result)}{ANSI.RESET}")
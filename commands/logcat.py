@@ -0,0 +1,40 @@
+from utils.color_utils import ANSI
+from utils.decorator import header
+from utils.adb_utils import select_device
+from utils import logcat as logcat_utils
+from utils.output import emit
+
+LEVEL_COLORS = {"V": ANSI.WHITE, "D": ANSI.CYAN, "I": ANSI.GREEN, "W": ANSI.YELLOW, "E": ANSI.RED, "F": ANSI.MAGENTA, "A": ANSI.MAGENTA}
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser("logcat", help="Stream logcat filtered by package, tag and level")
+    parser.add_argument("-p", "--package", help="Only lines from the running processes of this package (follows restarts)")
+    parser.add_argument("-t", "--tag", action="append", help="Only lines with this tag (repeatable)")
+    parser.add_argument("-l", "--level", choices=list(logcat_utils.LEVELS), type=str.upper, help="Minimum level")
+    parser.add_argument("-T", "--tail", type=int, help="Start with the last N lines of the device buffer instead of all of it")
+    parser.set_defaults(func=logcat)
+
+def format_entry(entry):
+    color = LEVEL_COLORS.get(entry.level, "")
+    return f"{entry.time} {entry.pid:>5} {entry.tid:>5} {color}{entry.level} {entry.tag}{ANSI.RESET}: {entry.message}"
+
+@header
+def logcat(args):
+    device = select_device()
+    pids = logcat_utils.PidTracker(device, args.package) if args.package else None
+    if pids is not None:
+        if pids.pids:
+            print(f"{ANSI.GREEN}[+] {args.package}: pid {', '.join(sorted(pids.pids))}{ANSI.RESET}")
+        else:
+            print(f"{ANSI.YELLOW}[!] {args.package} is not running, waiting for it to start{ANSI.RESET}")
+    conn = logcat_utils.open_logcat(device, args.tail)
+    print(f"{ANSI.CYAN}[*] Streaming logcat of {device.serial}, Ctrl+C to stop{ANSI.RESET}")
+    try:
+        lines = logcat_utils.read_lines(conn)
+        for entry in logcat_utils.filter_lines(logcat_utils.parse_lines(lines), pids, args.tag, args.level):
+            print(format_entry(entry))
+            emit("result", command="logcat", serial=device.serial, **entry._asdict())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
@@ -1,17 +1,144 @@
-from utils.adb_utils import run_adb_command, select_device
+import time
+from utils.adb_utils import select_device
+from utils.cache_utils import cache_path, load_json, save_json, safe_name
 from utils.color_utils import ANSI
 from utils.decorator import header
+from utils.output import emit
+
+# Một lần gọi lấy đủ path, versionCode, uid; các lệnh sau là fallback cho Android cũ không hỗ trợ option
+INVENTORY_COMMANDS = [
+    "pm list packages -f -U --show-versioncode",
+    "pm list packages -f -U",
+    "pm list packages -f",
+]
+
 def add_parser(subparsers):
     parser = subparsers.add_parser("packages", help="List all installed packages")
-    parser.set_defaults(func=list_installed_packages)
+    parser.set_defaults(func=list_installed_packages, fleet_func=_fleet_packages)
+    parser.add_argument("-f", "--filter", type=str, help="Only show packages containing this text")
+    parser.add_argument("-d", "--details", action="store_true", help="Show version code, uid and APK path")
+    parser.add_argument("--diff", action="store_true", help="Show what was installed, removed or upgraded since the last snapshot")
+
+def _stream_lines(conn):
+    """Yield decoded lines from a shell connection as they arrive instead of buffering the whole output."""
+    pending = b""
+    with conn:
+        while True:
+            chunk = conn.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode("utf-8", errors="replace").strip()
+    if pending:
+        yield pending.decode("utf-8", errors="replace").strip()
+
+def parse_package_line(line):
+    """
+    Parse one line of `pm list packages -f -U --show-versioncode`:
+        package:/data/app/~~x==/com.foo-y==/base.apk=com.foo versionCode:42 uid:10123
+    Return (name, {"path", "version_code", "uid"}) or None for other lines.
+    """
+    if not line.startswith("package:"):
+        return None
+    head, *fields = line[len("package:"):].split()
+    # APK path có thể chứa '=' (base64), tên package nằm sau dấu '=' cuối cùng
+    path, sep, name = head.rpartition("=")
+    if not sep:
+        path, name = "", head
+    extra = dict(field.split(":", 1) for field in fields if ":" in field)
+    return name, {"path": path, "version_code": extra.get("versionCode"), "uid": extra.get("uid")}
+
+def collect_inventory(device):
+    """Return {package: {"path", "version_code", "uid"}} from a single, streamed pm call."""
+    for command in INVENTORY_COMMANDS:
+        inventory = {}
+        def handler(conn):
+            for line in _stream_lines(conn):
+                parsed = parse_package_line(line)
+                if parsed:
+                    inventory[parsed[0]] = parsed[1]
+        device.shell(command, handler=handler)
+        if inventory:
+            return inventory
+    return {}
+
+def list_packages(device):
+    return list(collect_inventory(device))
+
+# ------------------------------------------------------------------
+# Snapshot / diff
+# ------------------------------------------------------------------
+def _snapshot_path(serial):
+    return cache_path("packages", f"{safe_name(serial)}.json")
+
+def load_snapshot(serial):
+    return load_json(_snapshot_path(serial))
+
+def save_snapshot(serial, inventory):
+    save_json(_snapshot_path(serial), {"taken_at": time.time(), "packages": inventory})
+
+def diff_inventory(old, new):
+    """Return {"installed": [...], "removed": [...], "upgraded": [(name, old_version, new_version)]}."""
+    return {
+        "installed": sorted(set(new) - set(old)),
+        "removed": sorted(set(old) - set(new)),
+        "upgraded": sorted(
+            (name, old[name].get("version_code"), info.get("version_code"))
+            for name, info in new.items()
+            if name in old and (old[name].get("version_code"), old[name].get("path")) != (info.get("version_code"), info.get("path"))
+        ),
+    }
+
+def snapshot_diff(device):
+    """Collect the inventory, diff it against the stored snapshot and store the new one. Return (diff, previous snapshot)."""
+    inventory = collect_inventory(device)
+    previous = load_snapshot(device.serial)
+    changes = diff_inventory(previous["packages"] if previous else {}, inventory)
+    save_snapshot(device.serial, inventory)
+    return changes, previous
+
+def _fleet_packages(device, args):
+    if args.diff:
+        changes, previous = snapshot_diff(device)
+        if previous is None:
+            return "first snapshot stored"
+        return f"+{len(changes['installed'])} -{len(changes['removed'])} ~{len(changes['upgraded'])}"
+    inventory = collect_inventory(device)
+    save_snapshot(device.serial, inventory)
+    return f"{len(inventory)} packages"
+
+def _print_diff(changes, previous):
+    if previous is None:
+        print(f"{ANSI.YELLOW}[!] No previous snapshot, stored the current one as baseline.{ANSI.RESET}")
+        return
+    taken_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(previous["taken_at"]))
+    print(f"Changes since snapshot of {taken_at}:\n")
+    for name in changes["installed"]:
+        print(f"{ANSI.GREEN}[+] {name}{ANSI.RESET}")
+    for name in changes["removed"]:
+        print(f"{ANSI.RED}[-] {name}{ANSI.RESET}")
+    for name, old_version, new_version in changes["upgraded"]:
+        print(f"{ANSI.YELLOW}[~] {name} {old_version} -> {new_version}{ANSI.RESET}")
+    if not any(changes.values()):
+        print(f"{ANSI.CYAN}No changes.{ANSI.RESET}")
+
 @header
 def list_installed_packages(args):
     device = select_device()
-    output = device.shell("pm list packages")
-    for i, package in enumerate(output.split('\n')):
-        package = package.strip()
-        i += 1
-        if package != "":
-            package = package.split(':')
-            package = package[1]
-            print(f"{ANSI.GREEN}[{i}] {package}{ANSI.RESET}")
+    if args.diff:
+        changes, previous = snapshot_diff(device)
+        emit("result", command="packages", serial=device.serial, baseline=previous is None, changes=changes)
+        _print_diff(changes, previous)
+        return
+    inventory = collect_inventory(device)
+    save_snapshot(device.serial, inventory)
+    packages = [name for name in inventory if not args.filter or args.filter in name]
+    for i, package in enumerate(packages):
+        emit("result", command="packages", serial=device.serial, package=package, **inventory[package])
+        if args.details:
+            info = inventory[package]
+            print(f"{ANSI.GREEN}[{i + 1}] {package}{ANSI.RESET} - {ANSI.YELLOW}{info['version_code']}{ANSI.RESET} - {ANSI.BLUE}uid {info['uid']}{ANSI.RESET} - {info['path']}")
+        else:
+            print(f"{ANSI.GREEN}[{i + 1}] {package}{ANSI.RESET}")
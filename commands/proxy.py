@@ -1,6 +1,17 @@
+import shlex
 from utils.color_utils import ANSI
 from utils.decorator import header
-from utils.adb_utils import run_adb_command, select_device
+from utils.adb_utils import select_device
+from utils.cache_utils import cache_path, load_json, save_json
+from utils.root_shell import root_shell
+from utils.output import emit
+
+# Mọi setting liên quan tới global proxy: set/unset ghi, đọc lại và rollback cả nhóm trong MỘT lần gọi su
+PROXY_KEYS = ("http_proxy", "global_http_proxy_host", "global_http_proxy_port", "global_http_proxy_exclusion_list")
+# Xoá http_proxy thì nhiều bản Android phải reboot mới hết proxy; ":0" có hiệu lực ngay
+NO_PROXY = ":0"
+PROFILE_ACTIONS = ["save", "list", "delete"]
+ROLLBACK_MARKER = "__FT_PROXY_ROLLBACK__"
 
 def add_parser(subparsers):
     parser = subparsers.add_parser("proxy", help="Manage proxy settings")
@@ -8,38 +19,189 @@ def add_parser(subparsers):
 
     # Subparser for getting proxy settings
     get_parser = subparsers.add_parser("get", help="Get current proxy settings")
-    get_parser.set_defaults(func=get_proxy)
+    get_parser.set_defaults(func=get_proxy, fleet_func=lambda device, args: format_settings(read_proxy(device)))
 
     # Subparser for setting proxy settings
-    set_parser = subparsers.add_parser("set", help="Set proxy settings. Syntax: proxy set <IP> <PORT>")
-    set_parser.add_argument("-P", "--port", default="8080", help="Port to set the proxy server")
-    set_parser.add_argument("-H", "--host", required=True, help="IP address to set the proxy server")
-    set_parser.set_defaults(func=set_proxy)
+    set_parser = subparsers.add_parser("set", help="Set proxy settings. Syntax: proxy set -H <IP> [-P <PORT>] or proxy set --profile <NAME>")
+    set_parser.add_argument("-P", "--port", help="Port to set the proxy server (default: 8080)")
+    set_parser.add_argument("-H", "--host", help="IP address to set the proxy server")
+    set_parser.add_argument("--exclude", help="Comma-separated hosts that bypass the proxy (e.g. localhost,*.google.com)")
+    # dest riêng: --profile ở cấp trên là cờ của trace
+    set_parser.add_argument("--profile", dest="proxy_profile", help="Use a saved profile; -H/-P/--exclude override its values")
+    set_parser.set_defaults(func=set_proxy, fleet_prepare=_fleet_prepare,
+                            fleet_func=lambda device, args: format_settings(apply_proxy(device, **args.proxy)["settings"]))
     # Subparser for unsetting proxy settings
     unset_parser = subparsers.add_parser("unset", help="Unset proxy settings")
-    unset_parser.set_defaults(func=unset_proxy)
+    unset_parser.set_defaults(func=unset_proxy, fleet_func=lambda device, args: format_settings(clear_proxy(device)["settings"]))
+    # Subparser for named profiles (lưu trên máy, không đụng tới device)
+    profile_parser = subparsers.add_parser("profile", help="Save, list or delete named proxy profiles")
+    profile_parser.add_argument("action", choices=PROFILE_ACTIONS)
+    profile_parser.add_argument("name", nargs="?", help="Profile name (save/delete)")
+    profile_parser.add_argument("-H", "--host", help="Proxy IP address (save)")
+    profile_parser.add_argument("-P", "--port", default="8080", help="Proxy port (save, default: 8080)")
+    profile_parser.add_argument("--exclude", help="Comma-separated hosts that bypass the proxy (save)")
+    profile_parser.set_defaults(func=manage_profiles)
+
+# Profiles
+def _profiles_path():
+    return cache_path("proxy_profiles.json")
+
+def load_profiles():
+    return load_json(_profiles_path(), {})
+
+def save_profile(name, host, port="8080", exclusion_list=None):
+    profiles = load_profiles()
+    profiles[name] = {"host": host, "port": str(port), "exclusion_list": exclusion_list}
+    save_json(_profiles_path(), profiles)
+    return profiles[name]
+
+def delete_profile(name):
+    profiles = load_profiles()
+    if profiles.pop(name, None) is None:
+        raise RuntimeError(f"No proxy profile named {name}")
+    save_json(_profiles_path(), profiles)
+
+def resolve_proxy(args):
+    """host/port/exclusion_list from --profile, overridden by -H/-P/--exclude."""
+    values = {"host": None, "port": "8080", "exclusion_list": None}
+    if args.proxy_profile:
+        profile = load_profiles().get(args.proxy_profile)
+        if profile is None:
+            raise RuntimeError(f"No proxy profile named {args.proxy_profile}")
+        values.update(profile)
+    for key, value in (("host", args.host), ("port", args.port), ("exclusion_list", args.exclude)):
+        if value:
+            values[key] = value
+    if not values["host"]:
+        raise RuntimeError("Please provide an IP address (-H) or a profile (--profile)")
+    return values
+
+def _fleet_prepare(args):
+    # Đọc profile một lần cho cả fleet
+    args.proxy = resolve_proxy(args)
+
+# API (không prompt) - dùng cho CLI, fleet mode, mcp_server
+def proxy_values(host, port, exclusion_list=None):
+    """Setting values for a global proxy; None means the setting is deleted."""
+    return {
+        "http_proxy": f"{host}:{port}",
+        "global_http_proxy_host": host,
+        "global_http_proxy_port": str(port),
+        "global_http_proxy_exclusion_list": exclusion_list or None,
+    }
+
+def _parse_settings(output, prefix=""):
+    settings = {}
+    for line in output.replace("\r", "").splitlines():
+        key, sep, value = line[len(prefix):].partition("=")
+        if line.startswith(prefix) and sep and key in PROXY_KEYS:
+            settings[key] = None if value == "null" else value
+    return settings
+
+def read_proxy(device):
+    """Return {setting: value or None} for every key in PROXY_KEYS, read in one root call."""
+    command = "; ".join(f'echo "{key}=$(settings get global {key})"' for key in PROXY_KEYS)
+    return _parse_settings(root_shell(device, command))
+
+def settings_script(values):
+    """
+    Shell script that saves the current values, writes `values`, reads them back and, if any
+    read-back differs, restores the saved values. Prints `was <key>=<old>`, `<key>=<new>` and
+    ROLLBACK_MARKER on rollback.
+    """
+    keys = list(values)
+    lines = ['restore() { if [ "$2" = null ]; then settings delete global "$1"; else settings put global "$1" "$2"; fi; }']
+    lines += [f"old{i}=$(settings get global {key})" for i, key in enumerate(keys)]
+    for key in keys:
+        value = values[key]
+        lines.append(f"settings delete global {key} >/dev/null" if value is None
+                     else f"settings put global {key} {shlex.quote(value)}")
+    checks = []
+    for i, key in enumerate(keys):
+        lines.append(f"new{i}=$(settings get global {key})")
+        lines.append(f'echo "was {key}=$old{i}"; echo "{key}=$new{i}"')
+        checks.append(f'[ "$new{i}" = {shlex.quote(values[key] if values[key] is not None else "null")} ]')
+    lines.append(f"if ! {{ {' && '.join(checks)}; }}; then")
+    lines += [f'  restore {key} "$old{i}" >/dev/null' for i, key in enumerate(keys)]
+    lines.append(f"  echo {ROLLBACK_MARKER}")
+    lines.append("fi")
+    return "\n".join(lines)
+
+def write_settings(device, values):
+    """Apply values in one root call; raise RuntimeError (after rolling back) when the read-back does not match."""
+    output = root_shell(device, settings_script(values))
+    settings, previous = _parse_settings(output), _parse_settings(output, "was ")
+    mismatched = [key for key in values if settings.get(key) != values[key]]
+    if ROLLBACK_MARKER in output:
+        raise RuntimeError(f"Proxy settings on {device.serial} did not take effect ({', '.join(mismatched)}), "
+                           "previous values restored")
+    if mismatched:
+        raise RuntimeError(f"Could not read back proxy settings on {device.serial}: {output.strip()[-200:]}")
+    return {"serial": device.serial, "settings": settings, "previous": previous}
+
+def apply_proxy(device, host, port="8080", exclusion_list=None):
+    return write_settings(device, proxy_values(host, port, exclusion_list))
+
+def clear_proxy(device):
+    """Set http_proxy to NO_PROXY and delete the global_http_proxy_* settings."""
+    return write_settings(device, dict(dict.fromkeys(PROXY_KEYS), http_proxy=NO_PROXY))
+
+def format_settings(settings):
+    return " ".join(f"{key}={value}" for key, value in settings.items() if value not in (None, NO_PROXY)) or "no proxy"
+
+def _print_settings(title, settings):
+    print(f"{ANSI.GREEN}[+] {title}:{ANSI.RESET}")
+    for key in PROXY_KEYS:
+        print(f"    {key:<34} {ANSI.CYAN}{settings.get(key)}{ANSI.RESET}")
 
 @header
 def get_proxy(args):
     """Retrieve current proxy settings."""
     device = select_device()
-    output = device.shell("su -c 'settings get global http_proxy'")
-    print(f"{ANSI.GREEN}[+] Get Proxy:\n{output}{ANSI.RESET}")
+    settings = read_proxy(device)
+    _print_settings("Get Proxy", settings)
+    emit("result", command="proxy", action="get", serial=device.serial, proxy=settings.get("http_proxy"), settings=settings)
 
 @header
 def set_proxy(args):
     """Set the proxy server."""
-    if not args.host:
-        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide an IP address.")
+    try:
+        values = resolve_proxy(args)
+    except RuntimeError as e:
+        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}{e}")
         return
-    proxy_settings = f"{args.host}:{args.port}"
     device = select_device()
-    output = device.shell(f"su -c 'settings put global http_proxy {proxy_settings}'")
-    print(f"{ANSI.GREEN}[+] Set Proxy:\n{output}{ANSI.RESET}")
+    result = apply_proxy(device, **values)
+    _print_settings("Set Proxy", result["settings"])
+    emit("result", command="proxy", action="set", proxy=result["settings"]["http_proxy"], **result)
 
 @header
 def unset_proxy(args):
     """Unset the proxy server."""
     device = select_device()
-    output = device.shell("su -c 'settings put global http_proxy :0'")
-    print(f"{ANSI.GREEN}[+] Unset Proxy:\n{output}{ANSI.RESET}")
+    result = clear_proxy(device)
+    _print_settings("Unset Proxy", result["settings"])
+    emit("result", command="proxy", action="unset", proxy=None, **result)
+
+def manage_profiles(args):
+    if args.action == "list":
+        profiles = load_profiles()
+        for name, profile in profiles.items():
+            exclude = f" (bypass: {profile['exclusion_list']})" if profile.get("exclusion_list") else ""
+            print(f"{ANSI.GREEN}{name}{ANSI.RESET}: {profile['host']}:{profile['port']}{exclude}")
+            emit("result", command="proxy", action="profile", name=name, **profile)
+        if not profiles:
+            print(f"{ANSI.YELLOW}[!] No proxy profiles saved{ANSI.RESET}")
+    elif not args.name:
+        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide a profile name.")
+    elif args.action == "save":
+        if not args.host:
+            print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide an IP address (-H).")
+            return
+        profile = save_profile(args.name, args.host, args.port, args.exclude)
+        print(f"{ANSI.GREEN}[+] Saved profile {args.name}: {profile['host']}:{profile['port']}{ANSI.RESET}")
+    elif args.name not in load_profiles():
+        print(f"{ANSI.YELLOW}[!] No proxy profile named {args.name}{ANSI.RESET}")
+    else:
+        delete_profile(args.name)
+        print(f"{ANSI.GREEN}[+] Deleted profile {args.name}{ANSI.RESET}")
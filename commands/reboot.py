@@ -1,8 +1,17 @@
-from utils.adb_utils import run_adb_command, select_device
+from utils.adb_utils import select_device
+from utils.device_info import invalidate_device_info
+from utils.root_shell import drop_root_shell
+from utils.output import emit
 def add_parser(subparsers):
     parser = subparsers.add_parser("reboot", help="Reboot the device")
-    parser.set_defaults(func=reboot_device)
+    parser.set_defaults(func=reboot_device, fleet_func=lambda device, args: reboot(device))
+
+def reboot(device):
+    invalidate_device_info(device.serial)
+    drop_root_shell(device.serial)
+    device.shell("reboot")
+    return "rebooting"
 
 def reboot_device(args):
     device = select_device()
-    device.shell("reboot")
+    emit("result", command="reboot", serial=device.serial, status=reboot(device))
@@ -1,27 +1,105 @@
 import os
+import subprocess
+import time
 from utils.color_utils import ANSI
-from utils.run_command import run_command
 from utils.decorator import header
+from utils import apk_signer
+from utils.output import emit
+from utils.paths import local_path
+
+# keystore đi kèm repo (config/), tính từ vị trí module chứ không phải cwd
+DEFAULT_KEYSTORE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "my-release-key.keystore"))
+DEFAULT_KEYPASS = "toannguyen"
+DEFAULT_ALIAS = "alias_name"
 
 def add_parser(subparsers):
     parser = subparsers.add_parser('signapk', help='Sign an APK file')
     parser.set_defaults(func=signapk)
-    parser.add_argument("-af",'--apkfile', help='APK file to sign')
-    parser.add_argument('--keystore', default="C:\\share\\tools\\MyHackingTools\\Frida-tool\\config\\my-release-key.keystore", help='Keystore file')
-    parser.add_argument('--keypass', default="toannguyen", help='Key password')
+    parser.add_argument("-af",'--apkfile', type=local_path, help='APK file to sign')
+    parser.add_argument('--dir', type=local_path, help='Sign every .apk in this directory (process pool)')
+    parser.add_argument('--keystore', type=local_path, default=DEFAULT_KEYSTORE, help='Keystore file (PKCS#12)')
+    parser.add_argument('--keypass', default=DEFAULT_KEYPASS, help='Key password')
+    parser.add_argument('--alias', default=DEFAULT_ALIAS, help='Key alias (names the META-INF signature files)')
+    parser.add_argument('--key', type=local_path, help='PEM private key instead of the keystore (needs --cert)')
+    parser.add_argument('--cert', type=local_path, help='PEM/DER certificate for --key')
+    parser.add_argument('--digest', default=apk_signer.DEFAULT_DIGEST, choices=list(apk_signer.DIGESTS), help='Digest algorithm')
+    parser.add_argument('-o', '--output', type=local_path, help='Write the signed APK here instead of signing in place')
+    parser.add_argument('--workers', type=int, help='Processes for --dir (default: CPU count)')
+    parser.add_argument('--jarsigner', action='store_true', help='Use jarsigner (SHA1withRSA) instead of the built-in signer')
+
+
+def _check_input(apkfile):
+    if not apkfile:
+        raise ValueError("Please provide an APK file to sign.")
+    if not os.path.exists(apkfile):
+        raise ValueError("APK file not found.")
+
+
+def _jarsigner(apkfile, keystore, keypass, alias):
+    if not os.path.exists(keystore):
+        raise ValueError(f"Keystore file not found: {keystore}")
+    try:
+        result = subprocess.run(["jarsigner", "-verbose", "-sigalg", "SHA1withRSA", "-digestalg", "SHA1",
+                                 "-keystore", keystore, "-storepass", keypass, apkfile, alias],
+                                capture_output=True, text=True)
+    except FileNotFoundError:
+        raise RuntimeError("jarsigner is not installed or not in your PATH.")
+    return {"apk": apkfile, "signed": result.returncode == 0, "output": result.stdout + result.stderr}
+
+
+def sign_apk(apkfile, keystore=DEFAULT_KEYSTORE, keypass=DEFAULT_KEYPASS, alias=DEFAULT_ALIAS,
+             digest=apk_signer.DEFAULT_DIGEST, output=None, key_file=None, cert_file=None, jarsigner=False):
+    """Sign apkfile (v1, in process unless jarsigner=True). Raise ValueError on bad input, RuntimeError without jarsigner."""
+    _check_input(apkfile)
+    if jarsigner:
+        return _jarsigner(apkfile, keystore, keypass, alias)
+    result = apk_signer.sign(apkfile, output, keystore, keypass, alias, digest, key_file, cert_file)
+    cache = result["digest_cache"]
+    result["output"] = (f"signed {result['entries']} entries with {result['digest']} "
+                        f"({cache['hits']} cached, {cache['misses']} hashed) -> {result['signed_apk']}")
+    return result
+
+
+def sign_directory(directory, keystore=DEFAULT_KEYSTORE, keypass=DEFAULT_KEYPASS, alias=DEFAULT_ALIAS,
+                   digest=apk_signer.DEFAULT_DIGEST, key_file=None, cert_file=None, max_workers=None):
+    """Sign every .apk in directory in place across a process pool. Yield one result per APK as it is done."""
+    if not os.path.isdir(directory):
+        raise ValueError(f"Directory not found: {directory}")
+    apks = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith(".apk"))
+    if not apks:
+        raise ValueError(f"No .apk file in {directory}")
+    # load key một lần ở process chính để báo lỗi keystore/password sớm
+    apk_signer.load_signer(keystore, keypass, key_file, cert_file)
+    return apk_signer.sign_many(apks, max_workers, keystore=keystore, keypass=keypass, alias=alias,
+                                algorithm=digest, key_file=key_file, cert_file=cert_file)
 
 
 @header
 def signapk(args):
     """Sign an APK file."""
-    if not args.apkfile:
-        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Please provide an APK file to sign.")
-        return
-    if not os.path.exists(args.apkfile):
-        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}APK file not found.")
-        return
-    if not os.path.exists(args.keystore):
-        print(f"{args.keystore}")
-        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}Keystore file not found.")
+    try:
+        if args.dir:
+            start = time.time()
+            results = sign_directory(args.dir, args.keystore, args.keypass, args.alias, args.digest,
+                                     args.key, args.cert, args.workers)
+            signed = total = 0
+            # kết quả ra theo từng APK, không đợi cả thư mục
+            for result in results:
+                total += 1
+                signed += result["signed"]
+                emit("progress", command="signapk", done=total, **result)
+                if result["signed"]:
+                    print(f"{ANSI.GREEN}[+] {result['apk']}{ANSI.RESET}")
+                else:
+                    print(f"{ANSI.RED}[-] {result['apk']}: {result['error']}{ANSI.RESET}")
+            print(f"{ANSI.CYAN}{signed}/{total} APK signed in {time.time() - start:.2f}s{ANSI.RESET}")
+            emit("result", command="signapk", directory=args.dir, signed=signed, total=total)
+            return
+        result = sign_apk(args.apkfile, args.keystore, args.keypass, args.alias, args.digest, args.output,
+                          args.key, args.cert, args.jarsigner)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"{ANSI.YELLOW}[!]{ANSI.RESET}{e}")
+        emit("error", command="signapk", error=str(e))
         return
-    run_command(f"jarsigner -verbose -sigalg SHA1withRSA -digestalg SHA1 -keystore {args.keystore} -storepass {args.keypass} {args.apkfile} alias_name")
\ No newline at end of file
+    print(f"{ANSI.MAGENTA}{result['output']}{ANSI.RESET}")
+    emit("result", command="signapk", **result)
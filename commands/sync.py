@@ -0,0 +1,49 @@
+from utils.color_utils import ANSI
+from utils.decorator import header
+from utils.adb_utils import select_device
+from utils import file_sync
+from utils.output import emit
+from utils.paths import local_path
+
+def add_parser(subparsers):
+    parser = subparsers.add_parser("sync", help="Mirror a local folder to a device path, pushing only changed files")
+    parser.add_argument("local", type=local_path, help="Local folder")
+    parser.add_argument("remote", help="Device folder (e.g. /data/local/tmp/hooks)")
+    parser.add_argument("--delete", action="store_true", help="Also remove device files that are not in the local folder")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Only show what would be pushed or removed")
+    parser.set_defaults(func=sync, fleet_prepare=_fleet_prepare, fleet_func=_fleet_sync)
+
+def _fleet_prepare(args):
+    # Quét và hash thư mục local một lần cho cả fleet
+    args.local_files = file_sync.scan_local(args.local)
+
+def _fleet_sync(device, args):
+    return summary(file_sync.sync_dir(device, args.local, args.remote, args.delete, args.dry_run, args.local_files))
+
+def format_rate(bytes_per_sec):
+    for unit in ("B", "KB", "MB"):
+        if bytes_per_sec < 1024:
+            return f"{bytes_per_sec:.0f} {unit}/s"
+        bytes_per_sec /= 1024
+    return f"{bytes_per_sec:.1f} GB/s"
+
+def summary(result):
+    deleted = f", {result['deleted']} removed" if result["deleted"] else ""
+    if result.get("dry_run"):
+        return f"would push {result['pushed']} file(s) ({result['bytes']} bytes){deleted}, {result['unchanged']} unchanged"
+    if not result["pushed"]:
+        return f"up to date ({result['files']} files){deleted}"
+    return (f"pushed {result['pushed']} file(s), {result['bytes']} bytes in {result['seconds']}s "
+            f"({format_rate(result['bytes_per_sec'])}){deleted}, {result['unchanged']} unchanged")
+
+@header
+def sync(args):
+    device = select_device()
+    result = file_sync.sync_dir(device, args.local, args.remote, args.delete, args.dry_run)
+    if result.get("dry_run"):
+        for path in result["paths"]:
+            print(f"{ANSI.CYAN}    push   {path}{ANSI.RESET}")
+        for path in result["delete_paths"]:
+            print(f"{ANSI.YELLOW}    remove {path}{ANSI.RESET}")
+    emit("result", command="sync", **result)
+    print(f"{ANSI.GREEN}[+] {result['remote']} on {device.serial}: {summary(result)}{ANSI.RESET}")
@@ -5,12 +5,16 @@ Provides access to various Android hacking tools through Model Context Protocol
 """
 
 import asyncio
+import contextlib
+import contextvars
+import functools
+import itertools
 import json
 import sys
-from typing import Any, Dict, List, Optional
-import subprocess
+from typing import Optional
 import os
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # MCP imports
 from mcp.server import NotificationOptions, Server
@@ -19,12 +23,70 @@ import mcp.server.stdio
 import mcp.types as types
 
 # Tool imports
-from utils.adb_utils import run_adb_command_retn
-from utils.color_utils import ANSI
+from utils.adb_utils import device_states, get_client, get_device
+from utils import daemon, output, trace
+from utils.result_cache import ALL_TOOLS, ResultCache
+from utils.device_scheduler import DeviceScheduler
+from commands import signapk
+
+# Timeout (giây) cho từng tool; process con bị kill khi hết giờ
+TOOL_TIMEOUTS = {
+    "adb_devices": 20,
+    "adb_connect": 120,
+    "list_packages": 30,
+    "proxy_get": 15,
+    "proxy_set": 15,
+    "proxy_unset": 15,
+    "install_certificate": 120,
+    "frida_kill_list": 180,
+    "reboot_device": 30,
+    "sign_apk": 300,
+    "logcat": 30,
+    "sync_dir": 600,
+    "cache_stats": 5,
+    "scheduler_status": 5,
+}
+# TTL (giây) của kết quả tool chỉ đọc; call giống hệt đang chạy thì dùng chung. FRIDA_TOOL_MCP_CACHE=0 để tắt
+CACHE_TTLS = {
+    "adb_devices": 5,
+    "list_packages": 30,
+    "proxy_get": 10,
+}
+# Tool thay đổi device -> tool có kết quả bị cũ trên device đó (ALL_TOOLS: mọi tool)
+CACHE_INVALIDATES = {
+    "proxy_set": ("proxy_get",),
+    "proxy_unset": ("proxy_get",),
+    "install_certificate": ALL_TOOLS,
+    "reboot_device": ALL_TOOLS,
+    "adb_connect": ("adb_devices",),
+}
+# Số tool call được chạy song song: thread của pool riêng, không dùng default executor (không giới hạn thật sự)
+MAX_CONCURRENT_CALLS = 8
+# Tool chạy trên một device: xếp hàng theo device, số nhỏ chạy trước. Tool không có ở đây chạy ngay.
+# Timeout của tool tính cả thời gian chờ trong hàng
+DEVICE_TOOL_PRIORITIES = {
+    "proxy_get": 0,
+    "list_packages": 0,
+    "logcat": 0,
+    "proxy_set": 1,
+    "proxy_unset": 1,
+    "frida_kill_list": 1,
+    "install_certificate": 1,
+    "sync_dir": 2,
+    "reboot_device": 3,
+}
 
 class FridaToolsMCPServer:
     def __init__(self):
         self.server = Server("frida-tools")
+        self._pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="mcp-tool")
+        self.cache = ResultCache(CACHE_TTLS if os.environ.get("FRIDA_TOOL_MCP_CACHE") != "0" else {}, CACHE_INVALIDATES)
+        self.scheduler = DeviceScheduler()
+        # FRIDA_TOOL_PROFILE=1: mỗi response kèm bảng thời gian theo phase (adb.shell, su.run, http, ...)
+        if os.environ.get("FRIDA_TOOL_PROFILE") == "1":
+            trace.enable()
+            # span ngoài tool call (vd. thread của logcat capture) không thuộc response nào: bỏ, không tích lại
+            trace.drop_orphans()
         self.setup_handlers()
     
     def setup_handlers(self):
@@ -43,7 +105,7 @@ class FridaToolsMCPServer:
                 ),
                 types.Tool(
                     name="adb_connect",
-                    description="Connect to Android device via ADB WiFi",
+                    description="Connect to Android device via ADB WiFi, or discover and connect every device in a range",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -53,11 +115,15 @@ class FridaToolsMCPServer:
                             },
                             "port": {
                                 "type": "string", 
-                                "description": "Port number (default: 5555)",
+                                "description": "Port number (default: 5555); with scan also a list or range, e.g. 5555,37000-37100",
                                 "default": "5555"
+                            },
+                            "scan": {
+                                "type": "string",
+                                "description": "CIDR range to probe for ADB instead of host (e.g. 192.168.1.0/24); connects to every responder"
                             }
                         },
-                        "required": ["host"]
+                        "required": []
                     }
                 ),
                 types.Tool(
@@ -69,6 +135,10 @@ class FridaToolsMCPServer:
                             "filter": {
                                 "type": "string",
                                 "description": "Optional filter for package names"
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
                             }
                         },
                         "required": []
@@ -76,38 +146,60 @@ class FridaToolsMCPServer:
                 ),
                 types.Tool(
                     name="proxy_get",
-                    description="Get current proxy settings on Android device",
+                    description="Get current proxy settings (http_proxy and global_http_proxy_*) on Android device",
                     inputSchema={
                         "type": "object",
-                        "properties": {},
+                        "properties": {
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
                         "required": []
                     }
                 ),
                 types.Tool(
                     name="proxy_set",
-                    description="Set proxy settings on Android device",
+                    description="Set proxy settings on Android device; the values are read back and rolled back on mismatch",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "host": {
                                 "type": "string",
-                                "description": "Proxy server IP address"
+                                "description": "Proxy server IP address (optional with profile)"
                             },
                             "port": {
                                 "type": "string",
                                 "description": "Proxy server port (default: 8080)",
                                 "default": "8080"
+                            },
+                            "exclusion_list": {
+                                "type": "string",
+                                "description": "Comma-separated hosts that bypass the proxy"
+                            },
+                            "profile": {
+                                "type": "string",
+                                "description": "Name of a profile saved with `proxy profile save`"
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
                             }
                         },
-                        "required": ["host"]
+                        "required": []
                     }
                 ),
                 types.Tool(
                     name="proxy_unset",
-                    description="Remove proxy settings from Android device",
+                    description="Clear the proxy on Android device: http_proxy set to :0, global_http_proxy_* deleted",
                     inputSchema={
                         "type": "object",
-                        "properties": {},
+                        "properties": {
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
                         "required": []
                     }
                 ),
@@ -129,6 +221,17 @@ class FridaToolsMCPServer:
                             "cert_path": {
                                 "type": "string",
                                 "description": "Local path to certificate file (if not downloading)"
+                            },
+                            "store": {
+                                "type": "string",
+                                "enum": ["user", "system"],
+                                "description": "user (default): user CA store, applies after a reboot; system: tmpfs overlay "
+                                               "of the system and APEX stores, trusted by every app without a reboot until the next one",
+                                "default": "user"
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
                             }
                         },
                         "required": []
@@ -136,10 +239,31 @@ class FridaToolsMCPServer:
                 ),
                 types.Tool(
                     name="frida_kill_list",
-                    description="Kill running Frida server and list available Frida versions",
+                    description="Manage the Frida server: kill it and list available versions (default), deploy the build matching the device ABI, or start/stop/restart/status without prompts",
                     inputSchema={
                         "type": "object",
-                        "properties": {},
+                        "properties": {
+                            "action": {
+                                "type": "string",
+                                "enum": ["kill_list", "deploy", "start", "stop", "restart", "status"],
+                                "description": "Lifecycle action (default: kill_list)",
+                                "default": "kill_list"
+                            },
+                            "version": {
+                                "type": "string",
+                                "description": "frida-server version to start or deploy, e.g. 16.5.9 (optional for start when only one binary is on the device)"
+                            },
+                            "compress": {
+                                "type": "string",
+                                "enum": ["auto", "always", "never"],
+                                "description": "deploy: push gzip-compressed and unpack on device (auto = only over WiFi ADB)",
+                                "default": "auto"
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
                         "required": []
                     }
                 ),
@@ -148,7 +272,12 @@ class FridaToolsMCPServer:
                     description="Reboot the connected Android device",
                     inputSchema={
                         "type": "object",
-                        "properties": {},
+                        "properties": {
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
                         "required": []
                     }
                 ),
@@ -164,141 +293,341 @@ class FridaToolsMCPServer:
                             },
                             "keystore": {
                                 "type": "string",
-                                "description": "Path to keystore file",
-                                "default": "C:\\share\\tools\\MyHackingTools\\Frida-tool\\config\\my-release-key.keystore"
+                                "description": "Path to keystore file (PKCS#12)",
+                                "default": signapk.DEFAULT_KEYSTORE
                             },
                             "keypass": {
                                 "type": "string",
                                 "description": "Keystore password",
                                 "default": "toannguyen"
+                            },
+                            "digest": {
+                                "type": "string",
+                                "enum": ["sha256", "sha384", "sha512"],
+                                "description": "Manifest/signature digest (v1 signing, in process)",
+                                "default": "sha256"
                             }
                         },
                         "required": ["apk_file"]
                     }
+                ),
+                types.Tool(
+                    name="logcat",
+                    description="Last N logcat lines matching package/tag/level. The first call starts a background capture "
+                                "into a ring buffer; later calls with the same filters return quickly",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "package": {
+                                "type": "string",
+                                "description": "Only lines from the running processes of this package"
+                            },
+                            "tag": {
+                                "type": "string",
+                                "description": "Comma-separated logcat tags to keep"
+                            },
+                            "level": {
+                                "type": "string",
+                                "enum": ["V", "D", "I", "W", "E", "F"],
+                                "description": "Minimum level"
+                            },
+                            "lines": {
+                                "type": "integer",
+                                "description": "Number of lines to return (default: 100)",
+                                "default": 100
+                            },
+                            "action": {
+                                "type": "string",
+                                "enum": ["read", "stop"],
+                                "description": "read (default) or stop the device's background captures",
+                                "default": "read"
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
+                        "required": []
+                    }
+                ),
+                types.Tool(
+                    name="sync_dir",
+                    description="Mirror a local folder to a device path. Only files whose content changed are pushed; "
+                                "an unchanged folder costs one ADB round trip",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "local_dir": {
+                                "type": "string",
+                                "description": "Local folder to mirror"
+                            },
+                            "remote_dir": {
+                                "type": "string",
+                                "description": "Device folder (e.g. /data/local/tmp/hooks)"
+                            },
+                            "delete": {
+                                "type": "boolean",
+                                "description": "Also remove device files that are not in the local folder",
+                                "default": False
+                            },
+                            "dry_run": {
+                                "type": "boolean",
+                                "description": "Only report what would be pushed or removed",
+                                "default": False
+                            },
+                            "serial": {
+                                "type": "string",
+                                "description": "Device serial (optional when only one device is connected)"
+                            }
+                        },
+                        "required": ["local_dir", "remote_dir"]
+                    }
+                ),
+                types.Tool(
+                    name="cache_stats",
+                    description="Hit/miss/coalesced/invalidation counters and TTLs of the tool result cache",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "clear": {
+                                "type": "boolean",
+                                "description": "Also drop every cached result",
+                                "default": False
+                            }
+                        },
+                        "required": []
+                    }
+                ),
+                types.Tool(
+                    name="scheduler_status",
+                    description="Running and queued tool calls per device, with their priority, wait and run times",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {},
+                        "required": []
+                    }
                 )
             ]
 
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent]:
             """Handle tool calls"""
-            try:
-                if name == "adb_devices":
-                    return await self._adb_devices()
-                elif name == "adb_connect":
-                    return await self._adb_connect(arguments)
-                elif name == "list_packages":
-                    return await self._list_packages(arguments)
-                elif name == "proxy_get":
-                    return await self._proxy_get()
-                elif name == "proxy_set":
-                    return await self._proxy_set(arguments)
-                elif name == "proxy_unset":
-                    return await self._proxy_unset()
-                elif name == "install_certificate":
-                    return await self._install_certificate(arguments)
-                elif name == "frida_kill_list":
-                    return await self._frida_kill_list()
-                elif name == "reboot_device":
-                    return await self._reboot_device()
-                elif name == "sign_apk":
-                    return await self._sign_apk(arguments)
-                else:
-                    raise ValueError(f"Unknown tool: {name}")
-            except Exception as e:
-                return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+            # event (device/progress/result/error/timing) của call này: gửi dần qua progress notification
+            # nếu client có progressToken, và trả kèm dạng NDJSON ở cuối response
+            with output.collect(self._progress_forwarder()) as events, trace.collect() as spans:
+                start = time.monotonic()
+                try:
+                    content = await asyncio.wait_for(
+                        self.cache.run(name, arguments, (arguments or {}).get("serial"), lambda: self._schedule(name, arguments)),
+                        TOOL_TIMEOUTS.get(name, 60))
+                except asyncio.TimeoutError:
+                    output.emit("error", tool=name, error="timed out")
+                    content = [types.TextContent(type="text", text=f"Error: {name} timed out")]
+                except Exception as e:
+                    output.emit("error", tool=name, error=str(e))
+                    content = [types.TextContent(type="text", text=f"Error: {str(e)}")]
+                output.emit("timing", tool=name, seconds=round(time.monotonic() - start, 3))
+            if trace.is_enabled():
+                content.append(types.TextContent(type="text", text=f"Profile:\n{json.dumps(trace.summarize(spans), indent=2)}"))
+            return content + [types.TextContent(type="text", text="\n".join(output.to_json(event) for event in events))]
 
-    async def _run_adb_command(self, command: str) -> str:
-        """Run ADB command and return output"""
+    def _progress_forwarder(self):
+        """Callback sending each event as an MCP progress notification, or None when the client did not ask for progress."""
         try:
-            result = subprocess.run(['adb'] + command.split(), 
-                                  capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                return f"Error: {result.stderr}"
-            return result.stdout
-        except subprocess.TimeoutExpired:
-            return "Error: Command timed out"
-        except Exception as e:
-            return f"Error: {str(e)}"
+            context = self.server.request_context
+        except LookupError:
+            return None
+        token = context.meta.progressToken if context.meta else None
+        if token is None:
+            return None
+        loop = asyncio.get_running_loop()
+        counter = itertools.count(1)
 
-    async def _run_tool_command(self, command: str) -> str:
-        """Run frida-tool command"""
-        try:
-            result = subprocess.run(['uv', 'run', 'cli_tool.py'] + command.split(),
-                                  capture_output=True, text=True, timeout=60,
-                                  cwd='e:\\Tools\\MyHackingTools\\Frida-tool')
-            return result.stdout + result.stderr
-        except Exception as e:
-            return f"Error: {str(e)}"
+        def forward(event):
+            notification = context.session.send_progress_notification(token, next(counter), message=output.to_json(event))
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                on_loop = False
+            if on_loop:
+                loop.create_task(notification)
+            else:
+                # event từ worker thread (pool của tool, fleet pool)
+                asyncio.run_coroutine_threadsafe(notification, loop)
+        return forward
+
+    async def _schedule(self, name: str, arguments: dict) -> list[types.TextContent]:
+        """Device tools wait for their turn on the device they target; the others run right away."""
+        priority = DEVICE_TOOL_PRIORITIES.get(name)
+        if priority is None:
+            return await self._dispatch(name, arguments)
+        serial = (arguments or {}).get("serial") or await self._to_thread(_default_serial)
+        return await self.scheduler.run(serial, name, priority, lambda: self._dispatch(name, arguments))
+
+    async def _dispatch(self, name: str, arguments: dict) -> list[types.TextContent]:
+        if name == "adb_devices":
+            return await self._adb_devices()
+        elif name == "adb_connect":
+            return await self._adb_connect(arguments)
+        elif name == "list_packages":
+            return await self._list_packages(arguments)
+        elif name == "proxy_get":
+            return await self._proxy_get(arguments)
+        elif name == "proxy_set":
+            return await self._proxy_set(arguments)
+        elif name == "proxy_unset":
+            return await self._proxy_unset(arguments)
+        elif name == "install_certificate":
+            return await self._install_certificate(arguments)
+        elif name == "frida_kill_list":
+            return await self._frida_kill_list(arguments)
+        elif name == "reboot_device":
+            return await self._reboot_device(arguments)
+        elif name == "sign_apk":
+            return await self._sign_apk(arguments)
+        elif name == "logcat":
+            return await self._logcat(arguments)
+        elif name == "sync_dir":
+            return await self._sync_dir(arguments)
+        elif name == "cache_stats":
+            return await self._cache_stats(arguments)
+        elif name == "scheduler_status":
+            return await self._scheduler_status()
+        else:
+            raise ValueError(f"Unknown tool: {name}")
+
+    async def _to_thread(self, func, *args, **kwargs):
+        """asyncio.to_thread on the server's pool of MAX_CONCURRENT_CALLS threads. A call cancelled (timeout,
+        client gone) while waiting for a thread never runs; one already running cannot be interrupted, it
+        finishes in the background and keeps its thread, and its device's queue, until then."""
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, functools.partial(func, *args, **kwargs))
+        # device của call đang chạy vẫn bận tới khi thread xong, kể cả khi call đã hết giờ
+        self.scheduler.hold(future)
+        return await asyncio.wrap_future(future)
 
     async def _adb_devices(self) -> list[types.TextContent]:
         """List connected devices"""
-        output = await self._run_adb_command("devices")
+        entries = await self._to_thread(daemon.call, "devices")
+        output = "\n".join(
+            f"{info['serial']}\t{info['brand']} {info['model']}\tSDK {info['sdk']}\tAndroid {info['release']}\t{info['abi']}"
+            for info in entries
+        )
         return [types.TextContent(type="text", text=f"Connected devices:\n{output}")]
 
     async def _adb_connect(self, args: dict) -> list[types.TextContent]:
-        """Connect to device via WiFi"""
-        host = args["host"]
-        port = args.get("port", "5555")
-        output = await self._run_adb_command(f"connect {host}:{port}")
-        return [types.TextContent(type="text", text=f"Connection result:\n{output}")]
+        """Connect to device via WiFi, or scan a range"""
+        port = str(args.get("port", "5555"))
+        if args.get("scan"):
+            result = await self._to_thread(lambda: daemon.call("connect", scan=args["scan"], port=port))
+            return [types.TextContent(type="text", text=f"Scan result:\n{json.dumps(result, indent=2)}")]
+        if not args.get("host"):
+            raise ValueError("Provide host or scan")
+        result = await self._to_thread(lambda: daemon.call("connect", host=args["host"], port=port))
+        return [types.TextContent(type="text", text=f"Connection result:\n{result['output']}")]
 
     async def _list_packages(self, args: dict) -> list[types.TextContent]:
-        """List installed packages"""
+        """List installed packages with version code, uid and APK path"""
         filter_text = args.get("filter", "")
-        command = "shell pm list packages"
-        if filter_text:
-            command += f" | grep {filter_text}"
-        output = await self._run_adb_command(command)
+        inventory = await self._to_thread(daemon.call, "packages", args.get("serial"))
+        output = "\n".join(
+            f"{name}\tversionCode={info['version_code']}\tuid={info['uid']}\t{info['path']}"
+            for name, info in inventory.items() if filter_text in name
+        )
         return [types.TextContent(type="text", text=f"Installed packages:\n{output}")]
 
-    async def _proxy_get(self) -> list[types.TextContent]:
+    async def _proxy_get(self, args: dict) -> list[types.TextContent]:
         """Get proxy settings"""
-        output = await self._run_adb_command("shell su -c 'settings get global http_proxy'")
-        return [types.TextContent(type="text", text=f"Current proxy settings:\n{output}")]
+        result = await self._to_thread(daemon.call, "proxy", args.get("serial"), action="get")
+        return [types.TextContent(type="text", text=f"Current proxy settings:\n{json.dumps(result, indent=2)}")]
 
     async def _proxy_set(self, args: dict) -> list[types.TextContent]:
         """Set proxy settings"""
-        host = args["host"]
-        port = args.get("port", "8080")
-        proxy_setting = f"{host}:{port}"
-        output = await self._run_adb_command(f"shell su -c 'settings put global http_proxy {proxy_setting}'")
-        return [types.TextContent(type="text", text=f"Proxy set to {proxy_setting}\n{output}")]
+        result = await self._to_thread(
+            lambda: daemon.call("proxy", args.get("serial"), action="set", profile=args.get("profile"), host=args.get("host"),
+                                port=args.get("port"), exclusion_list=args.get("exclusion_list")))
+        return [types.TextContent(type="text", text=f"Proxy set to {result['settings']['http_proxy']}\n{json.dumps(result, indent=2)}")]
 
-    async def _proxy_unset(self) -> list[types.TextContent]:
+    async def _proxy_unset(self, args: dict) -> list[types.TextContent]:
         """Unset proxy settings"""
-        output = await self._run_adb_command("shell su -c 'settings put global http_proxy :0'")
-        return [types.TextContent(type="text", text=f"Proxy settings cleared\n{output}")]
+        result = await self._to_thread(daemon.call, "proxy", args.get("serial"), action="unset")
+        return [types.TextContent(type="text", text=f"Proxy settings cleared\n{json.dumps(result, indent=2)}")]
 
     async def _install_certificate(self, args: dict) -> list[types.TextContent]:
         """Install certificate"""
-        cmd_parts = ["install_cert"]
         if "host" in args and "port" in args:
-            cmd_parts.extend(["-H", args["host"], "-P", args["port"]])
-        elif "cert_path" in args:
-            cmd_parts.extend(["-p", args["cert_path"]])
-        
-        output = await self._run_tool_command(" ".join(cmd_parts))
-        return [types.TextContent(type="text", text=f"Certificate installation result:\n{output}")]
+            source = {"host": args["host"], "port": args["port"]}
+        else:
+            # daemon có thể chạy ở cwd khác
+            source = {"path": os.path.abspath(args["cert_path"]) if args.get("cert_path") else None}
+        result = await self._to_thread(
+            lambda: daemon.call("install_cert", args.get("serial"), store=args.get("store", "user"), **source))
+        return [types.TextContent(type="text", text=f"Certificate installation result:\n{json.dumps(result, indent=2)}")]
 
-    async def _frida_kill_list(self) -> list[types.TextContent]:
+    async def _frida_kill_list(self, args: dict) -> list[types.TextContent]:
         """Kill Frida and list versions"""
-        output = await self._run_tool_command("klfrida")
-        return [types.TextContent(type="text", text=f"Frida server management:\n{output}")]
+        action = args.get("action", "kill_list")
+        result = await self._to_thread(
+            lambda: daemon.call("klfrida", args.get("serial"), action=None if action == "kill_list" else action,
+                                version=args.get("version"), compress=args.get("compress", "auto")))
+        return [types.TextContent(type="text", text=f"Frida server management:\n{json.dumps(result, indent=2)}")]
 
-    async def _reboot_device(self) -> list[types.TextContent]:
+    async def _reboot_device(self, args: dict) -> list[types.TextContent]:
         """Reboot device"""
-        output = await self._run_adb_command("reboot")
-        return [types.TextContent(type="text", text=f"Device reboot initiated\n{output}")]
+        # device của lane scheduler (serial, hoặc device online duy nhất), không phải device mặc định của `adb`
+        def reboot():
+            device = get_device(args.get("serial"))
+            device.reboot()
+            return device.serial
+        serial = await self._to_thread(reboot)
+        return [types.TextContent(type="text", text=f"Device reboot initiated ({serial})")]
 
     async def _sign_apk(self, args: dict) -> list[types.TextContent]:
         """Sign APK file"""
-        apk_file = args["apk_file"]
-        keystore = args.get("keystore", "C:\\share\\tools\\MyHackingTools\\Frida-tool\\config\\my-release-key.keystore")
-        keypass = args.get("keypass", "toannguyen")
-        
-        cmd_parts = ["signapk", "-af", apk_file, "--keystore", keystore, "--keypass", keypass]
-        output = await self._run_tool_command(" ".join(cmd_parts))
-        return [types.TextContent(type="text", text=f"APK signing result:\n{output}")]
+        result = await self._to_thread(signapk.sign_apk, args["apk_file"],
+                                         args.get("keystore", signapk.DEFAULT_KEYSTORE),
+                                         args.get("keypass", signapk.DEFAULT_KEYPASS),
+                                         digest=args.get("digest", "sha256"))
+        return [types.TextContent(type="text", text=f"APK signing result:\n{json.dumps(result, indent=2)}")]
+
+    async def _logcat(self, args: dict) -> list[types.TextContent]:
+        """Last matching logcat lines from a background capture"""
+        tags = [tag.strip() for tag in args["tag"].split(",") if tag.strip()] if args.get("tag") else None
+        result = await self._to_thread(
+            lambda: daemon.call("logcat", args.get("serial"), action=args.get("action", "read"), package=args.get("package"),
+                                tags=tags, level=args.get("level"), lines=args.get("lines", 100)))
+        if "lines" not in result:
+            return [types.TextContent(type="text", text=f"Stopped {result['stopped']} logcat capture(s)")]
+        lines = result.pop("lines")
+        return [types.TextContent(type="text", text=f"Logcat ({json.dumps(result)}):\n" + "\n".join(lines))]
+
+    async def _sync_dir(self, args: dict) -> list[types.TextContent]:
+        """Mirror a local folder to the device"""
+        result = await self._to_thread(
+            # daemon có thể chạy ở cwd khác
+            lambda: daemon.call("sync", args.get("serial"), local_dir=os.path.abspath(args["local_dir"]),
+                                remote_dir=args["remote_dir"], delete=args.get("delete", False),
+                                dry_run=args.get("dry_run", False)))
+        return [types.TextContent(type="text", text=f"Sync result:\n{json.dumps(result, indent=2)}")]
+
+    async def _cache_stats(self, args: dict) -> list[types.TextContent]:
+        """Result cache counters"""
+        summary = self.cache.summary()
+        if args.get("clear"):
+            self.cache.clear()
+        return [types.TextContent(type="text", text=f"Result cache:\n{json.dumps(summary, indent=2)}")]
+
+    async def _scheduler_status(self) -> list[types.TextContent]:
+        """Running and queued device jobs"""
+        return [types.TextContent(type="text", text=f"Device queues:\n{json.dumps(self.scheduler.status(), indent=2)}")]
+
+def _default_serial() -> Optional[str]:
+    """Serial of the only online device, so calls without serial share its queue; None when there are 0 or several."""
+    try:
+        online = [serial for serial, state in device_states(get_client()) if state == "device"]
+    except Exception:
+        return None
+    return online[0] if len(online) == 1 else None
 
 async def main():
     """Main server entry point"""
@@ -306,18 +635,20 @@ async def main():
     
     # Run the server using stdin/stdout streams
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server_instance.server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="frida-tools",
-                server_version="1.0.0",
-                capabilities=server_instance.server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+        # Command modules run in-process: any stray print must not corrupt the JSON-RPC stream on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            await server_instance.server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="frida-tools",
+                    server_version="1.0.0",
+                    capabilities=server_instance.server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
 
 if __name__ == "__main__":
     asyncio.run(main())
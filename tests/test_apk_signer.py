@@ -0,0 +1,115 @@
+"""
+In-process v1 APK signer, with the keystore shipped in config/:
+
+    python -m unittest discover tests
+"""
+import base64
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands import signapk
+from utils import apk_signer, cache_utils
+
+LONG_NAME = "assets/" + "x" * 150 + ".bin"
+ENTRIES = {
+    "AndroidManifest.xml": b"<manifest/>" * 100,
+    "classes.dex": os.urandom(4096),
+    LONG_NAME: b"long name",
+    "META-INF/OLD.SF": b"stale signature",
+    "META-INF/OLD.RSA": b"stale block",
+}
+
+
+def parse_sections(data):
+    """Manifest/.SF bytes -> [{attribute: value}], continuation lines joined."""
+    sections = []
+    for block in data.decode().split("\r\n\r\n"):
+        lines = []
+        for line in block.split("\r\n"):
+            if line.startswith(" "):
+                lines[-1] += line[1:]
+            elif line:
+                lines.append(line)
+        if lines:
+            sections.append(dict(line.split(": ", 1) for line in lines))
+    return sections
+
+
+class ApkSignerTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        # cache digest của test không lẫn vào ~/.frida-tool
+        patcher = mock.patch.object(cache_utils, "CACHE_ROOT", os.path.join(self.folder, "home"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.apk = os.path.join(self.folder, "app.apk")
+        with zipfile.ZipFile(self.apk, "w") as zf:
+            for name, data in ENTRIES.items():
+                zf.writestr(name, data, zipfile.ZIP_STORED if name == "classes.dex" else zipfile.ZIP_DEFLATED)
+
+    def sign(self, **kwargs):
+        return signapk.sign_apk(self.apk, **kwargs)
+
+    def test_default_keystore_ships_with_the_repo(self):
+        self.assertTrue(os.path.isfile(signapk.DEFAULT_KEYSTORE))
+        apk_signer.load_signer(signapk.DEFAULT_KEYSTORE, signapk.DEFAULT_KEYPASS)
+
+    def test_manifest_and_signature_file_digests(self):
+        result = self.sign(digest="sha384")
+        self.assertEqual((result["entries"], result["signature"]), (3, "META-INF/ALIAS_NA.RSA"))
+        with zipfile.ZipFile(self.apk) as zf:
+            names = zf.namelist()
+            manifest, sf = zf.read("META-INF/MANIFEST.MF"), zf.read("META-INF/ALIAS_NA.SF")
+            # file chữ ký đứng đầu, chữ ký cũ bị bỏ, các entry khác giữ nguyên cách nén
+            self.assertEqual(names[:3], ["META-INF/MANIFEST.MF", "META-INF/ALIAS_NA.SF", "META-INF/ALIAS_NA.RSA"])
+            self.assertNotIn("META-INF/OLD.SF", names)
+            self.assertEqual(zf.getinfo("classes.dex").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zf.read(LONG_NAME), ENTRIES[LONG_NAME])
+        self.assertTrue(all(len(line) <= 72 for line in manifest.split(b"\r\n")))
+
+        def b64(data):
+            return base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+        sections = parse_sections(manifest)
+        self.assertEqual(sections[0]["Manifest-Version"], "1.0")
+        digests = {section["Name"]: section["SHA-384-Digest"] for section in sections[1:]}
+        self.assertEqual(digests, {name: b64(data) for name, data in ENTRIES.items() if not name.startswith("META-INF/")})
+
+        sf_sections = parse_sections(sf)
+        self.assertEqual(sf_sections[0]["SHA-384-Digest-Manifest"], b64(manifest))
+        raw_sections = manifest.split(b"\r\n\r\n")[1:-1]
+        self.assertEqual([section["SHA-384-Digest"] for section in sf_sections[1:]],
+                         [b64(raw + b"\r\n\r\n") for raw in raw_sections])
+
+    @unittest.skipUnless(shutil.which("openssl"), "openssl not installed")
+    def test_signature_block_verifies(self):
+        self.sign()
+        with zipfile.ZipFile(self.apk) as zf:
+            for name in ("META-INF/ALIAS_NA.SF", "META-INF/ALIAS_NA.RSA"):
+                with open(os.path.join(self.folder, os.path.basename(name)), "wb") as f:
+                    f.write(zf.read(name))
+        result = subprocess.run(["openssl", "smime", "-verify", "-noverify", "-binary", "-inform", "DER",
+                                 "-in", "ALIAS_NA.RSA", "-content", "ALIAS_NA.SF"],
+                                cwd=self.folder, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_resigning_is_stable(self):
+        self.sign(output=os.path.join(self.folder, "first.apk"))
+        first = self.sign()
+        second = self.sign()
+        self.assertEqual(second["digest_cache"]["misses"], 0)
+        self.assertEqual(first["entries"], second["entries"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Whole-store certificate index, with the index script run by sh over local store folders:
+
+    python -m unittest discover tests
+"""
+import datetime
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import cache_utils, cert_index, cert_store
+
+
+def make_certificate(name):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(subject).issuer_name(subject).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=1)).sign(key, hashes.SHA256()))
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+class FakeDevice:
+    serial = "fake-certs"
+
+
+class CertIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.stores = {name: os.path.join(self.folder, name) for name in ("system", "user", "keychain")}
+        for name in ("system", "user"):
+            os.makedirs(self.stores[name])  # keychain: store không tồn tại
+        self.root_calls = []
+        for patcher in (mock.patch.dict(cert_index.CERT_STORES, self.stores, clear=True),
+                        mock.patch.object(cert_index, "root_run", self.root_run),
+                        mock.patch.object(cache_utils, "CACHE_ROOT", os.path.join(self.folder, "home"))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def root_run(self, device, command):
+        result = subprocess.run(["sh", "-c", command], capture_output=True, text=True)
+        self.root_calls.append(result.stdout)
+        return result.stdout, result.returncode
+
+    def write(self, store, name, data):
+        with open(os.path.join(self.stores[store], name), "wb") as f:
+            f.write(data)
+
+    def test_index_every_store_and_reuse_it_while_unchanged(self):
+        self.write("system", "aaaaaaaa.0", b"system ca")
+        self.write("user", "bbbbbbbb.0", b"user ca")
+        index = cert_index.get_cert_index(FakeDevice())
+        self.assertEqual(sorted((e["store"], e["file"], e["hash"]) for e in index["entries"]),
+                         [("system", "aaaaaaaa.0", "aaaaaaaa"), ("user", "bbbbbbbb.0", "bbbbbbbb")])
+        self.assertEqual([e["file"] for e in cert_index.find_by_md5(index, hashlib.md5(b"user ca").hexdigest())],
+                         ["bbbbbbbb.0"])
+        self.assertEqual(len(cert_index.find_by_hash(index, "aaaaaaaa")), 1)
+
+        again = cert_index.get_cert_index(FakeDevice())
+        self.assertEqual(again, index)
+        self.assertEqual(self.root_calls[-1].strip(), cert_index.UNCHANGED)
+
+        self.write("user", "cccccccc.0", b"new user ca")
+        changed = cert_index.get_cert_index(FakeDevice())
+        self.assertNotEqual(changed["token"], index["token"])
+        self.assertEqual(len(changed["entries"]), 3)
+        self.assertEqual(len(self.root_calls), 3)
+
+    def test_invalidate_forces_a_full_listing(self):
+        self.write("system", "aaaaaaaa.0", b"system ca")
+        cert_index.get_cert_index(FakeDevice())
+        cert_index.invalidate_cert_index(FakeDevice.serial)
+        cert_index.get_cert_index(FakeDevice())
+        self.assertNotEqual(self.root_calls[-1].strip(), cert_index.UNCHANGED)
+
+    def test_locate_certificate_matches_content(self):
+        record = cert_store.store_certificate(make_certificate("frida-tool test CA"))
+        self.write("user", f"{record.subject_hash}.0", record.pem)
+        self.write("system", f"{record.subject_hash}.1", make_certificate("same hash, other content"))
+        index = cert_index.get_cert_index(FakeDevice())
+        self.assertEqual(sorted(cert_index.locate_certificate(index, record), key=lambda entry: entry["store"]),
+                         [{"store": "system", "file": f"{record.subject_hash}.1", "match": False},
+                          {"store": "user", "file": f"{record.subject_hash}.0", "match": True}])
+
+
+if __name__ == "__main__":
+    unittest.main()
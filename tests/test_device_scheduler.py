@@ -0,0 +1,69 @@
+"""
+DeviceScheduler regressions, stdlib only:
+
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.device_scheduler import DeviceScheduler
+
+
+class DeviceSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.scheduler = DeviceScheduler()
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.log = []
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    async def to_thread(self, func):
+        """Như FridaToolsMCPServer._to_thread: thread giữ device của job đang chạy."""
+        future = self.pool.submit(func)
+        self.scheduler.hold(future)
+        return await asyncio.wrap_future(future)
+
+    async def test_timed_out_job_keeps_device_until_thread_returns(self):
+        release = threading.Event()
+
+        def install():
+            release.wait(5)
+            self.log.append("install done")
+
+        async def reboot():
+            self.log.append("reboot")
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.scheduler.run("dev", "install", 1, lambda: self.to_thread(install)), 0.05)
+        second = asyncio.ensure_future(self.scheduler.run("dev", "reboot", 3, reboot))
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.log, [])
+        running = self.scheduler.status()["devices"]["dev"]["running"]
+        self.assertEqual((running["tool"], running["detached_threads"]), ("install", 1))
+        release.set()
+        await second
+        self.assertEqual(self.log, ["install done", "reboot"])
+        self.assertEqual(self.scheduler.status()["devices"], {})
+
+    async def test_other_devices_are_not_held(self):
+        release = threading.Event()
+
+        async def read():
+            self.log.append("other")
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.scheduler.run("a", "install", 1, lambda: self.to_thread(lambda: release.wait(5))), 0.05)
+        await asyncio.wait_for(self.scheduler.run("b", "proxy_get", 0, read), 1)
+        self.assertEqual(self.log, ["other"])
+        release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Proxy apply / read-back / rollback script, run by sh against a fake `settings` command:
+
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commands import proxy
+
+# settings global lưu mỗi key thành một file trong $DB; key có trong $IGNORED thì put không có tác dụng
+FAKE_SETTINGS = r'''
+settings() {
+  case "$1" in
+    get) cat "$DB/$3" 2>/dev/null || echo null ;;
+    put) case " $IGNORED " in *" $3 "*) ;; *) printf '%s' "$4" > "$DB/$3" ;; esac ;;
+    delete) rm -f "$DB/$3" ;;
+  esac
+}
+'''
+
+
+class FakeDevice:
+    serial = "fake-proxy"
+
+
+class ProxyTest(unittest.TestCase):
+    def setUp(self):
+        self.db = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.db)
+        self.ignored = []
+        self.root_calls = 0
+        patcher = mock.patch.object(proxy, "root_shell", self.root_shell)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def root_shell(self, device, command):
+        self.root_calls += 1
+        env = dict(os.environ, DB=self.db, IGNORED=" ".join(self.ignored))
+        return subprocess.run(["sh", "-c", FAKE_SETTINGS + command], capture_output=True, text=True, env=env).stdout
+
+    def stored(self):
+        values = dict.fromkeys(proxy.PROXY_KEYS)
+        for key in os.listdir(self.db):
+            with open(os.path.join(self.db, key)) as f:
+                values[key] = f.read()
+        return values
+
+    def test_apply_in_one_call(self):
+        result = proxy.apply_proxy(FakeDevice(), "10.0.0.2", 8888, "localhost,*.google.com")
+        expected = {"http_proxy": "10.0.0.2:8888", "global_http_proxy_host": "10.0.0.2",
+                    "global_http_proxy_port": "8888", "global_http_proxy_exclusion_list": "localhost,*.google.com"}
+        self.assertEqual(result["settings"], expected)
+        self.assertEqual(result["previous"], dict.fromkeys(proxy.PROXY_KEYS))
+        self.assertEqual(self.stored(), expected)
+        self.assertEqual(self.root_calls, 1)
+        self.assertEqual(proxy.read_proxy(FakeDevice()), expected)
+
+    def test_clear_sets_no_proxy(self):
+        proxy.apply_proxy(FakeDevice(), "10.0.0.2", 8888, "localhost")
+        result = proxy.clear_proxy(FakeDevice())
+        self.assertEqual(self.stored(), dict(dict.fromkeys(proxy.PROXY_KEYS), http_proxy=proxy.NO_PROXY))
+        self.assertEqual(result["previous"]["global_http_proxy_exclusion_list"], "localhost")
+        self.assertEqual(proxy.format_settings(result["settings"]), "no proxy")
+
+    def test_mismatched_read_back_rolls_back(self):
+        proxy.apply_proxy(FakeDevice(), "10.0.0.1", 8080)
+        before = self.stored()
+        self.ignored = ["global_http_proxy_port"]
+        with self.assertRaisesRegex(RuntimeError, "global_http_proxy_port.*previous values restored"):
+            proxy.apply_proxy(FakeDevice(), "10.0.0.9", 9999, "localhost")
+        # cả nhóm quay về giá trị cũ, key trước đó chưa có thì bị xoá lại
+        self.assertEqual(self.stored(), before)
+        self.assertIsNone(self.stored()["global_http_proxy_exclusion_list"])
+
+    def test_values_are_quoted(self):
+        host = f"10.0.0.2; touch {self.db}/pwned"
+        result = proxy.apply_proxy(FakeDevice(), host, "8080 $(id)")
+        self.assertEqual(result["settings"]["http_proxy"], f"{host}:8080 $(id)")
+        self.assertEqual(self.stored()["global_http_proxy_port"], "8080 $(id)")
+        self.assertFalse(os.path.exists(os.path.join(self.db, "pwned")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+ResultCache regressions, stdlib only:
+
+    python -m unittest discover tests
+"""
+import asyncio
+import gc
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.result_cache import ResultCache
+
+
+class FakeDevice:
+    """Each proxy_get reads the setting, then blocks until its gate is opened (a slow `settings get`)."""
+
+    def __init__(self):
+        self.proxy = "old"
+        self.gates = []
+
+    async def proxy_get(self):
+        value = self.proxy
+        gate = asyncio.Event()
+        self.gates.append(gate)
+        await gate.wait()
+        return [value]
+
+    async def proxy_set(self, value):
+        self.proxy = value
+        return [value]
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class ResultCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = ResultCache({"proxy_get": 10}, {"proxy_set": ("proxy_get",)})
+        self.device = FakeDevice()
+
+    def get(self):
+        return asyncio.ensure_future(self.cache.run("proxy_get", {}, "dev", self.device.proxy_get))
+
+    async def test_get_after_set_does_not_join_stale_run(self):
+        first = self.get()
+        await settle()  # lần chạy đầu đã đọc "old" và đang chờ
+        await self.cache.run("proxy_set", {"value": "new"}, "dev", lambda: self.device.proxy_set("new"))
+        second = self.get()
+        await settle()
+        self.assertEqual(len(self.device.gates), 2)
+        for gate in self.device.gates:
+            gate.set()
+        self.assertEqual(await first, ["old"])
+        self.assertEqual(await second, ["new"])
+        # kết quả của lần chạy cũ không được lưu
+        self.assertEqual(await self.cache.run("proxy_get", {}, "dev", self.device.proxy_get), ["new"])
+        self.assertEqual(self.cache.stats["proxy_get"]["coalesced"], 0)
+
+    async def test_stale_run_keeps_newer_run_in_flight(self):
+        first = self.get()
+        await settle()
+        self.cache.invalidate("proxy_set", "dev")
+        second = self.get()
+        await settle()
+        inflight = dict(self.cache._inflight)
+        self.device.gates[0].set()
+        await first
+        self.assertEqual(self.cache._inflight, inflight)
+        self.device.gates[1].set()
+        await second
+        self.assertEqual(self.cache._inflight, {})
+
+    async def test_run_is_cancelled_with_its_last_caller(self):
+        first, second = self.get(), self.get()
+        await settle()
+        self.assertEqual(len(self.device.gates), 1)  # một lần chạy chung
+        first.cancel()
+        await settle()
+        self.assertEqual(len(self.cache._inflight), 1)
+        second.cancel()
+        await settle()
+        self.assertEqual(self.cache._inflight, {})
+        self.assertEqual(self.cache._waiters, {})
+
+    async def test_failed_run_without_waiters_is_retrieved(self):
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("adb gone")
+
+        caller = asyncio.ensure_future(self.cache.run("proxy_get", {}, "dev", fail))
+        await settle()
+        caller.cancel()
+        await asyncio.sleep(0.05)
+        del caller  # traceback của CancelledError giữ frame của run(), tức là cả task
+        gc.collect()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache._inflight, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
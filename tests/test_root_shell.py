@@ -0,0 +1,103 @@
+"""
+Root shell framing and fallback, against a local `sh` standing in for `adb shell su`:
+
+    python -m unittest discover tests
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import root_shell
+
+# `id -u` của session giả luôn là 0; `su -c CMD` của fallback chạy CMD bằng sh
+FAKE_SU = "id() { echo 0; }; su() { shift; sh -c \"$1\"; }\n"
+
+
+class FakeConnection:
+    def __init__(self, device, timeout):
+        self.device = device
+        self.socket, self._remote = socket.socketpair()
+        self.socket.settimeout(timeout)
+
+    def send(self, request):
+        assert request == "shell:su"
+        if self.device.refuse_su:
+            self._remote.close()
+            raise RuntimeError("su: permission denied")
+        self.device.shells.append(subprocess.Popen(["sh"], stdin=self._remote, stdout=self._remote,
+                                                   stderr=subprocess.STDOUT))
+        self._remote.close()
+        self.socket.sendall(FAKE_SU.encode())
+
+    def close(self):
+        self.socket.close()
+
+
+class FakeDevice:
+    def __init__(self, serial):
+        self.serial = serial
+        self.refuse_su = False
+        self.shells = []
+        self.fallbacks = 0
+
+    def create_connection(self, timeout=None):
+        return FakeConnection(self, timeout)
+
+    def shell(self, command):
+        self.fallbacks += 1
+        return subprocess.run(["sh", "-c", FAKE_SU + command], capture_output=True, text=True).stdout
+
+
+class RootShellTest(unittest.TestCase):
+    def setUp(self):
+        self.device = FakeDevice(f"fake-{self.id()}")
+
+    def tearDown(self):
+        root_shell.drop_root_shell(self.device.serial)
+        root_shell._unavailable.pop(self.device.serial, None)
+        for shell in self.device.shells:
+            shell.wait(5)
+
+    def test_framing(self):
+        self.assertEqual(root_shell.root_run(self.device, "echo one; echo two"), ("one\ntwo\n", 0))
+        self.assertEqual(root_shell.root_run(self.device, "printf 'no newline'; false"), ("no newline", 1))
+        # exit/cd trong command không ảnh hưởng session, marker giả trong output không cắt output
+        self.assertEqual(root_shell.root_run(self.device, "cd /; exit 3"), ("", 3))
+        self.assertEqual(root_shell.root_run(self.device, "echo '__FT_x__ 0'; echo err >&2"), ("__FT_x__ 0\nerr\n", 0))
+        self.assertEqual(root_shell.root_run(self.device, "pwd"), (os.getcwd() + "\n", 0))
+        self.assertEqual((len(self.device.shells), self.device.fallbacks), (1, 0))
+
+    def test_command_sent_before_the_session_broke_is_not_run_again(self):
+        with tempfile.TemporaryDirectory() as folder:
+            runs = os.path.join(folder, "runs")
+            with self.assertRaises(RuntimeError):
+                # $$ trong subshell là shell của session: command chạy rồi session chết
+                root_shell.root_run(self.device, f"echo run >> {runs}; kill -9 $$")
+            with open(runs) as f:
+                self.assertEqual(f.read(), "run\n")
+        self.assertEqual(self.device.fallbacks, 0)
+        self.assertNotIn(self.device.serial, root_shell._sessions)
+
+    def test_command_not_sent_falls_back_to_su_c(self):
+        session = root_shell.get_root_shell(self.device)
+        session._conn.socket.close()
+        self.assertEqual(root_shell.root_run(self.device, "echo ok"), ("ok\n", 0))
+        self.assertEqual(self.device.fallbacks, 1)
+
+    def test_unavailable_su_is_retried_later(self):
+        self.device.refuse_su = True
+        self.assertIsNone(root_shell.get_root_shell(self.device))
+        self.device.refuse_su = False
+        self.assertIsNone(root_shell.get_root_shell(self.device))
+        root_shell._unavailable[self.device.serial] -= root_shell.UNAVAILABLE_RETRY
+        self.assertIsNotNone(root_shell.get_root_shell(self.device))
+        self.assertNotIn(self.device.serial, root_shell._unavailable)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
+import os
+import struct
 import subprocess
 import sys
+import time
 from utils.color_utils import ANSI
 from utils.decorator import splitstmtadb
+from utils.device_info import get_device_info
+from utils.output import emit, propagate
 @splitstmtadb
 def run_adb_command(command):
     try:
@@ -28,51 +33,204 @@ def run_adb_command_retn(command):
         sys.exit(1)
         return None
 
+ADB_HOST = "127.0.0.1"
+# Cùng biến môi trường với adb (vd: trỏ sang benchmarks/fake_adb.py)
+ADB_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+# Số device được hỏi song song và timeout (giây) cho mỗi lần gọi shell tới một device
+ENUM_WORKERS = 16
+DEVICE_TIMEOUT = 5
+
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from ppadb.client import Client as AdbClient
+        _client = AdbClient(host=ADB_HOST, port=ADB_PORT)
+    return _client
+
+def device_states(client):
+    """Return [(serial, state)] from host:devices, including unauthorized/offline devices that ppadb hides the state of."""
+    with client.create_connection(timeout=DEVICE_TIMEOUT) as conn:
+        conn.send("host:devices")
+        result = conn.receive()
+    return [tuple(line.split()[:2]) for line in result.splitlines() if len(line.split()) >= 2]
+
+def format_device(index, info):
+    return f"{ANSI.RED}[{index}]{ANSI.RESET}. {info.serial} - {ANSI.GREEN}{info.brand} {info.model}{ANSI.RESET} - {ANSI.YELLOW}{info.sdk}{ANSI.RESET} - {ANSI.BLUE}{info.release}{ANSI.RESET}"
+
+def enumerate_devices(client=None, timeout=DEVICE_TIMEOUT, max_workers=ENUM_WORKERS, refresh=False):
+    """
+    Query every attached device concurrently.
+    Return [(device, info, error)] in adb order: info is a DeviceInfo, or None with error set
+    when the device is unauthorized/offline, timed out or failed.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+    from ppadb.device import Device
+    client = client or get_client()
+    states = device_states(client)
+    devices = [Device(client, serial) for serial, _ in states]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        serial: executor.submit(propagate(get_device_info), device, refresh=refresh, timeout=timeout)
+        for device, (serial, state) in zip(devices, states) if state == "device"
+    }
+    # Mỗi device tối đa 2 lần gọi shell (boot id + getprop), mỗi lần bị chặn bởi socket timeout
+    wait(futures.values(), timeout=timeout * 2 + 1)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    entries = []
+    for device, (serial, state) in zip(devices, states):
+        future = futures.get(serial)
+        if future is None:
+            entries.append((device, None, state))
+        elif not future.done():
+            entries.append((device, None, "timeout"))
+        elif future.exception() is not None:
+            entries.append((device, None, str(future.exception()).strip() or type(future.exception()).__name__))
+        else:
+            entries.append((device, future.result(), None))
+    return entries
+
+def connected_devices():
+    """Return [(device, DeviceInfo)] for every usable device, properties served from the device-info cache."""
+    return [(device, info) for device, info, error in enumerate_devices() if error is None]
+
+def _print_skipped(entries):
+    for device, _, error in entries:
+        if error is not None:
+            print(f"{ANSI.YELLOW}[!] {device.serial} - skipped ({error}){ANSI.RESET}")
+            emit("error", serial=device.serial, error=error, skipped=True)
+
 def list_devices():
-    from ppadb.client import Client as AdbClient
-    client = AdbClient(host="127.0.0.1", port=5037)
-    devices = client.devices()
-    for i, d in enumerate(devices):
-            model = d.shell("getprop ro.product.model").strip()
-            brand = d.shell("getprop ro.product.brand").strip()
-            sdk = d.shell("getprop ro.build.version.sdk").strip()
-            release = d.shell("getprop ro.build.version.release").strip()
-            print(f"{ANSI.RED}[{i}]{ANSI.RESET}. {d.serial} - {ANSI.GREEN}{brand} {model}{ANSI.RESET} - {ANSI.YELLOW}{sdk}{ANSI.RESET} - {ANSI.BLUE}{release}{ANSI.RESET}")
+    entries = enumerate_devices()
+    usable = [info for _, info, error in entries if error is None]
+    for i, info in enumerate(usable):
+        print(format_device(i, info))
+        emit("device", index=i, **info._asdict())
+    _print_skipped(entries)
 
 def select_device():
-        from ppadb.client import Client as AdbClient
         ## Connect to device
-        client = AdbClient(host="127.0.0.1", port=5037)
-        devices = client.devices()
+        all_entries = enumerate_devices()
+        entries = [(device, info) for device, info, error in all_entries if error is None]
 
-        if not devices:
+        if not entries:
+            _print_skipped(all_entries)
             raise RuntimeError("No devices connected")
 
         # In danh sách device
         print("Connected devices:")
         print("--------------------------------\n")
-        for i, d in enumerate(devices):
-            model = d.shell("getprop ro.product.model").strip()
-            brand = d.shell("getprop ro.product.brand").strip()
-            sdk = d.shell("getprop ro.build.version.sdk").strip()
-            release = d.shell("getprop ro.build.version.release").strip()
-            print(f"{ANSI.RED}[{i}]{ANSI.RESET}. {d.serial} - {ANSI.GREEN}{brand} {model}{ANSI.RESET} - {ANSI.YELLOW}{sdk}{ANSI.RESET} - {ANSI.BLUE}{release}{ANSI.RESET}")
-        print(f"{ANSI.RED}[{len(devices)}]{ANSI.RESET}. Exit\n")
+        for i, (_, info) in enumerate(entries):
+            print(format_device(i, info))
+        _print_skipped(all_entries)
+        print(f"{ANSI.RED}[{len(entries)}]{ANSI.RESET}. Exit\n")
         # Cho user chọn
         while True:
             try:
                 choice = int(input("Chọn thiết bị (số): "))
-                if 0 <= choice <= len(devices):
-                    if choice == len(devices):
+                if 0 <= choice <= len(entries):
+                    if choice == len(entries):
                         print(f"{ANSI.GREEN}[+] Exit{ANSI.RESET}")
                         exit()
                     print("\n")
-                    return devices[choice]
+                    emit("device", **entries[choice][1]._asdict())
+                    return entries[choice][0]
                 else:
                     print("Số không hợp lệ, thử lại.")
             except ValueError:
                 print("Nhập số thôi bạn ơi.")
+
+def get_device(serial=None):
+    """Non-interactive device lookup for API callers: the given serial, or the only attached device."""
+    from ppadb.device import Device
+    client = get_client()
+    states = device_states(client)
+    if serial:
+        state = dict(states).get(serial)
+        if state != "device":
+            raise RuntimeError(f"Device {serial} is {state or 'not connected'}")
+        return Device(client, serial)
+    ready = [s for s, state in states if state == "device"]
+    if not ready:
+        raise RuntimeError("No devices connected")
+    if len(ready) > 1:
+        raise RuntimeError(f"Multiple devices connected ({', '.join(ready)}), pass a serial")
+    return Device(client, ready[0])
                 
 def push_file_to_device(device, local_path, remote_path):
     device.push(local_path, remote_path)
-    print(f"{ANSI.GREEN}[+] Pushed file to {remote_path} on {device.serial}{ANSI.RESET}")
\ No newline at end of file
+    print(f"{ANSI.GREEN}[+] Pushed file to {remote_path} on {device.serial}{ANSI.RESET}")
+
+def _read_exact(conn, size):
+    data = b""
+    while len(data) < size:
+        chunk = conn.read(size - len(data))
+        if not chunk:
+            raise ConnectionError("device closed the sync connection")
+        data += chunk
+    return data
+
+def _sync_send(conn, remote_path, source, mode=0o644):
+    """
+    One SEND/DATA/DONE exchange on an open sync connection. source is a local path (its mtime is kept)
+    or an in-memory buffer (mtime = now). Return the number of bytes sent.
+    """
+    from ppadb.sync import Sync
+    from ppadb.sync.stats import S_IFREG
+    # Tự đóng gói thay vì Sync.push: ppadb gửi bằng socket.send (có thể gửi thiếu) và chỉ nhận file trên đĩa
+    send = conn.socket.sendall
+    target = f"{remote_path},{mode | S_IFREG}".encode()
+    send(b"SEND" + struct.pack("<I", len(target)) + target)
+    size = 0
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = memoryview(source)
+        for i in range(0, len(data), Sync.DATA_MAX_LENGTH):
+            chunk = data[i:i + Sync.DATA_MAX_LENGTH]
+            send(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+        size, mtime = len(data), time.time()
+    else:
+        with open(source, "rb") as stream:
+            for chunk in iter(lambda: stream.read(Sync.DATA_MAX_LENGTH), b""):
+                send(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                size += len(chunk)
+        mtime = os.stat(source).st_mtime
+    send(b"DONE" + struct.pack("<I", int(mtime)))
+    # Status = "OKAY"/"FAIL" + độ dài 4 byte; đọc đủ 8 byte để connection dùng tiếp được cho file sau
+    status = _read_exact(conn, 8)
+    if status[:4] != b"OKAY":
+        message = _read_exact(conn, struct.unpack("<I", status[4:])[0]).decode(errors="replace")
+        raise RuntimeError(f"Push to {remote_path} failed: {message}")
+    return size
+
+def _sync_connection(device):
+    import socket
+    conn = device.sync()
+    # SEND/DATA/DONE là nhiều gói nhỏ: Nagle + delayed ACK làm mỗi file chậm thêm ~40ms
+    conn.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+def push_files(device, files, mode=0o644, progress=None):
+    """
+    Push [(source, remote_path)] over ONE sync connection (device.push opens a new one per file);
+    source is a local path or bytes. progress(source, remote_path, size) is called after each file.
+    Return the bytes pushed.
+    """
+    from utils import trace
+    total = 0
+    with _sync_connection(device) as conn:
+        for source, remote_path in files:
+            with trace.span("adb.push", serial=device.serial, command=remote_path) as record:
+                size = _sync_send(conn, remote_path, source, mode)
+                if record is not None:
+                    record["bytes"] = size
+            total += size
+            if progress is not None:
+                progress(source, remote_path, size)
+    return total
+
+def push_bytes(device, data, remote_path, mode=0o644):
+    """Push an in-memory buffer to remote_path, without a temp file on the host."""
+    return push_files(device, [(data, remote_path)], mode)
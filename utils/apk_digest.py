@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import mmap
+import os
+import struct
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache_utils import cache_path, load_json, save_json, safe_name
+
+CHUNK_SIZE = 1024 * 1024
+# Giới hạn output mỗi lần inflate: entry toàn số 0 có thể nở ra gấp ~1000 lần
+INFLATE_LIMIT = 4 * CHUNK_SIZE
+# hashlib/zlib nhả GIL nên hash các entry bị miss song song bằng thread
+DIGEST_WORKERS = 4
+
+
+class MappedApk:
+    """Read-only mmap of an APK: entry data is sliced out of the map instead of read() through zipfile."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.zip = zipfile.ZipFile(self.file)
+        except BaseException:
+            self.file.close()
+            raise
+        self.view = memoryview(self.map)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.view.release()
+        self.zip.close()
+        self.map.close()
+        self.file.close()
+
+    def infolist(self):
+        return self.zip.infolist()
+
+    def data(self, info):
+        """memoryview of the entry's compressed bytes (no copy)."""
+        offset = info.header_offset
+        if self.map[offset:offset + 4] != b"PK\x03\x04":
+            raise ValueError(f"Bad local header for {info.filename}")
+        name_len, extra_len = struct.unpack("<HH", self.map[offset + 26:offset + 30])
+        start = offset + 30 + name_len + extra_len
+        if start + info.compress_size > len(self.map):
+            raise ValueError(f"Truncated entry {info.filename}")
+        return self.view[start:start + info.compress_size]
+
+    def digest(self, info, algorithm):
+        """Digest of the uncompressed content: STORED entries hash straight from the map, DEFLATED ones inflate in chunks."""
+        digest = hashlib.new(algorithm)
+        data = self.data(info)
+        if info.compress_type == zipfile.ZIP_STORED:
+            digest.update(data)
+        elif info.compress_type == zipfile.ZIP_DEFLATED:
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            for i in range(0, len(data), CHUNK_SIZE):
+                chunk = data[i:i + CHUNK_SIZE]
+                while chunk:
+                    digest.update(inflater.decompress(chunk, INFLATE_LIMIT))
+                    chunk = inflater.unconsumed_tail
+            digest.update(inflater.flush())
+        else:
+            # method hiếm (bzip2/lzma): để zipfile lo
+            with self.zip.open(info) as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        return digest.digest()
+
+
+def entry_key(info):
+    """
+    Cache key of one entry. The local header offset is deliberately left out:
+    repacking after a patch shifts every following entry, which would make the whole cache miss.
+    """
+    return f"{info.filename}|{info.CRC:08x}|{info.compress_type}|{info.compress_size}|{info.file_size}"
+
+
+def _cache_file(apk_path, algorithm):
+    # tên file + hash của đường dẫn tuyệt đối: các app-release.apk của những project khác nhau không dùng chung cache
+    path_hash = hashlib.sha1(os.path.abspath(apk_path).encode()).hexdigest()[:12]
+    return cache_path("apk-digests", f"{safe_name(os.path.basename(apk_path))}-{path_hash}.{algorithm}.json")
+
+
+def digest_entries(apk, infos, algorithm, use_cache=True):
+    """
+    Return ([raw digest per info], {"hits", "misses", "hashed_bytes"}) for a MappedApk.
+    Digests are cached per APK path, so re-signing a repacked APK only rehashes the changed entries.
+    """
+    path = _cache_file(apk.path, algorithm)
+    cached = (load_json(path, {}) if use_cache else {})
+    keys = [entry_key(info) for info in infos]
+    results = [cached.get(key) for key in keys]
+    missing = [i for i, value in enumerate(results) if value is None]
+
+    with ThreadPoolExecutor(max_workers=DIGEST_WORKERS) as pool:
+        digests = list(pool.map(lambda i: apk.digest(infos[i], algorithm), missing))
+    for i, digest in zip(missing, digests):
+        results[i] = base64.b64encode(digest).decode()
+
+    if use_cache and missing:
+        # chỉ giữ entry của lần ký này để file cache không phình mãi
+        save_json(path, dict(zip(keys, results)))
+    stats = {
+        "hits": len(infos) - len(missing),
+        "misses": len(missing),
+        "hashed_bytes": sum(infos[i].file_size for i in missing),
+    }
+    return [base64.b64decode(value) for value in results], stats
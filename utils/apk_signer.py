@@ -0,0 +1,172 @@
+import base64
+import copy
+import hashlib
+import os
+import re
+import warnings
+from functools import lru_cache
+
+# zipfile/mmap/process pool import lazy: `signapk -h` không cần chúng
+
+# JAR (v1) signing trong process: không cần JVM / jarsigner
+DIGESTS = {"sha256": "SHA-256", "sha384": "SHA-384", "sha512": "SHA-512"}
+DEFAULT_DIGEST = "sha256"
+CREATED_BY = "1.0 (frida-tool)"
+LINE_LIMIT = 72
+# File chữ ký cũ trong META-INF sẽ bị bỏ khi ký lại
+SIGNATURE_FILE = re.compile(r"^META-INF/([^/]+\.(SF|RSA|DSA|EC)|SIG-[^/]*|MANIFEST\.MF)$", re.IGNORECASE)
+_DATA_DESCRIPTOR = 0x08
+
+
+@lru_cache(maxsize=8)
+def _load_pkcs12(path, mtime_ns, password):
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    with open(path, "rb") as f:
+        data = f.read()
+    with warnings.catch_warnings():
+        # cert tự tạo bằng keytool hay có C=Unknown -> cryptography cảnh báo, bỏ qua
+        warnings.simplefilter("ignore")
+        try:
+            key, cert, _ = pkcs12.load_key_and_certificates(data, password.encode() if password else None)
+        except ValueError as e:
+            raise ValueError(f"Cannot open keystore {path} as PKCS#12 ({e}); JKS keystores need --jarsigner")
+    if key is None or cert is None:
+        raise ValueError(f"Keystore {path} has no private key entry")
+    return key, cert
+
+
+def load_signer(keystore=None, keypass=None, key_file=None, cert_file=None):
+    """Return (private key, certificate) from a PKCS#12 keystore or a PEM key + PEM/DER certificate."""
+    if key_file or cert_file:
+        if not (key_file and cert_file):
+            raise ValueError("A PEM key needs both --key and --cert")
+        from cryptography import x509
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+        with open(key_file, "rb") as f:
+            key = load_pem_private_key(f.read(), keypass.encode() if keypass else None)
+        with open(cert_file, "rb") as f:
+            data = f.read()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            cert = x509.load_pem_x509_certificate(data) if b"-----BEGIN" in data else x509.load_der_x509_certificate(data)
+        return key, cert
+    if not keystore or not os.path.exists(keystore):
+        raise ValueError(f"Keystore file not found: {keystore}")
+    return _load_pkcs12(os.path.abspath(keystore), os.stat(keystore).st_mtime_ns, keypass)
+
+
+def _line(text):
+    """Manifest line, wrapped at 72 bytes with continuation lines starting with a space."""
+    data = text.encode("utf-8")
+    out = [data[:LINE_LIMIT]]
+    for i in range(LINE_LIMIT, len(data), LINE_LIMIT - 1):
+        out.append(b" " + data[i:i + LINE_LIMIT - 1])
+    return b"\r\n".join(out) + b"\r\n"
+
+
+def _b64(digest):
+    return base64.b64encode(digest).decode()
+
+
+def signed_entries(zf):
+    """Entries covered by the manifest: every file except directories and old signature files."""
+    return [info for info in zf.infolist() if not info.is_dir() and not SIGNATURE_FILE.match(info.filename)]
+
+
+def build_signature_files(digests, algorithm=DEFAULT_DIGEST):
+    """From [(name, raw digest)] build (MANIFEST.MF, .SF) bytes."""
+    name = DIGESTS[algorithm]
+    manifest = [_line("Manifest-Version: 1.0"), _line(f"Created-By: {CREATED_BY}"), b"\r\n"]
+    sections = []
+    for entry, digest in digests:
+        section = _line(f"Name: {entry}") + _line(f"{name}-Digest: {_b64(digest)}") + b"\r\n"
+        manifest.append(section)
+        sections.append((entry, section))
+    manifest = b"".join(manifest)
+
+    sf = [_line("Signature-Version: 1.0"), _line(f"Created-By: {CREATED_BY}"),
+          _line(f"{name}-Digest-Manifest: {_b64(hashlib.new(algorithm, manifest).digest())}"), b"\r\n"]
+    for entry, section in sections:
+        sf.append(_line(f"Name: {entry}") + _line(f"{name}-Digest: {_b64(hashlib.new(algorithm, section).digest())}") + b"\r\n")
+    return manifest, b"".join(sf)
+
+
+def signature_block(sf, key, cert, algorithm=DEFAULT_DIGEST):
+    """Detached PKCS#7 SignedData over the .SF file, without signed attributes (what jarsigner writes)."""
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.serialization import Encoding, pkcs7
+    hash_algorithm = {"sha256": hashes.SHA256, "sha384": hashes.SHA384, "sha512": hashes.SHA512}[algorithm]()
+    return (pkcs7.PKCS7SignatureBuilder().set_data(sf).add_signer(cert, key, hash_algorithm)
+            .sign(Encoding.DER, [pkcs7.PKCS7Options.DetachedSignature, pkcs7.PKCS7Options.NoAttributes]))
+
+
+def block_name(alias, key):
+    """META-INF base name like jarsigner: alias upper-cased, max 8 chars, and .RSA/.EC/.DSA by key type."""
+    from cryptography.hazmat.primitives.asymmetric import dsa, ec
+    base = re.sub(r"[^A-Z0-9_-]", "_", (alias or "CERT").upper()[:8])
+    ext = "EC" if isinstance(key, ec.EllipticCurvePrivateKey) else "DSA" if isinstance(key, dsa.DSAPrivateKey) else "RSA"
+    return f"META-INF/{base}.SF", f"META-INF/{base}.{ext}"
+
+
+def copy_entry_raw(zout, info, data):
+    """Write an entry's compressed bytes as-is (no recompression, STORED entries stay STORED)."""
+    out = copy.copy(info)
+    # sizes/CRC đã biết -> ghi thẳng vào local header, không cần data descriptor
+    out.flag_bits &= ~_DATA_DESCRIPTOR
+    out.header_offset = zout.fp.tell()
+    zout.fp.write(out.FileHeader())
+    zout.fp.write(data)
+    zout.filelist.append(out)
+    zout.NameToInfo[out.filename] = out
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
+
+
+def sign(apk, output=None, keystore=None, keypass=None, alias=None, algorithm=DEFAULT_DIGEST,
+         key_file=None, cert_file=None, use_cache=True):
+    """
+    v1-sign apk (in place unless output is given). Entries are copied without recompression;
+    MANIFEST.MF, <ALIAS>.SF and the signature block are written first, like jarsigner.
+    Entry digests come from the apk_digest cache, so only changed entries are rehashed.
+    """
+    if algorithm not in DIGESTS:
+        raise ValueError(f"Unsupported digest {algorithm} (choose from {', '.join(DIGESTS)})")
+    import zipfile
+    from utils.apk_digest import MappedApk, digest_entries
+    key, cert = load_signer(keystore, keypass, key_file, cert_file)
+    output = output or apk
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with MappedApk(apk) as src:
+        entries = signed_entries(src.zip)
+        digests, stats = digest_entries(src, entries, algorithm, use_cache)
+        manifest, sf = build_signature_files([(info.filename, digest) for info, digest in zip(entries, digests)], algorithm)
+        sf_name, block = block_name(alias, key)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zout:
+                zout.writestr("META-INF/MANIFEST.MF", manifest)
+                zout.writestr(sf_name, sf)
+                zout.writestr(block, signature_block(sf, key, cert, algorithm))
+                for info in src.infolist():
+                    if not SIGNATURE_FILE.match(info.filename):
+                        copy_entry_raw(zout, info, src.data(info))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, output)
+    return {"apk": apk, "signed_apk": output, "signed": True, "entries": len(entries), "digest": DIGESTS[algorithm],
+            "signature": block, "digest_cache": stats}
+
+
+def _sign_one(apk, kwargs):
+    try:
+        return sign(apk, **kwargs)
+    except Exception as e:
+        return {"apk": apk, "signed": False, "error": str(e)}
+
+
+def sign_many(apks, max_workers=None, **kwargs):
+    """Sign several APKs across a process pool (the key is loaded once per worker). Yield one result per APK, in order."""
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(_sign_one, apks, [kwargs] * len(apks))
@@ -0,0 +1,47 @@
+import json
+import os
+import re
+import threading
+
+# Thư mục cache dùng chung cho mọi lệnh (có thể đổi bằng biến môi trường FRIDA_TOOL_HOME)
+CACHE_ROOT = os.environ.get("FRIDA_TOOL_HOME", os.path.join(os.path.expanduser("~"), ".frida-tool"))
+
+
+def daemon_socket_path():
+    """Unix socket of `frida-tool daemon` (FRIDA_TOOL_SOCKET overrides it)."""
+    return os.environ.get("FRIDA_TOOL_SOCKET") or os.path.join(CACHE_ROOT, "daemon.sock")
+
+
+def safe_name(name):
+    """Turn a device serial (e.g. 192.168.1.5:5555) into a file-system safe name."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
+
+
+def cache_path(*parts):
+    """Return a path under the cache root, creating the parent folder if needed."""
+    path = os.path.join(CACHE_ROOT, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """Write JSON atomically so a crashed run never leaves a half-written cache file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
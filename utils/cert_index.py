@@ -0,0 +1,86 @@
+import time
+
+from utils.cache_utils import cache_path, load_json, save_json, remove_file, safe_name
+from utils.root_shell import root_run
+
+# Các CA store trên device (store nào không tồn tại thì bỏ qua)
+CERT_STORES = {
+    "system": "/system/etc/security/cacerts",
+    "apex": "/apex/com.android.conscrypt/cacerts",
+    "user": "/data/misc/user/0/cacerts-added",
+    "keychain": "/data/misc/keychain/cacerts-added",
+}
+UNCHANGED = "__FT_INDEX_UNCHANGED__"
+
+
+def _index_path(serial):
+    return cache_path("cert-index", f"{safe_name(serial)}.json")
+
+
+def _index_script(known_token):
+    """
+    One root script: compute a change token (name, size, mtime of every file in every store) and,
+    only when it differs from known_token, md5sum every file of every store.
+    """
+    dirs = " ".join(CERT_STORES.values())
+    listing = f"for d in {dirs}; do [ -d $d ] && stat -c '%n %s %Y' $d/* 2>/dev/null; done"
+    return (
+        f"token=$({listing} | md5sum | cut -d' ' -f1); "
+        f"if [ \"$token\" = \"{known_token}\" ]; then echo {UNCHANGED}; "
+        f"else echo $token; for d in {dirs}; do [ -d $d ] && md5sum $d/* 2>/dev/null; done; fi"
+    )
+
+
+def _parse_md5sum(lines):
+    stores = {path: name for name, path in CERT_STORES.items()}
+    entries = []
+    for line in lines:
+        parts = line.split(None, 1)
+        if len(parts) != 2 or len(parts[0]) != 32:
+            continue
+        md5, path = parts[0], parts[1].strip()
+        directory, _, filename = path.rpartition("/")
+        if directory not in stores:
+            continue
+        entries.append({"store": stores[directory], "file": filename, "hash": filename.split(".")[0], "md5": md5})
+    return entries
+
+
+def get_cert_index(device, refresh=False):
+    """
+    Return {"token", "built_at", "entries": [{"store", "file", "hash", "md5"}]} for every CA file on device,
+    in a single shell round trip. The cached index is reused when the on-device change token still matches.
+    """
+    path = _index_path(device.serial)
+    cached = None if refresh else load_json(path)
+    output, _ = root_run(device, _index_script(cached["token"] if cached else ""))
+    lines = output.replace("\r", "").split("\n")
+    if cached and lines and lines[0].strip() == UNCHANGED:
+        return cached
+    index = {"token": lines[0].strip() if lines else "", "built_at": time.time(), "entries": _parse_md5sum(lines[1:])}
+    save_json(path, index)
+    return index
+
+
+def invalidate_cert_index(serial):
+    remove_file(_index_path(serial))
+
+
+def find_by_hash(index, subject_hash):
+    """Entries whose file name is <subject_hash>.N"""
+    return [entry for entry in index["entries"] if entry["hash"] == subject_hash]
+
+
+def find_by_md5(index, md5):
+    return [entry for entry in index["entries"] if entry["md5"] == md5]
+
+
+def locate_certificate(index, cert):
+    """
+    For a CertRecord: return [{"store", "file", "match"}] for every <subject_hash>.N on the device,
+    match meaning the file content is identical to cert's PEM.
+    """
+    return [
+        {"store": entry["store"], "file": entry["file"], "match": entry["md5"] == cert.md5_pem}
+        for entry in find_by_hash(index, cert.subject_hash)
+    ]
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import ssl
+import struct
+import time
+from collections import namedtuple
+
+from utils.cache_utils import cache_path, load_json, save_json
+
+# Trong khoảng TTL dùng cert đã lưu mà không hỏi lại Burp
+CERT_TTL = 3600
+
+# fingerprint = SHA-256 của DER; md5_pem = MD5 của PEM (giá trị so với md5sum trên device)
+CertRecord = namedtuple("CertRecord", ["fingerprint", "subject_hash", "md5_pem", "sha1", "der", "pem"])
+
+
+# ------------------------------------------------------------------
+# Hàm tính subject_hash_old (tương đương câu lệnh OpenSSL cũ)
+# ------------------------------------------------------------------
+def subject_hash_old(cert_pem_bytes: bytes) -> str:
+    """
+    Tính subject_name_hash theo phiên bản OpenSSL 1.x (MD5, little-endian)
+    """
+    from OpenSSL import crypto
+    cert = crypto.load_certificate(crypto.FILETYPE_PEM, cert_pem_bytes)
+
+    # Lấy subject DN DER
+    subject_der = cert.get_subject().der()
+
+    # Tính MD5
+    digest = hashlib.md5(subject_der).digest()
+
+    # Lấy 4 byte đầu, chuyển sang little-endian
+    hash32, = struct.unpack("<I", digest[:4])
+    return f"{hash32:08x}"
+
+
+def _object_path(fingerprint, ext):
+    return cache_path("certs", "objects", f"{fingerprint}.{ext}")
+
+
+def _sources_path():
+    return cache_path("certs", "sources.json")
+
+
+def _load_record(fingerprint):
+    meta = load_json(_object_path(fingerprint, "json"))
+    if not meta:
+        return None
+    try:
+        with open(_object_path(fingerprint, "der"), "rb") as f:
+            der = f.read()
+        with open(_object_path(fingerprint, "pem"), "rb") as f:
+            pem = f.read()
+    except OSError:
+        return None
+    return CertRecord(fingerprint, meta["subject_hash"], meta["md5_pem"], meta["sha1"], der, pem)
+
+
+def store_certificate(data):
+    """Parse a DER or PEM certificate, store it by SHA-256 fingerprint and return its CertRecord."""
+    der = ssl.PEM_cert_to_DER_cert(data.decode("ascii")) if b"-----BEGIN CERTIFICATE-----" in data else bytes(data)
+    fingerprint = hashlib.sha256(der).hexdigest()
+    record = _load_record(fingerprint)
+    if record is not None:
+        return record
+
+    from OpenSSL import crypto
+    cert = crypto.load_certificate(crypto.FILETYPE_ASN1, der)
+    pem = crypto.dump_certificate(crypto.FILETYPE_PEM, cert)
+    record = CertRecord(fingerprint, subject_hash_old(pem), hashlib.md5(pem).hexdigest(),
+                        hashlib.sha1(der).hexdigest(), der, pem)
+    for ext, content in (("der", der), ("pem", pem)):
+        with open(_object_path(fingerprint, ext), "wb") as f:
+            f.write(content)
+    save_json(_object_path(fingerprint, "json"), {
+        "subject_hash": record.subject_hash, "md5_pem": record.md5_pem, "sha1": record.sha1, "stored_at": time.time(),
+    })
+    return record
+
+
+def _fetch_http(url, source, max_age):
+    import requests
+    cached = _load_record(source["fingerprint"]) if source.get("fingerprint") else None
+    if cached is not None and time.time() - source.get("checked_at", 0) < max_age:
+        return cached, source
+
+    headers = {}
+    if cached is not None and source.get("etag"):
+        headers["If-None-Match"] = source["etag"]
+    if cached is not None and source.get("last_modified"):
+        headers["If-Modified-Since"] = source["last_modified"]
+    try:
+        response = requests.get(url, headers=headers, timeout=10)
+    except requests.RequestException:
+        if cached is not None:
+            return cached, source  # Burp không chạy: dùng bản đã lưu
+        raise
+    if response.status_code == 304 and cached is not None:
+        return cached, dict(source, checked_at=time.time())
+    response.raise_for_status()
+    record = store_certificate(response.content)
+    return record, {
+        "fingerprint": record.fingerprint,
+        "checked_at": time.time(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def _read_file(path, source):
+    stat = os.stat(path)
+    if source.get("fingerprint") and source.get("mtime_ns") == stat.st_mtime_ns and source.get("size") == stat.st_size:
+        cached = _load_record(source["fingerprint"])
+        if cached is not None:
+            return cached, source
+    with open(path, "rb") as f:
+        record = store_certificate(f.read())
+    return record, {"fingerprint": record.fingerprint, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def get_certificate(host=None, port=None, path=None, max_age=CERT_TTL):
+    """
+    Return the CertRecord of Burp's CA (http://host:port/cert) or of a local DER/PEM file.
+    Burp is asked again only after max_age seconds (with If-None-Match/If-Modified-Since when it
+    sent validators); local files are re-read only when their size or mtime changed.
+    """
+    if host and port:
+        key = f"http://{host}:{port}/cert"
+    elif path:
+        key = f"file:{os.path.abspath(path)}"
+    else:
+        raise ValueError("Provide host and port, or a certificate path")
+
+    sources = load_json(_sources_path(), {})
+    source = sources.get(key, {})
+    if key.startswith("http://"):
+        record, new_source = _fetch_http(key, source, max_age)
+    else:
+        record, new_source = _read_file(path, source)
+    if new_source != source:
+        sources = load_json(_sources_path(), {})
+        sources[key] = new_source
+        save_json(_sources_path(), sources)
+    return record
@@ -0,0 +1,408 @@
+import builtins
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+from utils import cache_utils, output
+
+# `frida-tool daemon start` giữ ADB client, root shell và cache device luôn "nóng"; cli_tool / mcp_server gửi
+# request qua Unix socket nếu daemon đang chạy. FRIDA_TOOL_NO_DAEMON=1 để luôn chạy trong process hiện tại
+CONNECT_TIMEOUT = 0.5
+START_TIMEOUT = 10
+# Biến môi trường chọn ADB server / cache / root session: request gửi kèm, daemon chỉ nhận khi chúng giống của nó
+# (khác thì client tự chạy lệnh cục bộ)
+MATCHED_ENV = ("FRIDA_TOOL_HOME", "ANDROID_ADB_SERVER_PORT", "FRIDA_TOOL_NO_ROOT_SESSION")
+
+# client của request đang chạy trong thread này (fleet pool nhận được qua output.propagate)
+_client = contextvars.ContextVar("daemon_client", default=None)
+
+
+def available():
+    """Unix sockets are missing on some platforms (e.g. Windows builds of Python): the daemon is then unavailable."""
+    import socket
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path():
+    return cache_utils.daemon_socket_path()
+
+
+def _send(sock, message):
+    sock.sendall((output.to_json(message) + "\n").encode("utf-8"))
+
+
+def _connect():
+    """Connected socket to a running daemon, or None (not started, stale socket, disabled, unsupported)."""
+    # không có socket file thì thôi, khỏi import socket: đường chạy cục bộ không chậm thêm
+    path = socket_path()
+    if os.environ.get("FRIDA_TOOL_NO_DAEMON") == "1" or not os.path.exists(path) or not available():
+        return None
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def _environment():
+    return {name: os.environ.get(name) for name in MATCHED_ENV}
+
+
+def _exchange(request, on_message=None):
+    """Send request to the daemon and return its final reply; None when no daemon is running or it declined."""
+    sock = _connect()
+    if sock is None:
+        return None
+    with sock, sock.makefile("r", encoding="utf-8") as reader:
+        _send(sock, dict(request, env=_environment()))
+        for line in reader:
+            message = json.loads(line)
+            if "done" in message:
+                return None if message.get("declined") else message
+            reply = on_message(message) if on_message else None
+            if reply is not None:
+                _send(sock, reply)
+    raise RuntimeError("frida-tool daemon closed the connection")
+
+
+def forward(argv):
+    """Run a CLI invocation in the daemon, relaying its output, events and input() prompts.
+    Return the exit code, or None when no daemon is running (the caller then runs it locally)."""
+    def relay(message):
+        if "out" in message:
+            sys.stdout.write(message["out"])
+            sys.stdout.flush()
+        elif "err" in message:
+            sys.stderr.write(message["err"])
+            sys.stderr.flush()
+        elif "event" in message:
+            output.publish(message["event"])
+        elif "input" in message:
+            try:
+                return {"line": input(message["input"])}
+            except EOFError:
+                return {"line": None}
+
+    try:
+        reply = _exchange({"op": "cli", "argv": argv, "prog": sys.argv[0], "cwd": os.getcwd(),
+                           "ndjson": output.is_ndjson()}, relay)
+    except KeyboardInterrupt:
+        return 130
+    return None if reply is None else reply["done"]
+
+
+def call(name, serial=None, **kwargs):
+    """Run API function `name` (see API) in the daemon, or in this process when no daemon is running.
+    Events emitted by the function are re-published in the caller's context either way."""
+    def relay(message):
+        if "event" in message:
+            output.publish(message["event"])
+
+    reply = _exchange({"op": "call", "name": name, "serial": serial, "kwargs": kwargs}, relay)
+    if reply is None:
+        return API[name](serial, **kwargs)
+    if "error" in reply:
+        raise RuntimeError(reply["error"])
+    return reply["result"]
+
+
+def request(op):
+    """Send a control request ("status", "stop"); None when no daemon is running (or it is shutting down)."""
+    try:
+        return _exchange({"op": op})
+    except (OSError, RuntimeError):
+        return None
+
+
+# API cho mcp_server: tên -> function(serial, **kwargs) trả về dữ liệu JSON được, không prompt
+def _api_devices(serial=None):
+    from utils.adb_utils import connected_devices
+    return [info._asdict() for _, info in connected_devices()]
+
+
+def _api_packages(serial=None):
+    from commands import packages
+    from utils.adb_utils import get_device
+    return packages.collect_inventory(get_device(serial))
+
+
+def _api_install_cert(serial=None, **kwargs):
+    from commands import install_cert
+    from utils.adb_utils import get_device
+    return install_cert.install(get_device(serial), **kwargs)
+
+
+def _api_klfrida(serial=None, action=None, version=None, compress="auto"):
+    from commands import klfrida
+    from utils.adb_utils import get_device
+    return klfrida.run_action(get_device(serial), action, version, compress=compress)
+
+
+def _api_proxy(serial=None, action="get", profile=None, host=None, port=None, exclusion_list=None):
+    from argparse import Namespace
+    from commands import proxy
+    from utils.adb_utils import get_device
+    device = get_device(serial)
+    if action == "get":
+        return {"serial": device.serial, "settings": proxy.read_proxy(device)}
+    if action == "unset":
+        return proxy.clear_proxy(device)
+    return proxy.apply_proxy(device, **proxy.resolve_proxy(Namespace(proxy_profile=profile, host=host, port=port, exclude=exclusion_list)))
+
+
+def _api_logcat(serial=None, action="read", package=None, tags=None, level=None, lines=100):
+    from utils import logcat
+    from utils.adb_utils import get_device
+    if action == "stop":
+        return {"stopped": logcat.stop_captures(serial)}
+    return logcat.capture_tail(get_device(serial), package, tags, level, lines)
+
+
+def _api_connect(serial=None, host=None, port="5555", scan=None):
+    from utils import wifi_adb
+    if scan:
+        return wifi_adb.discover(scan, wifi_adb.parse_ports(port))
+    return wifi_adb.connect(host, port)
+
+
+def _api_sync(serial=None, local_dir=None, remote_dir=None, delete=False, dry_run=False):
+    from utils import file_sync
+    from utils.adb_utils import get_device
+    return file_sync.sync_dir(get_device(serial), local_dir, remote_dir, delete, dry_run)
+
+
+API = {
+    "connect": _api_connect,
+    "devices": _api_devices,
+    "packages": _api_packages,
+    "proxy": _api_proxy,
+    "install_cert": _api_install_cert,
+    "klfrida": _api_klfrida,
+    "logcat": _api_logcat,
+    "sync": _api_sync,
+}
+
+
+class _Client:
+    """The connection of one forwarded request; several threads (fleet workers) may write to it."""
+
+    def __init__(self, sock, reader):
+        self.sock = sock
+        self.reader = reader
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            _send(self.sock, message)
+
+    def receive(self):
+        line = self.reader.readline()
+        if not line:
+            raise EOFError("client disconnected")
+        return json.loads(line)
+
+
+class _Router:
+    """sys.stdout / sys.stderr of the daemon: text written for a forwarded request goes to its client, the rest to the log."""
+
+    def __init__(self, key, fallback):
+        self._key = key
+        self._fallback = fallback
+
+    def write(self, text):
+        client = _client.get()
+        if client is None:
+            return self._fallback.write(text)
+        try:
+            client.send({self._key: text})
+        except OSError:
+            pass  # client đã thoát (Ctrl+C): command vẫn chạy tiếp, bỏ output
+        return len(text)
+
+    def flush(self):
+        if _client.get() is None:
+            self._fallback.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._fallback, name)
+
+
+def _input(prompt=""):
+    """input() for forwarded requests: the prompt is answered by the client's terminal."""
+    client = _client.get()
+    if client is None:
+        return _builtin_input(prompt)
+    client.send({"input": str(prompt)})
+    line = client.receive().get("line")
+    if line is None:
+        raise EOFError
+    return line
+
+
+_builtin_input = builtins.input
+
+
+def _run_cli(client, request):
+    import cli_tool
+    from utils.paths import client_cwd
+    # các request chạy song song: không chdir / đổi sys.argv, đường dẫn tương đối được tính từ cwd của client
+    callback = (lambda event: client.send({"event": event})) if request.get("ndjson") else None
+    with client_cwd(request["cwd"]), output.collect(callback):
+        try:
+            cli_tool.execute(request["argv"], prog=os.path.basename(request.get("prog") or "frida-tool"))
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if not isinstance(e.code, (int, type(None))):
+                print(e.code, file=sys.stderr)
+        except Exception as e:
+            print(f"Error: {str(e).strip() or type(e).__name__}", file=sys.stderr)
+            code = 1
+    return code
+
+
+def _status(server):
+    from utils import root_shell
+    return {"pid": os.getpid(), "socket": server.server_address, "uptime": round(time.time() - server.started, 1),
+            "requests": server.requests, "root_sessions": sorted(root_shell._sessions)}
+
+
+def _handle(server, sock):
+    reader = sock.makefile("r", encoding="utf-8")
+    client = _Client(sock, reader)
+    try:
+        request = client.receive()
+        server.requests += 1
+        op = request.get("op")
+        token = _client.set(client)
+        try:
+            if op in ("cli", "call") and request.get("env", server.env) != server.env:
+                reply = {"done": None, "declined": "environment differs from the daemon's"}
+            elif op == "cli":
+                reply = {"done": _run_cli(client, request)}
+            elif op == "call":
+                try:
+                    with output.collect(lambda event: client.send({"event": event})):
+                        reply = {"done": True, "result": API[request["name"]](request.get("serial"), **request.get("kwargs", {}))}
+                except Exception as e:
+                    reply = {"done": False, "error": str(e).strip() or type(e).__name__}
+            elif op == "status":
+                reply = {"done": True, **_status(server)}
+            elif op == "stop":
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                reply = {"done": True}
+            else:
+                reply = {"done": False, "error": f"unknown op {op}"}
+        finally:
+            _client.reset(token)
+        client.send(reply)
+    except (OSError, EOFError, ValueError):
+        pass  # client ngắt kết nối giữa chừng
+    finally:
+        reader.close()
+
+
+def serve():
+    """Run the daemon in this process until a "stop" request (or Ctrl+C)."""
+    import socketserver
+    from utils import trace
+    if not available():
+        raise RuntimeError("The daemon needs Unix domain sockets, which this platform does not provide")
+    if request("status") is not None:
+        raise RuntimeError(f"A daemon is already listening on {socket_path()}")
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            _handle(self.server, self.request)
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    path = socket_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)  # socket cũ của daemon đã chết
+    # socket chỉ user hiện tại kết nối được: ai gửi được request là chạy được lệnh root trên device
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.env = _environment()
+    server.started = time.time()
+    server.requests = 0
+
+    sys.stdout = _Router("out", sys.stdout)
+    sys.stderr = _Router("err", sys.stderr)
+    builtins.input = _input
+    trace.drop_orphans()
+    _warm_up()
+    print(f"frida-tool daemon {os.getpid()} listening on {path}", file=sys.__stderr__, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+        from utils.root_shell import close_all
+        close_all()
+
+
+def _warm_up():
+    """Import every command and open the ADB client up front, so the first request is as fast as the next."""
+    import importlib
+    import cli_tool  # noqa: F401
+    from commands import COMMANDS
+    from utils.adb_utils import enumerate_devices
+    for module_name, _ in COMMANDS.values():
+        importlib.import_module(f"commands.{module_name}")
+    try:
+        enumerate_devices()
+    except Exception as e:
+        print(f"ADB not reachable yet: {e}", file=sys.__stderr__, flush=True)
+
+
+def stop(wait=START_TIMEOUT):
+    """Ask the daemon to exit and wait until its socket is gone; False when no daemon was running."""
+    if request("stop") is None:
+        return False
+    deadline = time.monotonic() + wait
+    while os.path.exists(socket_path()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return True
+
+
+def start(wait=START_TIMEOUT):
+    """Start the daemon in the background (log in the cache folder) and wait until it answers."""
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log_path = cache_utils.cache_path("daemon.log")
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen([sys.executable, "-m", "utils.daemon"], cwd=root, stdin=subprocess.DEVNULL,
+                                   stdout=log, stderr=log, start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        status = request("status")
+        if status is not None:
+            return status
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    raise RuntimeError(f"daemon did not start, see {log_path}")
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,5 +1,6 @@
 import functools
 from utils.color_utils import ANSI
+from utils.output import emit
 import time
 def splitstmtadb(func):
     def wrapper(*args, **kwargs):
@@ -27,6 +28,7 @@ def header(func):
         result = func(*args, **kwargs)
         end_time = time.time()
         elapsed_time = end_time - start_time
+        emit("timing", command=func.__name__, seconds=round(elapsed_time, 3))
         print(f"\n----------------------{ANSI.RED}{ANSI.BOLD}Done: {func.__name__} (Elapsed Time: {elapsed_time:.2f} seconds){ANSI.RESET}----------------------\n")
         return result
     return wrapper
\ No newline at end of file
@@ -0,0 +1,66 @@
+import time
+from collections import namedtuple
+
+from utils.cache_utils import cache_path, load_json, save_json, remove_file, safe_name
+
+# Các property cần cho việc hiển thị / chọn device, đọc trong MỘT lần gọi shell
+DEVICE_PROPS = [
+    ("brand", "ro.product.brand"),
+    ("model", "ro.product.model"),
+    ("sdk", "ro.build.version.sdk"),
+    ("release", "ro.build.version.release"),
+    ("abi", "ro.product.cpu.abi"),
+]
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+# Trong khoảng TTL dùng cache luôn, không cần chạm vào device
+CACHE_TTL = 300
+
+DeviceInfo = namedtuple("DeviceInfo", ["serial"] + [name for name, _ in DEVICE_PROPS] + ["boot_id"])
+
+
+def _info_path(serial):
+    return cache_path("devices", f"{safe_name(serial)}.json")
+
+
+def _read_boot_id(device, timeout=None):
+    return device.shell(f"cat {BOOT_ID_PATH}", timeout=timeout).strip()
+
+
+def read_device_info(device, timeout=None):
+    """Read every property in DEVICE_PROPS plus the boot id with a single shell round trip."""
+    command = "; ".join(f"getprop {prop}" for _, prop in DEVICE_PROPS) + f"; cat {BOOT_ID_PATH}"
+    lines = device.shell(command, timeout=timeout).replace("\r", "").split("\n")
+    values = [line.strip() for line in lines] + [""] * (len(DEVICE_PROPS) + 1)
+    return DeviceInfo(device.serial, *values[:len(DEVICE_PROPS) + 1])
+
+
+def get_device_info(device, ttl=CACHE_TTL, refresh=False, timeout=None):
+    """
+    Return the DeviceInfo of a device, cached per serial on disk.
+    - fresh (< ttl): no round trip at all
+    - stale: one cheap boot id read, the cache is reused if the device has not rebooted
+    - missing / rebooted / refresh=True: full property read
+    """
+    path = _info_path(device.serial)
+    cached = None if refresh else load_json(path)
+    now = time.time()
+    if cached and cached.get("info", {}).get("serial") == device.serial:
+        try:
+            info = DeviceInfo(**cached["info"])
+        except TypeError:
+            info = None  # cache format cũ, đọc lại
+        if info is not None:
+            if now - cached.get("checked_at", 0) < ttl:
+                return info
+            if info.boot_id and _read_boot_id(device, timeout) == info.boot_id:
+                save_json(path, {"checked_at": now, "info": cached["info"]})
+                return info
+
+    info = read_device_info(device, timeout)
+    save_json(path, {"checked_at": now, "info": info._asdict()})
+    return info
+
+
+def invalidate_device_info(serial):
+    """Drop the cached properties of a device (e.g. right before rebooting it)."""
+    remove_file(_info_path(serial))
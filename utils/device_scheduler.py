@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+
+# Số call được chờ sau call đang chạy trên MỘT device; vượt quá thì từ chối ngay (back-pressure)
+MAX_QUEUE_DEPTH = 8
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+# job đang chạy trong task hiện tại (set trong context của job), để hold() biết lane nào cần giữ
+_current_job = contextvars.ContextVar("device_job", default=None)
+
+
+class _Job:
+    __slots__ = ("device", "tool", "priority", "seq", "func", "context", "future", "task", "threads",
+                 "queued_at", "started_at")
+
+    def __init__(self, device, tool, priority, seq, func):
+        self.device = device
+        self.tool = tool
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        # job chạy trong context của caller: event/span vẫn về đúng output.collect / trace.collect
+        self.context = contextvars.copy_context()
+        self.future = asyncio.get_running_loop().create_future()
+        self.task = None
+        # số worker thread (hold) của job chưa xong: lane chỉ được nhả khi task xong VÀ chúng đã xong
+        self.threads = 0
+        self.queued_at = time.monotonic()
+        self.started_at = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def describe(self, now):
+        info = {"tool": self.tool, "priority": self.priority}
+        if self.started_at is None:
+            return dict(info, waiting=round(now - self.queued_at, 3))
+        info.update(waited=round(self.started_at - self.queued_at, 3), running=round(now - self.started_at, 3))
+        if self.task.done():
+            # caller đã hết giờ/huỷ nhưng thread vẫn đang làm việc với device
+            info["detached_threads"] = self.threads
+        return info
+
+
+class DeviceScheduler:
+    """
+    Per-device job queues for an asyncio server: calls on one device run one at a time, lowest priority
+    number first (then in arrival order); different devices run in parallel. At most max_queue calls wait
+    per device, beyond that run() raises QueueFull. A caller cancelled while waiting leaves the queue; one
+    cancelled while running cancels its job, but the device stays taken until the job's worker threads
+    (see hold) have returned, since those cannot be cancelled.
+    """
+
+    def __init__(self, max_queue=MAX_QUEUE_DEPTH):
+        self.max_queue = max_queue
+        # device -> {"running": job or None, "queue": heap of waiting jobs}
+        self._lanes = {}
+        self._seq = itertools.count()
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, device, tool, priority, func):
+        """Result of func() once it is this call's turn on device."""
+        lane = self._lanes.setdefault(device, {"running": None, "queue": []})
+        lane["queue"] = [job for job in lane["queue"] if not job.future.done()]
+        heapq.heapify(lane["queue"])
+        if lane["running"] is not None and len(lane["queue"]) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{device or 'device'} is busy ({lane['running'].tool} running, "
+                            f"{len(lane['queue'])} call(s) queued), retry later")
+        job = _Job(device, tool, priority, next(self._seq), func)
+        heapq.heappush(lane["queue"], job)
+        self._start_next(device)
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # future đã bị huỷ cùng caller: job đang chờ sẽ bị bỏ qua, job đang chạy thì huỷ luôn
+            if job.task is not None:
+                job.task.cancel()
+            raise
+
+    def _start_next(self, device):
+        lane = self._lanes[device]
+        if lane["running"] is not None:
+            return
+        while lane["queue"]:
+            job = heapq.heappop(lane["queue"])
+            if job.future.done():
+                continue
+            job.started_at = time.monotonic()
+            lane["running"] = job
+            job.context.run(_current_job.set, job)
+            job.task = job.context.run(asyncio.ensure_future, job.func())
+            job.task.add_done_callback(lambda task, job=job: self._finish(job, task))
+            return
+        del self._lanes[device]
+
+    def hold(self, future):
+        """
+        Keep the device of the job running in this context taken until future (a concurrent.futures.Future
+        of blocking work on that device) is done, even if the job itself is cancelled first.
+        """
+        job = _current_job.get()
+        if job is None:
+            return
+        job.threads += 1
+        loop = asyncio.get_running_loop()
+
+        def done(_):
+            try:
+                loop.call_soon_threadsafe(self._thread_done, job)
+            except RuntimeError:
+                pass  # loop đã đóng: server đang tắt
+
+        future.add_done_callback(done)
+
+    def _thread_done(self, job):
+        job.threads -= 1
+        if job.task.done():
+            self._release(job)
+
+    def _finish(self, job, task):
+        if not job.future.done():
+            if task.cancelled():
+                job.future.cancel()
+            elif task.exception() is not None:
+                job.future.set_exception(task.exception())
+            else:
+                job.future.set_result(task.result())
+        self._release(job)
+
+    def _release(self, job):
+        if job.threads:
+            return
+        self._lanes[job.device]["running"] = None
+        self.completed += 1
+        self._start_next(job.device)
+
+    def status(self):
+        """Running and waiting jobs per device with their wait and run times (seconds)."""
+        now = time.monotonic()
+        devices = {}
+        for device, lane in self._lanes.items():
+            devices[device or "default"] = {
+                "running": lane["running"].describe(now) if lane["running"] else None,
+                "queued": [job.describe(now) for job in sorted(lane["queue"]) if not job.future.done()],
+            }
+        return {"devices": devices, "completed": self.completed, "rejected": self.rejected,
+                "max_queue_depth": self.max_queue}
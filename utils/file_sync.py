@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import posixpath
+import shlex
+import time
+
+from utils.adb_utils import push_files
+from utils.cache_utils import cache_path, load_json, safe_name, save_json
+from utils.output import emit
+
+# Manifest ở gốc thư mục đích trên device: {"version": 1, "files": {relpath: [size, mtime, sha256]}}.
+# File nào có stat (size, mtime) khớp manifest thì tin sha256 trong manifest, khỏi hash trên device:
+# cây không đổi chỉ tốn MỘT lần gọi shell (cat manifest + find/stat)
+MANIFEST = ".frida-tool-sync.json"
+MANIFEST_VERSION = 1
+SEPARATOR = "__FT_SYNC_STAT__"
+CHUNK_SIZE = 1024 * 1024
+# Số path mỗi lần `rm -f` (--delete), để không vượt giới hạn độ dài lệnh shell
+DELETE_BATCH = 100
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_local(local_dir):
+    """
+    {relpath: [size, mtime, sha256]} of every file under local_dir (mtime in whole seconds, as adb sets it
+    on push). Hashes are reused from ~/.frida-tool/sync/ while a file's size and mtime_ns are unchanged.
+    """
+    local_dir = os.path.abspath(local_dir)
+    if not os.path.isdir(local_dir):
+        raise RuntimeError(f"{local_dir} is not a directory")
+    hash_cache = cache_path("sync", safe_name(local_dir) + ".json")
+    cached = load_json(hash_cache, {})
+    entries = {}
+    for root, dirs, names in os.walk(local_dir):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, local_dir).replace(os.sep, "/")
+            if rel == MANIFEST or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entry = cached.get(rel)
+            if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                sha = entry[2]
+            else:
+                sha = _sha256(path)
+            entries[rel] = [stat.st_size, stat.st_mtime_ns, sha]
+    if entries != cached:
+        save_json(hash_cache, entries)
+    return {rel: [size, mtime_ns // 1_000_000_000, sha] for rel, (size, mtime_ns, sha) in entries.items()}
+
+
+def remote_state(device, remote_dir):
+    """One shell round trip: (manifest files, {relpath: (size, mtime)} of every file under remote_dir)."""
+    quoted = shlex.quote(remote_dir)
+    output = device.shell(f"cat {shlex.quote(posixpath.join(remote_dir, MANIFEST))} 2>/dev/null; echo {SEPARATOR}; "
+                          f"find {quoted} -type f -exec stat -c '%s %Y %n' {{}} + 2>/dev/null")
+    manifest_text, _, listing = output.partition(SEPARATOR)
+    try:
+        manifest = json.loads(manifest_text)
+        files = manifest["files"] if manifest.get("version") == MANIFEST_VERSION else {}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        files = {}
+    prefix = remote_dir.rstrip("/") + "/"
+    stats = {}
+    for line in listing.replace("\r", "").splitlines():
+        fields = line.split(" ", 2)
+        if len(fields) == 3 and fields[0].isdigit() and fields[1].isdigit() and fields[2].startswith(prefix):
+            rel = fields[2][len(prefix):]
+            if rel != MANIFEST:
+                stats[rel] = (int(fields[0]), int(fields[1]))
+    return files, stats
+
+
+def plan(local_files, manifest, stats):
+    """
+    Return (to_push, extra, trusted): local files whose content is not on the device, device files
+    that are not in local_files, and the manifest entries still matching the device's stat.
+    """
+    trusted = {rel: entry for rel, entry in manifest.items()
+               if rel in stats and isinstance(entry, list) and len(entry) == 3 and tuple(entry[:2]) == stats[rel]}
+    to_push = [rel for rel, entry in local_files.items() if rel not in trusted or trusted[rel][2] != entry[2]]
+    extra = sorted(set(stats) - set(local_files))
+    return to_push, extra, trusted
+
+
+def sync_dir(device, local_dir, remote_dir, delete=False, dry_run=False, local_files=None):
+    """
+    Mirror local_dir to remote_dir on device: push only files whose content changed and, with delete,
+    remove device files missing locally. local_files (from scan_local) lets fleet mode scan once.
+    """
+    local_dir = os.path.abspath(local_dir)
+    remote_dir = posixpath.normpath(remote_dir)
+    if local_files is None:
+        local_files = scan_local(local_dir)
+    start = time.time()
+    manifest, stats = remote_state(device, remote_dir)
+    to_push, extra, trusted = plan(local_files, manifest, stats)
+    deleted = extra if delete else []
+    result = {"serial": device.serial, "local": local_dir, "remote": remote_dir, "files": len(local_files),
+              "pushed": len(to_push), "unchanged": len(local_files) - len(to_push), "deleted": len(deleted)}
+    if dry_run:
+        return dict(result, dry_run=True, bytes=sum(local_files[rel][0] for rel in to_push),
+                    paths=to_push, delete_paths=deleted)
+
+    for i in range(0, len(deleted), DELETE_BATCH):
+        device.shell("rm -f " + " ".join(shlex.quote(posixpath.join(remote_dir, rel)) for rel in deleted[i:i + DELETE_BATCH]))
+
+    # adb đặt mtime trên device = mtime local (giây), nên manifest mới được tính trước khi push
+    new_manifest = {rel: entry for rel, entry in trusted.items() if rel not in deleted}
+    new_manifest.update({rel: local_files[rel] for rel in to_push})
+    pushed_bytes = 0
+    if to_push or new_manifest != manifest:
+        def progress(source, remote_path, size):
+            if isinstance(source, bytes):
+                return  # manifest
+            emit("progress", serial=device.serial, step="push", path=remote_path, bytes=size)
+
+        files = [(os.path.join(local_dir, *rel.split("/")), posixpath.join(remote_dir, rel)) for rel in to_push]
+        manifest_data = json.dumps({"version": MANIFEST_VERSION, "files": new_manifest}).encode()
+        pushed_bytes = push_files(device, files + [(manifest_data, posixpath.join(remote_dir, MANIFEST))],
+                                  progress=progress) - len(manifest_data)
+    seconds = time.time() - start
+    return dict(result, bytes=pushed_bytes, seconds=round(seconds, 3),
+                bytes_per_sec=round(pushed_bytes / seconds) if pushed_bytes and seconds else 0)
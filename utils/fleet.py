@@ -0,0 +1,132 @@
+import fnmatch
+import time
+
+from utils.color_utils import ANSI
+from utils.decorator import header
+from utils.output import emit, propagate
+
+# Số device chạy song song trong fleet mode (có thể đổi bằng --jobs)
+FLEET_WORKERS = 16
+
+
+def add_fleet_arguments(parser):
+    group = parser.add_argument_group("fleet mode", "Run the command on many devices in parallel, without prompts")
+    group.add_argument("--all-devices", action="store_true", help="Run on every connected device")
+    group.add_argument("--serials", type=str, help="Comma separated device serials, e.g. a,b,c")
+    group.add_argument("--match", action="append", metavar="KEY=GLOB",
+                       help="Filter devices by property, e.g. model=Pixel* (repeatable, all must match)")
+    group.add_argument("--jobs", type=int, default=FLEET_WORKERS, help=f"Devices handled in parallel (default: {FLEET_WORKERS})")
+
+
+def fleet_requested(args):
+    return bool(getattr(args, "all_devices", False) or getattr(args, "serials", None) or getattr(args, "match", None))
+
+
+def _parse_matches(matches):
+    filters = []
+    for item in matches or []:
+        key, sep, pattern = item.partition("=")
+        if not sep:
+            raise ValueError(f"--match expects KEY=GLOB, got '{item}'")
+        filters.append((key.strip(), pattern.strip()))
+    return filters
+
+
+def _matches(info, filters):
+    for key, pattern in filters:
+        if not hasattr(info, key):
+            raise ValueError(f"Unknown device property '{key}' (use one of: {', '.join(info._fields)})")
+        if not fnmatch.fnmatch(str(getattr(info, key)).lower(), pattern.lower()):
+            return False
+    return True
+
+
+def select_fleet(serials=None, matches=None):
+    """
+    Return (targets, skipped): targets is [(device, info)] selected by serial list and property filters,
+    skipped is [(serial, reason)] for requested/attached devices that cannot be used.
+    """
+    from utils.adb_utils import enumerate_devices
+    filters = _parse_matches(matches)
+    wanted = [s.strip() for s in serials.split(",") if s.strip()] if serials else None
+    entries = enumerate_devices()
+    targets, skipped = [], []
+    for device, info, error in entries:
+        if wanted is not None and device.serial not in wanted:
+            continue
+        if error is not None:
+            skipped.append((device.serial, error))
+        elif _matches(info, filters):
+            targets.append((device, info))
+    if wanted is not None:
+        known = {device.serial for device, _, _ in entries}
+        skipped += [(serial, "not connected") for serial in wanted if serial not in known]
+    return targets, skipped
+
+
+def run_on_devices(func, devices, args, max_workers=FLEET_WORKERS):
+    """Run func(device, args) on every device in parallel. Return [(serial, ok, result or error, seconds)] in input order."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run_one(device):
+        start = time.time()
+        try:
+            result = func(device, args)
+        except Exception as e:
+            error = str(e).strip() or type(e).__name__
+            emit("error", command=getattr(args, "command", None), serial=device.serial, error=error, seconds=round(time.time() - start, 3))
+            return device.serial, False, error, time.time() - start
+        # event ra ngay khi device này xong, không đợi cả fleet
+        emit("result", command=getattr(args, "command", None), serial=device.serial, result=result, seconds=round(time.time() - start, 3))
+        return device.serial, True, result, time.time() - start
+
+    if not devices:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(devices)))) as executor:
+        return list(executor.map(propagate(run_one), devices))
+
+
+def print_fleet_report(results, skipped):
+    width = max([len(serial) for serial, *_ in results] + [len(serial) for serial, _ in skipped] + [6])
+    print(f"{ANSI.BOLD}{'SERIAL':<{width}}  STATUS  TIME     RESULT{ANSI.RESET}")
+    for serial, ok, result, elapsed in results:
+        status = f"{ANSI.GREEN}OK    {ANSI.RESET}" if ok else f"{ANSI.RED}FAIL  {ANSI.RESET}"
+        text = str(result).replace("\n", " | ")
+        print(f"{serial:<{width}}  {status}  {elapsed:6.2f}s  {text}")
+    for serial, reason in skipped:
+        print(f"{serial:<{width}}  {ANSI.YELLOW}SKIP  {ANSI.RESET}  {'-':>7}  {reason}")
+
+    failed = [(serial, result) for serial, ok, result, _ in results if not ok]
+    print()
+    if failed or skipped:
+        print(f"{ANSI.RED}[!] {len(failed)} failed, {len(skipped)} skipped, "
+              f"{len(results) - len(failed)}/{len(results) + len(skipped)} succeeded{ANSI.RESET}")
+        for serial, error in failed:
+            print(f"{ANSI.RED}    {serial}: {error}{ANSI.RESET}")
+    else:
+        print(f"{ANSI.GREEN}[+] All {len(results)} devices succeeded{ANSI.RESET}")
+
+
+@header
+def run_fleet(args):
+    """Fleet mode entry point used by cli_tool: the command's fleet_func runs once per selected device."""
+    fleet_func = getattr(args, "fleet_func", None)
+    if fleet_func is None:
+        print(f"{ANSI.YELLOW}[!]{ANSI.RESET} '{args.command}' does not support fleet mode.")
+        return
+    targets, skipped = select_fleet(args.serials, args.match)
+    for device, info in targets:
+        emit("device", **info._asdict())
+    for serial, reason in skipped:
+        emit("error", serial=serial, error=reason, skipped=True)
+    if not targets:
+        print(f"{ANSI.RED}No matching devices.{ANSI.RESET}")
+        print_fleet_report([], skipped)
+        return
+    # Công việc chung cho mọi device (vd: tải cert từ Burp) chỉ làm một lần
+    prepare = getattr(args, "fleet_prepare", None)
+    if prepare is not None:
+        prepare(args)
+    print(f"{ANSI.CYAN}Running '{args.command}' on {len(targets)} device(s)...{ANSI.RESET}\n")
+    results = run_on_devices(fleet_func, [device for device, _ in targets], args, args.jobs)
+    print_fleet_report(results, skipped)
@@ -0,0 +1,141 @@
+import gzip
+import hashlib
+import lzma
+import os
+import shutil
+import threading
+import time
+
+from utils.cache_utils import cache_path, load_json, save_json
+from utils.device_info import get_device_info
+from utils.frida_server import server_path
+from utils.output import emit
+from utils.root_shell import root_run
+
+# ro.product.cpu.abi -> tên arch trong tên file release của frida
+ABI_MAP = {
+    "arm64-v8a": "arm64",
+    "armeabi-v7a": "arm",
+    "armeabi": "arm",
+    "x86": "x86",
+    "x86_64": "x86_64",
+}
+RELEASE_URL = "https://github.com/frida/frida/releases/download/{version}/frida-server-{version}-android-{arch}.xz"
+CHUNK_SIZE = 1024 * 1024
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def abi_to_arch(abi):
+    try:
+        return ABI_MAP[abi]
+    except KeyError:
+        raise RuntimeError(f"Unsupported ABI '{abi}' (known: {', '.join(ABI_MAP)})")
+
+
+def _artifact_dir(version, arch):
+    return os.path.dirname(cache_path("frida-server", version, arch, "meta.json"))
+
+
+def _lock(version, arch):
+    with _locks_guard:
+        return _locks.setdefault((version, arch), threading.Lock())
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _store(version, arch, raw_stream):
+    """Write the binary and a gzip copy (what gets pushed over slow links) into the cache. Return meta."""
+    directory = _artifact_dir(version, arch)
+    binary = os.path.join(directory, "frida-server")
+    with open(binary + ".tmp", "wb") as out:
+        shutil.copyfileobj(raw_stream, out, CHUNK_SIZE)
+    os.replace(binary + ".tmp", binary)
+    with open(binary, "rb") as src, gzip.open(binary + ".gz.tmp", "wb", compresslevel=9) as out:
+        shutil.copyfileobj(src, out, CHUNK_SIZE)
+    os.replace(binary + ".gz.tmp", binary + ".gz")
+    meta = {
+        "version": version,
+        "arch": arch,
+        "sha256": _sha256(binary),
+        "size": os.path.getsize(binary),
+        "gz_size": os.path.getsize(binary + ".gz"),
+        "stored_at": time.time(),
+    }
+    save_json(os.path.join(directory, "meta.json"), meta)
+    return meta
+
+
+def get_artifact(version, arch, source=None):
+    """
+    Return (meta, binary path, gzip path) of frida-server version/arch from the local cache.
+    On a miss the artifact is imported from source (a local .xz or raw binary) or downloaded
+    from the frida GitHub release.
+    """
+    directory = _artifact_dir(version, arch)
+    binary = os.path.join(directory, "frida-server")
+    with _lock(version, arch):
+        meta = load_json(os.path.join(directory, "meta.json"))
+        if meta is None or source or not os.path.exists(binary) or not os.path.exists(binary + ".gz"):
+            if source:
+                opener = lzma.open if source.endswith(".xz") else open
+                with opener(source, "rb") as stream:
+                    meta = _store(version, arch, stream)
+            else:
+                import requests
+                url = RELEASE_URL.format(version=version, arch=arch)
+                emit("progress", step="download", version=version, arch=arch, url=url)
+                with requests.get(url, stream=True, timeout=30) as response:
+                    response.raise_for_status()
+                    response.raw.decode_content = True
+                    with lzma.open(response.raw, "rb") as stream:
+                        meta = _store(version, arch, stream)
+    return meta, binary, binary + ".gz"
+
+
+def _device_state(device, remote):
+    """One root call: sha256 of the deployed binary (empty if missing) and whether gzip can decompress on device."""
+    output, _ = root_run(device, f"sha256sum {remote} 2>/dev/null; command -v gzip >/dev/null && echo __gzip__")
+    digest = output.split()[0] if output.split() and len(output.split()[0]) == 64 else ""
+    return digest, "__gzip__" in output
+
+
+def deploy(device, version, compress="auto", source=None):
+    """
+    Make sure frida-server-<version> for the device's ABI sits in /data/local/tmp.
+    Nothing is pushed when the on-device SHA-256 already matches the cached build.
+    compress: "auto" pushes the gzip copy over WiFi ADB (serial host:port) when the device has gzip,
+    "always"/"never" force the choice.
+    """
+    arch = abi_to_arch(get_device_info(device).abi)
+    meta, binary, gz_path = get_artifact(version, arch, source)
+    remote = server_path(version)
+    result = {"serial": device.serial, "version": version, "arch": arch, "path": remote, "sha256": meta["sha256"]}
+
+    device_sha, has_gzip = _device_state(device, remote)
+    if device_sha == meta["sha256"]:
+        return dict(result, pushed=False, compressed=False, bytes=0, seconds=0.0)
+
+    compressed = compress == "always" or (compress == "auto" and has_gzip and ":" in device.serial)
+    start = time.time()
+    emit("progress", serial=device.serial, step="push", path=remote, compressed=compressed)
+    # Push vào file tạm rồi mv: ghi đè binary đang chạy sẽ bị "Text file busy"
+    if compressed:
+        device.push(gz_path, f"{remote}.gz")
+        script = f"gzip -dc {remote}.gz > {remote}.tmp && rm {remote}.gz"
+        pushed_bytes = meta["gz_size"]
+    else:
+        device.push(binary, f"{remote}.tmp")
+        script = "true"
+        pushed_bytes = meta["size"]
+    output, code = root_run(device, f"{script} && chmod 755 {remote}.tmp && mv -f {remote}.tmp {remote} && sha256sum {remote}")
+    if code != 0 or output.split()[:1] != [meta["sha256"]]:
+        raise RuntimeError(f"Deploy to {device.serial} failed verification: {output.strip()}")
+    return dict(result, pushed=True, compressed=compressed, bytes=pushed_bytes, seconds=round(time.time() - start, 3))
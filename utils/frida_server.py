@@ -0,0 +1,141 @@
+import time
+
+from utils.root_shell import root_run
+
+FRIDA_DIR = "/data/local/tmp"
+FRIDA_PORT = 27042
+# Poll readiness với backoff: 50ms, 100ms, 200ms ... tối đa 1s giữa hai lần
+POLL_START = 0.05
+POLL_MAX = 1.0
+START_TIMEOUT = 15
+# kill -9 xong: chờ process thoát hẳn và nhả port, tối đa chừng này giây
+STOP_TIMEOUT = 5
+# frida-server đang chạy nhưng chưa listen: chờ thêm chừng này giây rồi coi như bị treo
+STARTING_GRACE = 5
+
+
+def server_path(version):
+    return f"{FRIDA_DIR}/frida-server-{version}"
+
+
+def list_versions(device):
+    """Return the frida-server binaries found in FRIDA_DIR."""
+    output, _ = root_run(device, f"ls {FRIDA_DIR}/frida-server-* 2>/dev/null")
+    return [line.strip() for line in output.split("\n") if line.strip().startswith(f"{FRIDA_DIR}/frida-server-")]
+
+
+def _ps_script():
+    # [f] để grep không tự match chính nó
+    return "ps -A -o PID,ARGS | grep '[f]rida-server'"
+
+
+def find_servers(device):
+    """Return [(pid, command line)] of every running frida-server."""
+    output, _ = root_run(device, _ps_script())
+    servers = []
+    for line in output.split("\n"):
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            servers.append((int(parts[0]), parts[1].strip()))
+    return servers
+
+
+def _listening_script(port):
+    # /proc/net/tcp: local_address dạng HEXIP:HEXPORT, state 0A = LISTEN
+    return f"cat /proc/net/tcp /proc/net/tcp6 2>/dev/null | grep -qi ':{port:04X} [0-9A-F:]* 0A ' && echo listening"
+
+
+def is_listening(device, port=FRIDA_PORT):
+    output, _ = root_run(device, _listening_script(port))
+    return "listening" in output
+
+
+def status(device):
+    """Return {"running", "pids", "servers", "listening"} from a single root call."""
+    output, _ = root_run(device, f"{_ps_script()}; {_listening_script(FRIDA_PORT)}")
+    servers = []
+    for line in output.split("\n"):
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].isdigit():
+            servers.append({"pid": int(parts[0]), "command": parts[1].strip()})
+    return {
+        "serial": device.serial,
+        "running": bool(servers),
+        "pids": [server["pid"] for server in servers],
+        "servers": servers,
+        "listening": "listening" in output,
+    }
+
+
+def stop(device, timeout=STOP_TIMEOUT):
+    """Kill every running frida-server in one call, then wait until they are gone and the port is free. Return the killed pids."""
+    output, _ = root_run(device, f"{_ps_script()} | while read pid rest; do kill -9 $pid && echo $pid; done")
+    killed = [int(pid) for pid in output.split() if pid.isdigit()]
+    if killed:
+        # kill -9 chỉ gửi signal: server cũ có thể vẫn giữ port khi start() chạy bản mới
+        def gone():
+            current = status(device)
+            return not current["listening"] and not set(current["pids"]) & set(killed)
+        _poll(gone, timeout, f"frida-server on {device.serial} still running or holding {FRIDA_PORT} {timeout}s after kill -9")
+    return killed
+
+
+def resolve_version(device, version=None):
+    """Return the on-device path for version, or the only installed binary when version is None."""
+    versions = list_versions(device)
+    if version:
+        wanted = version if version.startswith("/") else server_path(version)
+        if wanted not in versions:
+            raise RuntimeError(f"{wanted} not found on {device.serial} (available: {', '.join(versions) or 'none'})")
+        return wanted
+    if len(versions) == 1:
+        return versions[0]
+    if not versions:
+        raise RuntimeError(f"No frida-server binary in {FRIDA_DIR} on {device.serial}")
+    raise RuntimeError(f"Several frida-server binaries on {device.serial}, pass --version ({', '.join(versions)})")
+
+
+def _poll(ready, timeout, error):
+    """Call ready() with bounded exponential backoff until it returns True. Return seconds waited, RuntimeError(error) on timeout."""
+    start = time.monotonic()
+    delay = POLL_START
+    while True:
+        if ready():
+            return time.monotonic() - start
+        elapsed = time.monotonic() - start
+        if elapsed >= timeout:
+            raise RuntimeError(error)
+        time.sleep(min(delay, timeout - elapsed))
+        delay = min(delay * 2, POLL_MAX)
+
+
+def wait_until_listening(device, port=FRIDA_PORT, timeout=START_TIMEOUT):
+    """Poll with bounded exponential backoff until port is in LISTEN state. Return seconds waited."""
+    return _poll(lambda: is_listening(device, port), timeout,
+                 f"frida-server on {device.serial} is not listening on {port} after {timeout}s")
+
+
+def start(device, version=None, timeout=START_TIMEOUT):
+    """Start frida-server (no-op if one already listens) and wait until it accepts connections."""
+    path = resolve_version(device, version)
+    current = status(device)
+    if current["running"] and current["listening"]:
+        return dict(current, path=path, started=False, startup_ms=0)
+    killed = []
+    if current["running"]:
+        # instance đang khởi động: đợi nó thay vì chạy thêm một bản thứ hai; treo thì kill rồi chạy lại
+        try:
+            waited = wait_until_listening(device, timeout=min(timeout, STARTING_GRACE))
+            return dict(status(device), path=path, started=False, startup_ms=round(waited * 1000))
+        except RuntimeError:
+            killed = stop(device)
+    launched = time.monotonic()
+    root_run(device, f"chmod 755 {path}; nohup {path} >/dev/null 2>&1 &")
+    wait_until_listening(device, timeout=timeout)
+    startup_ms = round((time.monotonic() - launched) * 1000)
+    return dict(status(device), path=path, started=True, startup_ms=startup_ms, killed=killed)
+
+
+def restart(device, version=None, timeout=START_TIMEOUT):
+    killed = stop(device)
+    return dict(start(device, version, timeout), killed=killed)
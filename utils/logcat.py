@@ -0,0 +1,246 @@
+import re
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from itertools import islice
+
+# logcat chạy trên MỘT connection ppadb, lọc theo pid/tag/level ở phía host qua chuỗi generator:
+# read_lines (bytes -> dòng) -> parse_lines (dòng -> LogLine) -> filter_lines; bộ nhớ không tăng theo thời gian
+LEVELS = "VDIWEF"
+CHUNK_SIZE = 65536
+# Dòng dài hơn (log rác không có '\n') bị cắt, để buffer không phình
+MAX_LINE = 16384
+RING_SIZE = 5000
+# Khoảng (giây) đọc lại danh sách pid của package bằng ps, ngoài việc theo dõi "Start proc" trong chính log
+PID_REFRESH = 5
+# Lần đọc đầu của capture: chờ đến khi log cũ trong buffer của device chảy hết
+SETTLE_QUIET = 0.2
+SETTLE_TIMEOUT = 1
+# Capture nền (capture_tail): không được đọc trong IDLE_TIMEOUT giây thì tự dừng; tối đa MAX_CAPTURES cái,
+# cần chỗ thì dừng cái lâu chưa đọc nhất
+IDLE_TIMEOUT = 600
+MAX_CAPTURES = 8
+REAP_INTERVAL = 30
+
+# 01-02 03:04:05.678  1234  5678 I ActivityManager: message
+THREADTIME = re.compile(r"^(\d\d-\d\d \d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+)\s+([VDIWEFA])\s+(.*?)\s*: ?(.*)$")
+START_PROC = re.compile(r"Start proc (\d+):([\w.]+)(?::[\w.]+)?/")
+PROCESS_DIED = re.compile(r"Process ([\w.]+)(?::[\w.]+)? \(pid (\d+)\) has died")
+
+LogLine = namedtuple("LogLine", ["time", "pid", "tid", "level", "tag", "message", "raw"])
+
+
+def open_logcat(device, tail=None):
+    """Start `logcat -v threadtime` on its own connection and return it (closing it stops logcat)."""
+    conn = device.create_connection()
+    conn.send(f"shell:logcat -v threadtime" + (f" -T {int(tail)}" if tail else ""))
+    return conn
+
+
+def read_lines(conn, chunk_size=CHUNK_SIZE):
+    """Yield text lines as they arrive on conn, until it is closed."""
+    pending = b""
+    while True:
+        try:
+            chunk = conn.read(chunk_size)
+        except OSError:
+            break  # stop() đóng socket từ thread khác
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        if len(pending) > MAX_LINE:
+            lines.append(pending[:MAX_LINE])
+            pending = b""
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def parse_lines(lines):
+    """threadtime lines -> LogLine; banners such as `--------- beginning of main` are dropped."""
+    for line in lines:
+        match = THREADTIME.match(line)
+        if match:
+            yield LogLine(*match.groups(), line)
+
+
+def package_pids(device, package):
+    """PIDs of every process of package (including `package:service` processes)."""
+    pids = set()
+    for line in device.shell("ps -A -o PID,NAME 2>/dev/null || ps").splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and (fields[-1] == package or fields[-1].startswith(f"{package}:")):
+            # ps -o PID,NAME: "PID NAME"; ps cũ: "USER PID PPID ... NAME"
+            pids.add(fields[0] if fields[0].isdigit() else fields[1])
+    return pids
+
+
+class PidTracker:
+    """Live PID set of a package: ps at start and every `refresh` seconds, plus ActivityManager start/death lines."""
+
+    def __init__(self, device, package, refresh=PID_REFRESH):
+        self.device = device
+        self.package = package
+        self.refresh = refresh
+        self.pids = package_pids(device, package)
+        self.checked_at = time.monotonic()
+
+    def observe(self, entry):
+        match = START_PROC.search(entry.message)
+        if match and match.group(2) == self.package:
+            self.pids.add(match.group(1))
+            return
+        match = PROCESS_DIED.search(entry.message)
+        if match and match.group(1) == self.package:
+            self.pids.discard(match.group(2))
+
+    def __contains__(self, pid):
+        if time.monotonic() - self.checked_at > self.refresh:
+            self.checked_at = time.monotonic()
+            try:
+                self.pids = package_pids(self.device, self.package)
+            except Exception:
+                pass  # giữ danh sách cũ, thử lại lần sau
+        return pid in self.pids
+
+
+def filter_lines(entries, pids=None, tags=None, level=None):
+    """Keep entries of the tracked PIDs (PidTracker or set), with one of tags, at or above level."""
+    tags = set(tags) if tags else None
+    min_level = LEVELS.index(level.upper()) if level else 0
+    for entry in entries:
+        if isinstance(pids, PidTracker):
+            pids.observe(entry)
+        if pids is not None and entry.pid not in pids:
+            continue
+        if tags is not None and entry.tag not in tags:
+            continue
+        if LEVELS.find(entry.level) < min_level and entry.level != "A":
+            continue
+        yield entry
+
+
+def pipeline(device, conn, package=None, tags=None, level=None):
+    """Filtered LogLines from an open logcat connection."""
+    pids = PidTracker(device, package) if package else None
+    return filter_lines(parse_lines(read_lines(conn)), pids, tags, level)
+
+
+class LogcatCapture:
+    """Background logcat of one device and filter into a ring buffer of the last `size` matching lines."""
+
+    def __init__(self, device, package=None, tags=None, level=None, size=RING_SIZE):
+        self.serial = device.serial
+        self.filters = {"package": package, "tags": sorted(tags) if tags else None, "level": level}
+        self.lines = deque(maxlen=size)
+        self.matched = 0
+        self.started_at = time.time()
+        self.last_line_at = time.monotonic()
+        self.read_at = time.monotonic()
+        self.error = None
+        self._conn = open_logcat(device)
+        self._pipeline = pipeline(device, self._conn, package, tags, level)
+        self._thread = threading.Thread(target=self._run, name=f"logcat-{self.serial}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for entry in self._pipeline:
+                self.lines.append(entry.raw)
+                self.matched += 1
+                self.last_line_at = time.monotonic()
+        except Exception as e:
+            self.error = str(e).strip() or type(e).__name__
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def settle(self, quiet=SETTLE_QUIET, timeout=SETTLE_TIMEOUT):
+        """Wait until no line matched for `quiet` seconds (the backlog is drained), at most `timeout`."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.running and time.monotonic() - self.last_line_at < quiet:
+            time.sleep(quiet / 4)
+
+    def tail(self, count):
+        """Last count lines (all when 0), copied from the end of the ring buffer only."""
+        if not count:
+            return list(self.lines)
+        return list(islice(reversed(self.lines), count))[::-1]
+
+    def stop(self):
+        try:
+            self._conn.socket.shutdown(socket.SHUT_RDWR)
+        except (OSError, AttributeError):
+            pass
+        self._conn.close()
+        self._thread.join(timeout=2)
+
+
+_captures = {}
+_captures_lock = threading.Lock()
+_reaper = None
+
+
+def _key(serial, package, tags, level):
+    return serial, package, tuple(sorted(tags)) if tags else None, level.upper() if level else None
+
+
+def capture_tail(device, package=None, tags=None, level=None, lines=100, size=RING_SIZE):
+    """
+    Last `lines` matching lines of the background capture for these filters, started on first use
+    (it then keeps running, so later calls only copy from the ring buffer). A capture stops after
+    IDLE_TIMEOUT seconds without a call, or when MAX_CAPTURES newer ones need its place.
+    """
+    global _reaper
+    key = _key(device.serial, package, tags, level)
+    evicted = []
+    with _captures_lock:
+        capture = _captures.get(key)
+        if capture is not None and not capture.running:
+            capture = None  # device mất kết nối: mở lại
+        fresh = capture is None
+        if fresh:
+            _captures.pop(key, None)
+            while len(_captures) >= MAX_CAPTURES:
+                oldest = min(_captures, key=lambda k: _captures[k].read_at)
+                evicted.append(_captures.pop(oldest))
+            capture = _captures[key] = LogcatCapture(device, package, tags, level, size)
+            if _reaper is None:
+                _reaper = threading.Thread(target=_reap_idle, name="logcat-reaper", daemon=True)
+                _reaper.start()
+        capture.read_at = time.monotonic()
+    for old in evicted:
+        old.stop()
+    if fresh:
+        capture.settle()
+    return {"serial": device.serial, **capture.filters, "running": capture.running, "matched": capture.matched,
+            "buffered": len(capture.lines), "since": capture.started_at, "error": capture.error,
+            "lines": capture.tail(lines)}
+
+
+def _reap_idle():
+    """Stop captures nobody read for IDLE_TIMEOUT seconds; exit once none is left."""
+    global _reaper
+    while True:
+        time.sleep(REAP_INTERVAL)
+        now = time.monotonic()
+        with _captures_lock:
+            idle = [key for key, capture in _captures.items() if now - capture.read_at > IDLE_TIMEOUT]
+            captures = [_captures.pop(key) for key in idle]
+            if not _captures:
+                _reaper = None
+        for capture in captures:
+            capture.stop()
+        if _reaper is not threading.current_thread():
+            return
+
+
+def stop_captures(serial=None):
+    """Stop the background captures of serial (all devices when None); return how many were stopped."""
+    with _captures_lock:
+        keys = [key for key in _captures if serial is None or key[0] == serial]
+        captures = [_captures.pop(key) for key in keys]
+    for capture in captures:
+        capture.stop()
+    return len(captures)
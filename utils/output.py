@@ -0,0 +1,105 @@
+import contextlib
+import contextvars
+import json
+import sys
+import threading
+import time
+
+# --output text: chữ có màu như cũ; --output ndjson: mỗi event một dòng JSON trên stdout, chữ cho người đọc sang stderr
+MODES = ("text", "ndjson")
+EVENT_TYPES = ("device", "progress", "result", "error", "timing")
+
+_mode = "text"
+_stream = None
+_lock = threading.Lock()
+# sink theo context: mcp_server gom event của từng tool call
+_collector = contextvars.ContextVar("output_collector", default=None)
+
+
+def add_output_argument(parser):
+    # dest riêng: không đụng -o/--output của các command (vd. signapk)
+    parser.add_argument("--output", dest="output_mode", choices=MODES, default="text",
+                        help="ndjson: stream typed events (device, progress, result, error, timing) as JSON lines on stdout")
+
+
+def requested_mode(argv):
+    """
+    Output mode from the raw command line, before argparse runs (the banner is printed first).
+    argv: the tokens before the subcommand, where the global flag lives (signapk has its own --output).
+    """
+    for i, token in enumerate(argv):
+        if token == "--output" and i + 1 < len(argv):
+            return argv[i + 1]
+        if token.startswith("--output="):
+            return token.split("=", 1)[1]
+    return "text"
+
+
+def set_mode(mode):
+    """Switch to ndjson: events go to the real stdout, everything print()ed goes to stderr."""
+    global _mode, _stream
+    if mode not in MODES:
+        raise ValueError(f"Unknown output mode {mode}")
+    if mode == "ndjson" and _mode != "ndjson":
+        _stream = sys.stdout
+        sys.stdout = sys.stderr
+    _mode = mode
+
+
+def is_ndjson():
+    return _mode == "ndjson"
+
+
+def _default(value):
+    if hasattr(value, "_asdict"):
+        return value._asdict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def to_json(event):
+    return json.dumps(event, default=_default, ensure_ascii=False)
+
+
+def emit(type, **fields):
+    """Publish one event to the context sink (if any) and, in ndjson mode, write it out immediately."""
+    return publish({"type": type, "ts": round(time.time(), 3), **fields})
+
+
+def publish(event):
+    """Deliver an already built event (e.g. one relayed by the daemon) the same way emit does."""
+    sink = _collector.get()
+    if sink is not None:
+        sink(event)
+    if _stream is not None:
+        line = to_json(event)
+        with _lock:
+            _stream.write(line + "\n")
+            _stream.flush()
+    return event
+
+
+@contextlib.contextmanager
+def collect(callback=None):
+    """Gather the events emitted in this context into a list; callback(event) sees each one as it happens."""
+    events = []
+
+    def sink(event):
+        events.append(event)
+        if callback is not None:
+            callback(event)
+
+    token = _collector.set(sink)
+    try:
+        yield events
+    finally:
+        _collector.reset(token)
+
+
+def propagate(func):
+    """Wrap func so calls from pool threads emit into the caller's context (ThreadPoolExecutor does not copy it)."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
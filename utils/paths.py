@@ -0,0 +1,22 @@
+import contextlib
+import contextvars
+import os
+
+# cwd của terminal gửi lệnh khi lệnh chạy trong daemon: đường dẫn tương đối (signapk -af app.apk) tính từ đó,
+# không phải từ cwd của daemon (không chdir được: cwd là của cả process, các request chạy song song)
+_cwd = contextvars.ContextVar("client_cwd", default=None)
+
+
+def local_path(value):
+    """argparse type for local files and folders: relative paths are taken from the invoking terminal's cwd."""
+    cwd = _cwd.get()
+    return value if cwd is None else os.path.join(cwd, value)
+
+
+@contextlib.contextmanager
+def client_cwd(cwd):
+    token = _cwd.set(cwd)
+    try:
+        yield
+    finally:
+        _cwd.reset(token)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+# Tool dùng cho invalidate: xoá mọi entry của device
+ALL_TOOLS = "*"
+
+
+class ResultCache:
+    """
+    TTL cache of tool results keyed by (tool, arguments, device), for an asyncio server.
+    Identical calls in flight share one execution (single-flight), which is cancelled once all of its
+    callers are gone; only successful results are stored. ttls: {tool: seconds}, tools without a TTL
+    always run. invalidates: {mutating tool: tools whose entries it makes stale, or ALL_TOOLS}.
+    """
+
+    def __init__(self, ttls, invalidates):
+        self.ttls = dict(ttls)
+        self.invalidates = dict(invalidates)
+        self._entries = {}
+        self._inflight = {}
+        # task -> số caller đang chờ nó
+        self._waiters = Counter()
+        # Tăng mỗi lần invalidate: kết quả của lần chạy bắt đầu trước đó không được lưu
+        self._generation = 0
+        self.stats = {name: Counter() for name in self.ttls}
+
+    @staticmethod
+    def key(tool, arguments, device):
+        arguments = {name: value for name, value in (arguments or {}).items() if name != "serial"}
+        return tool, json.dumps(arguments, sort_keys=True, default=str), device
+
+    async def run(self, tool, arguments, device, func):
+        """Result of func() for this call: from the cache, from an identical call in flight, or fresh."""
+        ttl = self.ttls.get(tool)
+        if not ttl:
+            try:
+                return await func()
+            finally:
+                # cả khi lỗi giữa chừng: device có thể đã bị thay đổi một phần
+                self.invalidate(tool, device)
+        stats = self.stats[tool]
+        key = self.key(tool, arguments, device)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            stats["hits"] += 1
+            return list(entry[1])
+        task = self._inflight.get(key)
+        if task is not None:
+            stats["coalesced"] += 1
+        else:
+            stats["misses"] += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._fill(key, ttl, func))
+            # mọi caller có thể đã hết giờ: lấy exception ở đây để asyncio không log "never retrieved"
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        # shield: caller hết giờ / bị huỷ không huỷ lần chạy chung của các caller khác...
+        self._waiters[task] += 1
+        try:
+            return list(await asyncio.shield(task))
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                # ...nhưng caller cuối cùng thì có: job chưa chạy rời hàng đợi; thread đang chạy thì không dừng được,
+                # scheduler giữ device tới khi nó xong
+                task.cancel()
+
+    async def _fill(self, key, ttl, func):
+        generation = self._generation
+        task = asyncio.current_task()
+        try:
+            result = await func()
+        finally:
+            # invalidate có thể đã bỏ task này và một lần chạy mới đã thế chỗ
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        now = time.monotonic()
+        for stale in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[stale]
+        if generation == self._generation:
+            self._entries[key] = (now + ttl, result)
+        return result
+
+    def invalidate(self, tool, device=None):
+        """
+        Drop the entries made stale by a call of tool on device (None: the only/unknown device, so every
+        device). Matching runs in flight are forgotten too: their callers still get their result, but a
+        call made after this starts a fresh run instead of joining one that read the old state.
+        """
+        tools = self.invalidates.get(tool)
+        if not tools:
+            return 0
+
+        def matches(key):
+            return (tools == ALL_TOOLS or key[0] in tools) and (device is None or key[2] in (device, None))
+
+        stale = [key for key in self._entries if matches(key)]
+        for key in stale:
+            del self._entries[key]
+        for key in [key for key in self._inflight if matches(key)]:
+            del self._inflight[key]
+        self._generation += 1
+        self.stats.setdefault(tool, Counter())["invalidations"] += 1
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    def summary(self):
+        """Counters per tool (hits, misses, coalesced, invalidations, hit_rate) and the live entry count."""
+        now = time.monotonic()
+        tools = {}
+        for tool, counter in self.stats.items():
+            tools[tool] = dict(counter)
+            if tool in self.ttls:
+                served = counter["hits"] + counter["coalesced"]
+                calls = served + counter["misses"]
+                tools[tool].update(ttl=self.ttls[tool], hit_rate=round(served / calls, 3) if calls else None)
+        return {"entries": sum(1 for expires, _ in self._entries.values() if expires > now),
+                "in_flight": len(self._inflight), "tools": tools}
@@ -0,0 +1,139 @@
+import atexit
+import os
+import re
+import shlex
+import threading
+import time
+
+# Đặt FRIDA_TOOL_NO_ROOT_SESSION=1 để luôn dùng `su -c` cho từng lệnh
+DISABLED = os.environ.get("FRIDA_TOOL_NO_ROOT_SESSION") == "1"
+SESSION_TIMEOUT = 30
+# su không mở được session (chưa grant, device đang boot...): dùng `su -c` trong bấy nhiêu giây rồi thử lại
+UNAVAILABLE_RETRY = 60
+
+
+class CommandNotSent(RuntimeError):
+    """The session broke before the command reached the device: running it another way is safe."""
+
+
+class RootShell:
+    """
+    One long-lived `su` shell per device. Commands are written to its stdin and framed with
+    a unique end marker carrying the exit code, so many root commands share a single ADB
+    transport connection and a single root handshake.
+    """
+
+    def __init__(self, device, timeout=SESSION_TIMEOUT):
+        self.serial = device.serial
+        self.lock = threading.Lock()
+        self._buffer = b""
+        self._conn = device.create_connection(timeout=timeout)
+        try:
+            self._conn.send("shell:su")
+            output, _ = self.run("id -u")
+        except Exception:
+            self.close()
+            raise
+        if output.strip() != "0":
+            self.close()
+            raise RuntimeError(f"su on {self.serial} did not give a root shell: {output.strip()}")
+
+    def run(self, command):
+        """Run command in the root shell. Return (output with stderr merged, exit code)."""
+        marker = f"__FT_{os.urandom(16).hex()}__"
+        # subshell: `exit`/`cd` trong command không phá session; </dev/null: command không đọc nhầm stdin
+        script = f"( {command}\n) </dev/null 2>&1; printf '\\n{marker} %s\\n' $?\n"
+        pattern = re.compile(rb"\n" + marker.encode() + rb" (\d+)\n")
+        with self.lock:
+            try:
+                # shell chỉ chạy ( ... ) khi đã nhận đủ tới dấu ")": gửi dở dang thì command chưa chạy
+                self._conn.socket.sendall(script.encode("utf-8"))
+            except OSError as e:
+                raise CommandNotSent(f"root shell on {self.serial} is gone: {e}") from e
+            while True:
+                match = pattern.search(self._buffer)
+                if match:
+                    output = self._buffer[:match.start()]
+                    self._buffer = self._buffer[match.end():]
+                    return output.decode("utf-8", errors="replace"), int(match.group(1))
+                try:
+                    chunk = self._conn.socket.recv(65536)
+                except TimeoutError:
+                    raise RuntimeError(f"root shell on {self.serial}: no reply in time, the command may still be running")
+                if not chunk:
+                    raise RuntimeError(f"root shell on {self.serial} closed")
+                self._buffer += chunk
+
+    def close(self):
+        try:
+            self._conn.socket.sendall(b"exit\n")
+        except Exception:
+            pass
+        self._conn.close()
+
+
+_sessions = {}
+# serial -> time.monotonic() lần mở session thất bại gần nhất
+_unavailable = {}
+_registry_lock = threading.Lock()
+
+
+def get_root_shell(device):
+    """Return the shared RootShell of device, or None when a persistent su session cannot be opened."""
+    if DISABLED:
+        return None
+    with _registry_lock:
+        failed_at = _unavailable.get(device.serial)
+        if failed_at is not None and time.monotonic() - failed_at < UNAVAILABLE_RETRY:
+            return None
+        session = _sessions.get(device.serial)
+        if session is None:
+            try:
+                session = RootShell(device)
+            except Exception:
+                _unavailable[device.serial] = time.monotonic()
+                return None
+            _unavailable.pop(device.serial, None)
+            _sessions[device.serial] = session
+        return session
+
+
+def drop_root_shell(serial):
+    with _registry_lock:
+        session = _sessions.pop(serial, None)
+    if session is not None:
+        session.close()
+
+
+def root_run(device, command):
+    """
+    Run command as root and return (output, exit code); per-call `su -c` when no session is available.
+    A session that breaks after the command was sent is dropped and the error raised: the command may
+    have run, and cert installs, proxy rollbacks or `kill -9` must not run twice.
+    """
+    session = get_root_shell(device)
+    if session is not None:
+        try:
+            return session.run(command)
+        except CommandNotSent:
+            drop_root_shell(device.serial)
+        except Exception:
+            drop_root_shell(device.serial)
+            raise
+    marker = f"__FT_{os.urandom(16).hex()}__"
+    output = device.shell(f"su -c {shlex.quote(command)} 2>&1; printf '\\n{marker} %s\\n' $?")
+    body, sep, tail = output.rpartition(f"\n{marker} ")
+    if not sep:
+        return output, -1
+    return body, int(tail.split()[0]) if tail.split() else -1
+
+
+def root_shell(device, command):
+    """Drop-in replacement for device.shell("su -c '...'"): return the command output."""
+    return root_run(device, command)[0]
+
+
+@atexit.register
+def close_all():
+    for serial in list(_sessions):
+        drop_root_shell(serial)
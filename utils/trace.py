@@ -0,0 +1,228 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+from utils.color_utils import ANSI
+from utils.output import emit
+from utils.paths import local_path
+
+# Chỉ patch khi bật --profile (hoặc FRIDA_TOOL_PROFILE=1 cho mcp_server): tắt thì không tốn gì
+COMMAND_LIMIT = 200
+# Giá trị sau các flag này không được ghi vào trace (trace file hay được chia sẻ)
+SECRET_FLAGS = ("-storepass", "-keypass", "--keypass")
+
+_enabled = False
+# số lần enable() chưa disable(): daemon có thể chạy nhiều lệnh --profile cùng lúc
+_users = 0
+_patch_lock = threading.Lock()
+_originals = []
+_spans = []
+# daemon / mcp_server: span ngoài mọi collect() (thread nền, lệnh không --profile) bị bỏ, không tích lại mãi
+_keep_orphans = True
+_lock = threading.Lock()
+_origin = time.perf_counter()
+# sink theo context: mcp_server gom span của từng tool call
+_collector = contextvars.ContextVar("trace_collector", default=None)
+
+
+def add_profile_arguments(parser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true",
+                       help="Time every ADB shell/push/connect, su command, subprocess and HTTP fetch; print a per-phase summary")
+    group.add_argument("--trace-out", metavar="FILE", type=local_path, help="Also write the spans as Chrome trace JSON (chrome://tracing, Perfetto)")
+
+
+def is_enabled():
+    return _enabled
+
+
+def _record(record):
+    sink = _collector.get()
+    if sink is None and not _keep_orphans:
+        return
+    with _lock:
+        (sink if sink is not None else _spans).append(record)
+
+
+def drop_orphans():
+    """Server mode: only keep spans recorded inside collect()."""
+    global _keep_orphans
+    _keep_orphans = False
+    with _lock:
+        _spans.clear()
+
+
+@contextlib.contextmanager
+def span(phase, serial=None, command=None, **fields):
+    """Time the block as one span. Yields the span dict (None when tracing is off) so callers can add fields."""
+    if not _enabled:
+        yield None
+        return
+    record = {"phase": phase, "serial": serial, "command": str(command)[:COMMAND_LIMIT] if command is not None else None,
+              "thread": threading.get_ident(), "start": time.perf_counter(), **fields}
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - record["start"]
+        _record(record)
+
+
+def _patch(owner, name, phase, describe, size=None):
+    original = getattr(owner, name)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        try:
+            fields = describe(*args, **kwargs)
+        except Exception:
+            fields = {}
+        with span(phase, **fields) as record:
+            result = original(*args, **kwargs)
+            if record is not None and size is not None:
+                try:
+                    record["bytes"] = size(args, result)
+                except Exception:
+                    pass
+            return result
+
+    setattr(owner, name, wrapper)
+    _originals.append((owner, name, original))
+
+
+def _argv(args):
+    if not isinstance(args, (list, tuple)):
+        return str(args)
+    args = [str(arg) for arg in args]
+    return " ".join("***" if i and args[i - 1] in SECRET_FLAGS else arg for i, arg in enumerate(args))
+
+
+def enable():
+    """Instrument ppadb, the root shell, subprocess.run and requests (once). Each enable() needs one disable()."""
+    global _users
+    with _patch_lock:
+        _users += 1
+        if _users == 1:
+            _instrument()
+
+
+def _instrument():
+    global _enabled
+    _enabled = True
+    import subprocess
+    _patch(subprocess, "run", "subprocess", lambda args, *a, **kw: {"command": _argv(args)})
+    try:
+        from ppadb.device import Device
+        from ppadb.command.transport import Transport
+    except ImportError:
+        pass
+    else:
+        _patch(Device, "create_connection", "adb.connect", lambda self, *a, **kw: {"serial": self.serial})
+        _patch(Transport, "shell", "adb.shell", lambda self, cmd, *a, **kw: {"serial": self.serial, "command": cmd},
+               lambda args, result: len(result) if isinstance(result, (str, bytes)) else None)
+        _patch(Device, "push", "adb.push", lambda self, src, dest, *a, **kw: {"serial": self.serial, "command": dest},
+               lambda args, result: os.path.getsize(args[1]))
+    from utils.root_shell import RootShell
+    _patch(RootShell, "__init__", "su.open", lambda self, device, *a, **kw: {"serial": device.serial})
+    _patch(RootShell, "run", "su.run", lambda self, command: {"serial": self.serial, "command": command},
+           lambda args, result: len(result[0]))
+    try:
+        import requests
+    except ImportError:
+        pass
+    else:
+        _patch(requests.Session, "request", "http", lambda self, method, url, *a, **kw: {"command": f"{method} {url}"},
+               # stream=True: body chưa đọc lúc trả về, lấy Content-Length
+               lambda args, result: len(result.content) if result._content_consumed
+               else int(result.headers.get("Content-Length", 0)))
+
+
+def disable():
+    """Undo one enable(); the instrumentation is removed with the last one."""
+    global _enabled, _users
+    with _patch_lock:
+        _users = max(0, _users - 1)
+        if _users:
+            return
+        while _originals:
+            owner, name, original = _originals.pop()
+            setattr(owner, name, original)
+        _enabled = False
+
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+
+@contextlib.contextmanager
+def collect():
+    """Gather the spans recorded in this context (and pool threads started via output.propagate) into a list."""
+    collected = []
+    token = _collector.set(collected)
+    try:
+        yield collected
+    finally:
+        _collector.reset(token)
+
+
+def summarize(records):
+    """Per-phase rows {"phase", "count", "total", "mean", "max", "bytes", "errors"}, slowest phase first."""
+    phases = {}
+    for record in records:
+        row = phases.setdefault(record["phase"], {"phase": record["phase"], "count": 0, "total": 0.0, "max": 0.0,
+                                                  "bytes": 0, "errors": 0})
+        row["count"] += 1
+        row["total"] += record["duration"]
+        row["max"] = max(row["max"], record["duration"])
+        row["bytes"] += record.get("bytes") or 0
+        row["errors"] += "error" in record
+    rows = sorted(phases.values(), key=lambda row: row["total"], reverse=True)
+    for row in rows:
+        row["mean"] = row["total"] / row["count"]
+        for key in ("total", "mean", "max"):
+            row[key] = round(row[key], 4)
+    return rows
+
+
+def print_summary(records=None):
+    records = spans() if records is None else records
+    rows = summarize(records)
+    print(f"\n{ANSI.BOLD}{'PHASE':<14} {'COUNT':>6} {'TOTAL':>9} {'MEAN':>9} {'MAX':>9} {'BYTES':>11}{ANSI.RESET}")
+    for row in rows:
+        print(f"{row['phase']:<14} {row['count']:>6} {row['total'] * 1000:>7.1f}ms {row['mean'] * 1000:>7.1f}ms "
+              f"{row['max'] * 1000:>7.1f}ms {row['bytes']:>11}" + (f" {ANSI.RED}{row['errors']} failed{ANSI.RESET}" if row["errors"] else ""))
+        emit("timing", **row)
+    if not rows:
+        print(f"{ANSI.YELLOW}No spans recorded.{ANSI.RESET}")
+    print(f"{ANSI.CYAN}Phases nest (adb.shell includes its adb.connect), so totals can exceed wall time.{ANSI.RESET}")
+
+
+def chrome_trace(records):
+    """Chrome trace event format: one complete ("X") event per span, one track per thread."""
+    events = []
+    for record in records:
+        args = {key: value for key, value in record.items() if key not in ("phase", "start", "duration", "thread") and value is not None}
+        events.append({
+            "name": record["command"] or record["phase"],
+            "cat": record["phase"],
+            "ph": "X",
+            "ts": round((record["start"] - _origin) * 1e6, 1),
+            "dur": round(record["duration"] * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": record["thread"],
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome(path, records=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(spans() if records is None else records), f)
+    return path
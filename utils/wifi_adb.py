@@ -0,0 +1,203 @@
+import ipaddress
+import struct
+import threading
+import time
+
+from utils.adb_utils import DEVICE_TIMEOUT, device_states, get_client
+from utils.output import emit
+
+ADB_PORT = 5555
+# Quét: số probe đồng thời, timeout (giây) cho connect + trả lời CNXN, và giới hạn kích thước dải (/16)
+SCAN_CONCURRENCY = 256
+PROBE_TIMEOUT = 0.5
+MAX_SCAN_TARGETS = 65536
+# Watcher: chu kỳ kiểm tra host:devices và backoff (giây) khi reconnect thất bại liên tiếp
+WATCH_INTERVAL = 2
+BACKOFF_MIN = 1
+BACKOFF_MAX = 60
+
+# Gói CNXN của giao thức adbd: thiết bị trả lời CNXN (không cần auth), AUTH hoặc STLS (ADB qua TLS, Android 11+)
+A_CNXN, A_AUTH, A_STLS = 0x4E584E43, 0x48545541, 0x534C5453
+ADB_VERSION = 0x01000001
+MAX_PAYLOAD = 256 * 1024
+
+
+def _packet(command, arg0, arg1, payload):
+    return struct.pack("<6I", command, arg0, arg1, len(payload), sum(payload) & 0xFFFFFFFF, command ^ 0xFFFFFFFF) + payload
+
+
+CNXN_PACKET = _packet(A_CNXN, ADB_VERSION, MAX_PAYLOAD, b"host::\0")
+
+
+def parse_ports(text):
+    """"5555", "5555,5557" or "37000-37100" -> [ports]."""
+    ports = []
+    for part in str(text).split(","):
+        first, sep, last = part.strip().partition("-")
+        ports += range(int(first), int(last) + 1) if sep else [int(first)]
+    if not ports or any(not 0 < port < 65536 for port in ports):
+        raise ValueError(f"Invalid port list '{text}'")
+    return ports
+
+
+def _hosts(network):
+    hosts = iter(network.hosts())
+    first = next(hosts, None)
+    # /31, /32: hosts() của Python cũ bỏ mất địa chỉ
+    yield network.network_address if first is None else first
+    yield from hosts
+
+
+def scan_targets(cidr, ports):
+    """
+    Lazy (host, port) pairs for every host address of cidr and every port. The size is checked
+    up front, so a huge range (10.0.0.0/8, an IPv6 /64) fails at once instead of being listed.
+    """
+    network = ipaddress.ip_network(cidr, strict=False)
+    if network.num_addresses * len(ports) > MAX_SCAN_TARGETS:
+        raise ValueError(f"{cidr} x {len(ports)} port(s) is more than {MAX_SCAN_TARGETS} targets")
+    return ((str(host), port) for host in _hosts(network) for port in ports)
+
+
+async def probe(host, port, timeout=PROBE_TIMEOUT):
+    """True when host:port answers an ADB CNXN with CNXN, AUTH or STLS (a plain open port is not enough)."""
+    import asyncio
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        writer.write(CNXN_PACKET)
+        header = await asyncio.wait_for(reader.readexactly(24), timeout)
+        command, _, _, _, _, magic = struct.unpack("<6I", header)
+        return command in (A_CNXN, A_AUTH, A_STLS) and magic == command ^ 0xFFFFFFFF
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return False
+    finally:
+        writer.close()
+
+
+async def scan(targets, concurrency=SCAN_CONCURRENCY, timeout=PROBE_TIMEOUT):
+    """[(host, port)] of targets (any iterable, read lazily) that answer as ADB, probed by `concurrency` workers."""
+    import asyncio
+    pending = iter(targets)
+    found = []
+
+    async def worker():
+        for host, port in pending:
+            if await probe(host, port, timeout):
+                emit("progress", step="found", target=f"{host}:{port}")
+                found.append((host, port))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return sorted(found, key=lambda target: (ipaddress.ip_address(target[0]), target[1]))
+
+
+def connect(host, port=ADB_PORT):
+    """`adb connect host:port` through the ADB server. Return {"target", "connected", "output"}."""
+    target = f"{host}:{port}"
+    with get_client().create_connection(timeout=DEVICE_TIMEOUT) as conn:
+        conn.send(f"host:connect:{target}")
+        output = conn.receive()
+    return {"target": target, "connected": "connected to" in output, "output": output.strip()}
+
+
+def disconnect(target):
+    with get_client().create_connection(timeout=DEVICE_TIMEOUT) as conn:
+        conn.send(f"host:disconnect:{target}")
+        return conn.receive().strip()
+
+
+def discover(cidr, ports=(ADB_PORT,), concurrency=SCAN_CONCURRENCY, timeout=PROBE_TIMEOUT):
+    """Probe every host of cidr on ports, then connect to every responder in parallel. Return a result dict."""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    targets = scan_targets(cidr, ports)
+    probed = 0
+
+    def counted():
+        nonlocal probed
+        for target in targets:
+            probed += 1
+            yield target
+
+    start = time.time()
+    found = asyncio.run(scan(counted(), concurrency, timeout))
+    scan_seconds = time.time() - start
+    results = []
+    if found:
+        with ThreadPoolExecutor(max_workers=min(16, len(found))) as executor:
+            results = list(executor.map(lambda target: _try_connect(*target), found))
+    return {"cidr": cidr, "ports": list(ports), "probed": probed, "scan_seconds": round(scan_seconds, 3),
+            "found": [f"{host}:{port}" for host, port in found], "connections": results}
+
+
+def _try_connect(host, port):
+    try:
+        return connect(host, port)
+    except Exception as e:
+        return {"target": f"{host}:{port}", "connected": False, "output": str(e).strip() or type(e).__name__}
+
+
+class Watcher:
+    """
+    Keep WiFi targets (host:port serials) connected: every `interval` seconds host:devices is read once,
+    and every target that is missing or offline is reconnected. A target that keeps failing is retried
+    after BACKOFF_MIN, 2x, 4x ... up to BACKOFF_MAX seconds. A pass where the ADB server is down
+    treats every target as missing, so they are reconnected once it is back.
+    """
+
+    def __init__(self, targets, interval=WATCH_INTERVAL, backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX):
+        self.interval = interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.targets = {target: {"failures": 0, "next_try": 0.0, "reconnects": 0} for target in targets}
+        self._stop = threading.Event()
+
+    def check(self, now=None):
+        """One pass; return [event dict] for the targets that were reconnected or failed to."""
+        now = time.monotonic() if now is None else now
+        try:
+            states = dict(device_states(get_client()))
+        except Exception as e:
+            # ADB server đang restart: coi mọi target là mất kết nối, reconnect (với backoff) tới khi nó lên lại
+            emit("error", step="watch", error=str(e).strip() or type(e).__name__)
+            states = {}
+        events = []
+        for target, state in self.targets.items():
+            current = states.get(target)
+            if current == "device":
+                state["failures"] = 0
+                continue
+            if now < state["next_try"]:
+                continue
+            if current is not None:
+                try:
+                    disconnect(target)  # offline/unauthorized: adb chỉ thử lại sau khi disconnect
+                except Exception:
+                    pass  # connect bên dưới báo lỗi
+            result = _try_connect(*target.rsplit(":", 1))
+            if result["connected"]:
+                state["failures"], state["next_try"] = 0, 0.0
+                state["reconnects"] += 1
+            else:
+                state["failures"] += 1
+                state["next_try"] = now + min(self.backoff_max, self.backoff_min * 2 ** (state["failures"] - 1))
+            event = dict(result, was=current or "missing", attempt=state["failures"],
+                         retry_in=round(state["next_try"] - now, 1) if state["failures"] else None)
+            emit("progress", step="reconnect", **event)
+            events.append(event)
+        return events
+
+    def run(self, on_events=None):
+        """check() every interval (sooner when a backoff expires) until stop()."""
+        while not self._stop.is_set():
+            events = self.check()
+            if events and on_events is not None:
+                on_events(events)
+            now = time.monotonic()
+            retries = [state["next_try"] - now for state in self.targets.values() if state["next_try"] > now]
+            self._stop.wait(max(0.05, min([self.interval] + retries)))
+
+    def stop(self):
+        self._stop.set()